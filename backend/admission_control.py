@@ -0,0 +1,172 @@
+import os
+import time
+import math
+import threading
+from collections import Counter, OrderedDict, deque
+
+import config
+from metrics import ADMISSION_ACTIVE, ADMISSION_QUEUED, ADMISSION_LIMIT, ADMISSION_REJECTIONS, ADMISSION_WAIT_SECONDS
+
+# Longest a request waits in an endpoint's queue before it is turned away
+ADMISSION_QUEUE_TIMEOUT = float(os.getenv('ADMISSION_QUEUE_TIMEOUT', '60'))
+
+# Running plus queued requests allowed per client on one endpoint
+ADMISSION_MAX_PER_USER = int(os.getenv('ADMISSION_MAX_PER_USER', '2'))
+
+# Reverse proxies in front of the app whose X-Forwarded-For is trusted; clients are identified by
+# address, so behind a proxy set this or every request looks like it came from the proxy
+TRUSTED_PROXY_HOPS = int(os.getenv('TRUSTED_PROXY_HOPS', '0'))
+
+# Largest request body accepted by any endpoint (Flask MAX_CONTENT_LENGTH)
+MAX_REQUEST_BYTES = int(os.getenv('MAX_REQUEST_MB', '500')) * 1024 * 1024
+
+class AdmissionRejected(Exception):
+    """A request was turned away; the client should retry after retry_after seconds"""
+
+    def __init__(self, message, reason, retry_after):
+        super().__init__(message)
+        self.reason = reason
+        self.retry_after = retry_after
+
+class AdmissionLimiter:
+    """
+    Concurrency limit for one endpoint with a bounded wait queue
+
+    Waiting requests are admitted round-robin across clients, so one client
+    with many queued requests can't starve the others.
+    """
+
+    def __init__(self, endpoint, max_concurrent, max_queue, max_body_bytes,
+                 max_per_user=ADMISSION_MAX_PER_USER, queue_timeout=ADMISSION_QUEUE_TIMEOUT):
+        self.endpoint = endpoint
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.max_body_bytes = max_body_bytes
+        self.max_per_user = max_per_user
+        self.queue_timeout = queue_timeout
+
+        self._condition = threading.Condition()
+        self._active = 0
+        self._active_by_user = Counter()
+        # Client -> waiting tickets; dict order is the round-robin order
+        self._queues = OrderedDict()
+        self._queued = 0
+        self._granted = set()
+        # Moving average of request duration, for Retry-After estimates
+        self._average_seconds = 5.0
+
+        for kind, value in (("concurrency", max_concurrent), ("queue", max_queue),
+                            ("per_user", max_per_user), ("max_body_bytes", max_body_bytes)):
+            ADMISSION_LIMIT.set(value, endpoint=endpoint, kind=kind)
+
+    def retry_after(self):
+        """Seconds until a slot is likely to free up (caller holds the lock)"""
+        waves = (self._queued + 1) / max(1, self.max_concurrent)
+        return max(1, math.ceil(waves * self._average_seconds))
+
+    def reject(self, message, reason):
+        ADMISSION_REJECTIONS.inc(endpoint=self.endpoint, reason=reason)
+        return AdmissionRejected(message, reason, self.retry_after())
+
+    def update_gauges(self):
+        ADMISSION_ACTIVE.set(self._active, endpoint=self.endpoint)
+        ADMISSION_QUEUED.set(self._queued, endpoint=self.endpoint)
+
+    def dispatch(self):
+        """Hand free slots to waiting requests, one client at a time (caller holds the lock)"""
+        while self._active < self.max_concurrent and self._queued:
+            user, tickets = next(iter(self._queues.items()))
+            ticket = tickets.popleft()
+            if tickets:
+                self._queues.move_to_end(user)
+            else:
+                del self._queues[user]
+            self._queued -= 1
+            self._active += 1
+            self._active_by_user[user] += 1
+            self._granted.add(ticket)
+        self.update_gauges()
+        self._condition.notify_all()
+
+    def acquire(self, user):
+        """
+        Wait for a slot
+
+        Args:
+            user: Client identifier used for per-client limits and fairness
+
+        Raises:
+            AdmissionRejected: The client is over its limit, the queue is full or the wait timed out
+        """
+        started = time.perf_counter()
+        with self._condition:
+            if self._active_by_user[user] + len(self._queues.get(user, ())) >= self.max_per_user:
+                raise self.reject("Too many requests from this client in progress", "per_user")
+
+            if self._active < self.max_concurrent and not self._queued:
+                self._active += 1
+                self._active_by_user[user] += 1
+                self.update_gauges()
+                ADMISSION_WAIT_SECONDS.observe(0, endpoint=self.endpoint)
+                return
+
+            if self._queued >= self.max_queue:
+                raise self.reject("Server busy, queue is full", "queue_full")
+
+            ticket = object()
+            self._queues.setdefault(user, deque()).append(ticket)
+            self._queued += 1
+            self.update_gauges()
+
+            deadline = started + self.queue_timeout
+            while ticket not in self._granted:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    self._queues[user].remove(ticket)
+                    if not self._queues[user]:
+                        del self._queues[user]
+                    self._queued -= 1
+                    self.update_gauges()
+                    raise self.reject("Server busy, timed out waiting in queue", "timeout")
+                self._condition.wait(remaining)
+
+            self._granted.discard(ticket)
+        ADMISSION_WAIT_SECONDS.observe(time.perf_counter() - started, endpoint=self.endpoint)
+
+    def release(self, user, duration):
+        """Free a slot and admit the next waiting request"""
+        with self._condition:
+            self._active -= 1
+            self._active_by_user[user] -= 1
+            if not self._active_by_user[user]:
+                del self._active_by_user[user]
+            self._average_seconds = 0.8 * self._average_seconds + 0.2 * duration
+            self.dispatch()
+
+def limiter_from_env(endpoint, prefix, max_concurrent, max_queue, max_body_mb):
+    """Create a limiter whose defaults can be overridden with <prefix>_MAX_CONCURRENT, _MAX_QUEUE and _MAX_BODY_MB"""
+    return AdmissionLimiter(
+        endpoint,
+        max_concurrent=int(os.getenv(f'{prefix}_MAX_CONCURRENT', str(max_concurrent))),
+        max_queue=int(os.getenv(f'{prefix}_MAX_QUEUE', str(max_queue))),
+        max_body_bytes=int(os.getenv(f'{prefix}_MAX_BODY_MB', str(max_body_mb))) * 1024 * 1024
+    )
+
+# Expensive endpoints by method and route pattern: decoding, rasterizing, OpenAI and ElevenLabs calls
+ADMISSION_LIMITERS = {
+    ('POST', '/api/feedback'): limiter_from_env('/api/feedback', 'FEEDBACK', 2, 8, 500),
+    ('POST', '/api/process-upload'): limiter_from_env('/api/process-upload', 'PROCESS_UPLOAD', 2, 8, 50),
+    ('POST', '/api/chat'): limiter_from_env('/api/chat', 'CHAT', 8, 16, 25),
+    ('PATCH', '/api/recordings/<upload_id>'): limiter_from_env('/api/recordings/<upload_id>', 'RECORDING_CHUNK', 8, 32, 16),
+    ('POST', '/api/live-sessions'): limiter_from_env('/api/live-sessions', 'LIVE_SESSION', 4, 16, 1),
+    ('POST', '/api/live-sessions/<live_session_id>/audio'): limiter_from_env(
+        '/api/live-sessions/<live_session_id>/audio', 'LIVE_AUDIO', 8, 32, 25),
+    ('POST', '/api/live-sessions/<live_session_id>/finish'): limiter_from_env(
+        '/api/live-sessions/<live_session_id>/finish', 'LIVE_FINISH', 4, 16, 1),
+}
+# GET and POST share one TTS limiter so switching methods doesn't double a client's allowance
+ADMISSION_LIMITERS[('GET', '/api/tts')] = ADMISSION_LIMITERS[('POST', '/api/tts')] = limiter_from_env('/api/tts', 'TTS', 4, 16, 1)
+
+def get_limiter(endpoint, method):
+    """Limiter for a request, or None for endpoints that are not limited"""
+    return ADMISSION_LIMITERS.get((method, endpoint))
@@ -1,15 +1,8 @@
 import os
 import tempfile
-from openai import OpenAI
-from dotenv import load_dotenv
-
-load_dotenv(os.path.join(os.path.dirname(__file__), '..', '.env'))
-
-api_key = os.getenv('OPENAI_API_KEY')
-if not api_key:
-    raise ValueError("OPENAI_API_KEY not found in environment variables")
-
-client = OpenAI(api_key=api_key)
+from openai_client import client
+from usage_stats import timed_completion
+from transcription_service import get_transcription_backend
 
 SYSTEM_PROMPT = """You are a seasoned VC mentor and entrepreneurship professor giving live, voice-based feedback to a founder who's walking you through a pitch deck.
 
@@ -60,49 +53,74 @@ curious, concise, a little skeptical, and totally focused on what will make this
 
 def transcribe_audio(audio_file):
     """
-    Transcribe audio file using OpenAI Whisper
+    Transcribe audio file with the configured transcription backend
     """
     try:
-        with open(audio_file, 'rb') as f:
-            transcript = client.audio.transcriptions.create(
-                model="whisper-1",
-                file=f,
-                response_format="text"
-            )
-        return transcript
+        return get_transcription_backend().transcribe(audio_file)
     except Exception as e:
         raise Exception(f"Audio transcription error: {str(e)}")
 
-def chat_with_ai(messages, pdf_context=None, audio_transcription=None):
+def chat_with_ai(messages, pdf_context=None, audio_transcription=None, deck_summary=None, slide_context=None):
+    """
+    Generate the VC mentor's next reply
+
+    Args:
+        messages: Conversation so far
+        pdf_context: Whole-deck text, used when per-slide retrieval is not available
+        audio_transcription: What the founder said during this walkthrough
+        deck_summary: Precomputed per-slide notes covering the whole deck
+        slide_context: Text of the slides on screen and those most relevant to this turn
+
+    Returns:
+        The reply text
+    """
     try:
         print("🤖 AI service called")
         print(f"📄 PDF context provided: {bool(pdf_context)}")
+        print(f"🔮 Deck summary provided: {bool(deck_summary)}")
+        print(f"🔎 Retrieved slides provided: {bool(slide_context)}")
         print(f"🎙️ Audio transcription provided: {bool(audio_transcription)}")
         
         if audio_transcription:
             print(f"📝 Transcription length: {len(audio_transcription)} characters")
             print(f"📝 Transcription preview: {audio_transcription[:100]}...")
         
-        # Create system prompt with optional PDF context and audio transcription
+        # Stable prefix: static instructions, then deck context. It is identical for every
+        # turn on the same deck, so the provider can serve it from its prompt cache.
         system_content = SYSTEM_PROMPT
         
         if pdf_context:
             system_content += f"\n\nCONTEXT: The entrepreneur/founder is working with the following material:\n\n{pdf_context}\n\nUse this content as reference when providing mentorship. You can refer to specific concepts, frameworks, or case studies from the material while maintaining your conversational mentoring approach."
         
-        if audio_transcription:
-            print("🎯 Adding audio transcription to AI context!")
-            system_content += f"\n\nPRESENTATION WALKTHROUGH: Here's what the founder said while walking through their presentation:\n\n\"{audio_transcription}\"\n\nUse this spoken walkthrough to understand how they presented their ideas, what they emphasized, and tailor your questions accordingly. Focus on areas where their explanation might need strengthening or where you detected uncertainty."
+        if deck_summary:
+            system_content += f"\n\nDECK NOTES: You prepared these notes on each slide before the meeting, with the claims to test and questions worth asking:\n\n{deck_summary}\n\nDraw on these notes to pick your next question; don't read them out."
         
-        # Add system prompt to the beginning of messages
+        # Conversation history only grows, so earlier turns extend the cached prefix
         full_messages = [{"role": "system", "content": system_content}] + messages
         
-        response = client.chat.completions.create(
+        # Volatile suffix: this turn's slides and walkthrough transcription go last so they never invalidate the prefix
+        if slide_context:
+            full_messages.append({
+                "role": "system",
+                "content": f"RELEVANT SLIDES: The slides on screen and those most related to the founder's latest message:\n\n{slide_context}\n\nRefer to these slides by number when you question specific claims."
+            })
+        
+        if audio_transcription:
+            print("🎯 Adding audio transcription to AI context!")
+            full_messages.append({
+                "role": "system",
+                "content": f"PRESENTATION WALKTHROUGH: Here's what the founder said while walking through their presentation:\n\n\"{audio_transcription}\"\n\nUse this spoken walkthrough to understand how they presented their ideas, what they emphasized, and tailor your questions accordingly. Focus on areas where their explanation might need strengthening or where you detected uncertainty."
+            })
+        
+        response = timed_completion(
+            "chat",
+            client.chat.completions.create,
             model="gpt-5",
             messages=full_messages,
             max_completion_tokens=800,
             reasoning_effort="minimal",
             # temperature=0.7
-        )   
+        )
         
         ai_response = response.choices[0].message.content
         
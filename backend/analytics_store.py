@@ -0,0 +1,223 @@
+import os
+import re
+import time
+import sqlite3
+import threading
+import calendar
+from concurrent.futures import ThreadPoolExecutor
+
+import config
+from metrics import stage_timer
+
+# One row per (session, slide, criterion) outcome with the slide's timing and transcript statistics
+ANALYTICS_DIR = "analytics"
+ANALYTICS_FILE = "outcomes.db"
+
+ANALYTICS_RETENTION_DAYS = int(os.getenv('ANALYTICS_RETENTION_DAYS', '730'))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS outcomes (
+    session_id TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    assignment TEXT,
+    slide_number INTEGER,
+    slide_position INTEGER,
+    slide_count INTEGER,
+    criterion TEXT NOT NULL,
+    status TEXT NOT NULL,
+    duration_seconds REAL,
+    word_count INTEGER,
+    words_per_minute REAL,
+    filler_rate_percent REAL,
+    long_pause_count INTEGER
+);
+CREATE INDEX IF NOT EXISTS outcomes_criterion_created ON outcomes (criterion, created_at);
+CREATE INDEX IF NOT EXISTS outcomes_created ON outcomes (created_at);
+CREATE INDEX IF NOT EXISTS outcomes_session ON outcomes (session_id);
+"""
+
+# Dimensions /api/analytics/outcomes can group by, as SQL expressions over the outcomes table
+GROUP_BY_EXPRESSIONS = {
+    'slide_position': "slide_position",
+    'slide_number': "slide_number",
+    'criterion': "criterion",
+    'assignment': "assignment",
+    'day': "date(created_at, 'unixepoch')",
+    'week': "strftime('%Y-W%W', created_at, 'unixepoch')",
+}
+
+CRITERIA = ("content_structuring", "delivery", "impromptu_response", "composure")
+DURATION_PATTERN = re.compile(r"^(\d+)([hdw])$")
+
+_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="analytics")
+_schema_ready = False
+_schema_lock = threading.Lock()
+
+def get_store_path():
+    backend_dir = os.path.dirname(os.path.abspath(__file__))
+    return os.path.join(backend_dir, ANALYTICS_DIR, ANALYTICS_FILE)
+
+def connect():
+    """Open the store, creating it on first use"""
+    global _schema_ready
+    store_path = get_store_path()
+    os.makedirs(os.path.dirname(store_path), exist_ok=True)
+    connection = sqlite3.connect(store_path, timeout=30)
+    connection.execute("PRAGMA synchronous=NORMAL")
+    if not _schema_ready:
+        with _schema_lock:
+            if not _schema_ready:
+                connection.execute("PRAGMA journal_mode=WAL")
+                connection.executescript(SCHEMA)
+                _schema_ready = True
+    return connection
+
+def build_outcome_rows(session_id, structured_feedback, slide_transcripts=None, assignment=None):
+    """
+    Flatten one feedback session into outcome rows
+
+    Slide rows carry the slide's position in the pitch and its delivery statistics;
+    Q&A rows have no slide.
+    """
+    created_at = structured_feedback.get("metadata", {}).get("generated_at") or time.time()
+    slides = structured_feedback.get("slides", [])
+    rows = []
+    for position, slide in enumerate(slides, start=1):
+        slide_data = (slide_transcripts or {}).get(slide["slide_number"]) or {}
+        metrics = slide.get("delivery_metrics") or slide_data.get("metrics") or {}
+        duration = None
+        if slide_data.get("end_time") is not None and slide_data.get("start_time") is not None:
+            duration = slide_data["end_time"] - slide_data["start_time"]
+        for criterion, result in (slide.get("feedback") or {}).items():
+            if not isinstance(result, dict) or result.get("status") in (None, "unknown", "error"):
+                continue
+            rows.append((
+                session_id, created_at, assignment, slide["slide_number"], position, len(slides),
+                criterion, result["status"], metrics.get("duration_seconds") or duration,
+                metrics.get("word_count"), metrics.get("words_per_minute"),
+                metrics.get("filler_rate_percent"), metrics.get("long_pause_count")
+            ))
+
+    for criterion, result in (structured_feedback.get("qa_feedback") or {}).items():
+        if isinstance(result, dict) and result.get("status") not in (None, "unknown", "error"):
+            rows.append((session_id, created_at, assignment, None, None, len(slides),
+                         criterion, result["status"], None, None, None, None, None))
+    return rows
+
+def record_session_outcomes(session_id, structured_feedback, slide_transcripts=None, assignment=None):
+    """Replace a session's outcome rows"""
+    rows = build_outcome_rows(session_id, structured_feedback, slide_transcripts, assignment)
+    with stage_timer("analytics.record", rows=len(rows)):
+        connection = connect()
+        try:
+            with connection:
+                connection.execute("DELETE FROM outcomes WHERE session_id = ?", (session_id,))
+                connection.executemany(f"INSERT INTO outcomes VALUES ({', '.join('?' * 13)})", rows)
+        finally:
+            connection.close()
+    print(f"📈 Recorded {len(rows)} criterion outcomes for session {session_id}")
+
+def start_outcome_recording(session_id, structured_feedback, slide_transcripts=None, assignment=None):
+    """Record a finished feedback session's outcomes in the background"""
+    def run():
+        try:
+            record_session_outcomes(session_id, structured_feedback, slide_transcripts, assignment)
+        except Exception as e:
+            print(f"⚠️ Recording outcomes failed for session {session_id}: {e}")
+    _writer.submit(run)
+
+def parse_time_bound(value, now=None):
+    """
+    Parse a time filter: a relative duration ('24h', '7d', '4w'), 'week' (since Monday 00:00 UTC),
+    an ISO date ('2025-03-01') or Unix seconds
+
+    Returns:
+        Unix seconds, or None if value is empty
+
+    Raises:
+        ValueError: The value is not in a supported format
+    """
+    if not value:
+        return None
+    now = now or time.time()
+    match = DURATION_PATTERN.match(value)
+    if match:
+        amount, unit = int(match.group(1)), match.group(2)
+        return now - amount * {'h': 3600, 'd': 86400, 'w': 7 * 86400}[unit]
+    if value == 'week':
+        today = time.gmtime(now)
+        midnight = calendar.timegm((today.tm_year, today.tm_mon, today.tm_mday, 0, 0, 0))
+        return midnight - today.tm_wday * 86400
+    try:
+        return float(value)
+    except ValueError:
+        return calendar.timegm(time.strptime(value, '%Y-%m-%d'))
+
+def aggregate_outcomes(group_by='slide_position', criterion=None, since=None, until=None, assignment=None):
+    """
+    Pass rates and delivery statistics grouped by one dimension
+
+    Args:
+        group_by: One of GROUP_BY_EXPRESSIONS
+        criterion: Optional criterion to restrict to, e.g. 'delivery'
+        since, until: Optional Unix-second bounds on when feedback was generated
+        assignment: Optional assignment filename
+
+    Returns:
+        List of {"group", "outcomes", "sessions", "met", "not_met", "not_applicable", "pass_rate",
+        "avg_duration_seconds", "avg_words_per_minute", "avg_filler_rate_percent"} ordered by group
+    """
+    group_expression = GROUP_BY_EXPRESSIONS[group_by]
+    sql = (f"SELECT {group_expression} AS grp, COUNT(*), COUNT(DISTINCT session_id),"
+           " SUM(status = 'met'), SUM(status = 'not_met'), SUM(status = 'not_applicable'),"
+           " AVG(duration_seconds), AVG(words_per_minute), AVG(filler_rate_percent)"
+           " FROM outcomes WHERE 1 = 1")
+    params = []
+    for condition, value in (("criterion = ?", criterion), ("created_at >= ?", since),
+                             ("created_at < ?", until), ("assignment = ?", assignment)):
+        if value is not None:
+            sql += f" AND {condition}"
+            params.append(value)
+    sql += " GROUP BY grp ORDER BY grp"
+
+    with stage_timer("analytics.aggregate", group_by=group_by):
+        connection = connect()
+        try:
+            rows = connection.execute(sql, params).fetchall()
+        finally:
+            connection.close()
+
+    def rounded(value, digits=1):
+        return round(value, digits) if value is not None else None
+
+    return [
+        {
+            "group": group, "outcomes": outcomes, "sessions": sessions,
+            "met": met, "not_met": not_met, "not_applicable": not_applicable,
+            # N/A outcomes don't count toward the pass rate
+            "pass_rate": rounded(met / (met + not_met), 3) if met + not_met else None,
+            "avg_duration_seconds": rounded(duration), "avg_words_per_minute": rounded(wpm),
+            "avg_filler_rate_percent": rounded(filler_rate, 2)
+        }
+        for group, outcomes, sessions, met, not_met, not_applicable, duration, wpm, filler_rate in rows
+    ]
+
+def cleanup_old_outcomes(max_age_days=ANALYTICS_RETENTION_DAYS):
+    """Remove outcomes older than the retention period"""
+    try:
+        if not os.path.exists(get_store_path()):
+            return
+
+        cutoff_time = time.time() - (max_age_days * 24 * 3600)
+        connection = connect()
+        try:
+            with connection:
+                removed = connection.execute("DELETE FROM outcomes WHERE created_at < ?", (cutoff_time,)).rowcount
+        finally:
+            connection.close()
+
+        if removed:
+            print(f"🗑️ Removed {removed} expired analytics outcomes")
+
+    except Exception as e:
+        print(f"⚠️ Error during analytics cleanup: {e}")
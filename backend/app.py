@@ -1,18 +1,174 @@
-from flask import Flask, request, jsonify, send_file
+from flask import Flask, request, jsonify, send_file, g, Response, stream_with_context, redirect
 from flask_cors import CORS
+from werkzeug.middleware.proxy_fix import ProxyFix
 import os
+import hmac
 import tempfile
-from dotenv import load_dotenv
+import uuid
+import time
+import gzip
+import threading
+import config
 from ai_service import chat_with_ai, transcribe_audio
-from pdf_utils import get_assignment_text, get_assignment_slides_range
+from pdf_utils import get_assignment_text, get_assignment_slides_range, get_text_engine
 from feedback_service import generate_feedback
-from pdf_image_service import get_slide_image_path, save_slide_images, cleanup_old_sessions
-from feedback_service import get_audio_segment_path, cleanup_old_audio_sessions
+from pdf_image_service import get_slide_image_path, save_slide_images, cleanup_old_sessions, pdf_processing_available, \
+    get_slide_variant_path, cleanup_old_slide_variants, VARIANT_FORMATS, VARIANT_WIDTHS, get_thumbnail_sprite
+from feedback_service import get_audio_segment_path, cleanup_old_audio_sessions, audio_processing_available, \
+    get_feedback_result_path, get_session_expiry
+from upload_service import (
+    UploadError, create_upload, get_upload_status, append_upload_chunk,
+    complete_upload, get_completed_upload_path, cleanup_old_uploads
+)
+from deck_insights_service import (
+    PRECOMPUTE_DECK_INSIGHTS, start_deck_insights_precompute, get_deck_insights,
+    get_session_id_from_filename, format_deck_insights, cleanup_old_deck_insights
+)
+from usage_stats import get_usage_summary
+from metrics import render_metrics, start_request, finish_request, end_request
+from tracing import TRACED_ENDPOINTS, start_trace, end_trace, span, cleanup_old_traces
+from openai_client import get_openai_client
+from delivery_metrics import delivery_metrics_available
+from transcription_service import get_transcription_backend
+from deck_index_service import retrieve_slide_context, start_deck_index_build, parse_slide_range
+from tts_service import (
+    synthesize_speech, is_valid_voice_id, is_speech_allowed, sign_speech_text, cleanup_old_tts_cache,
+    TTSError, TTS_MAX_CHARS
+)
+from artifact_storage import (
+    publish_file, ensure_local_file, list_artifacts, iter_artifact, get_storage, storage_key,
+    STORAGE_PRESIGNED_REDIRECTS, PRESIGNED_URL_EXPIRES, STATIC_OFFLOAD, offload_uri
+)
+from search_index import search, cleanup_old_search_entries, SEARCH_KINDS
+from analytics_store import (
+    aggregate_outcomes, parse_time_bound, cleanup_old_outcomes, GROUP_BY_EXPRESSIONS, CRITERIA
+)
+from admission_control import get_limiter, AdmissionRejected, MAX_REQUEST_BYTES, ADMISSION_REJECTIONS, TRUSTED_PROXY_HOPS
+from live_session_service import (
+    LiveSessionError, create_live_session, append_live_audio, finish_live_session,
+    get_live_session_status, collect_live_results, cleanup_live_session, cleanup_old_live_sessions
+)
 
-load_dotenv(os.path.join(os.path.dirname(__file__), '..', '.env'))
+# Instructor tools (cross-session search, cohort analytics) need 'Authorization: Bearer <INSTRUCTOR_TOKEN>';
+# without it configured they are unavailable. Session IDs are the only protection on stored sessions,
+# so they must never be listed to students
+INSTRUCTOR_TOKEN = os.getenv('INSTRUCTOR_TOKEN') or None
 
 app = Flask(__name__)
+app.config['MAX_CONTENT_LENGTH'] = MAX_REQUEST_BYTES
+# send_file answers with an X-Sendfile header and no body; the front proxy sends the file
+app.config['USE_X_SENDFILE'] = STATIC_OFFLOAD == 'x-sendfile'
 CORS(app, origins=["http://localhost:3000"])
+if TRUSTED_PROXY_HOPS:
+    # request.remote_addr becomes the client address the trusted proxies saw, for per-client limits
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=TRUSTED_PROXY_HOPS)
+
+def get_endpoint_label():
+    """Route pattern of the current request, keeping metric labels bounded (no session IDs)"""
+    return request.url_rule.rule if request.url_rule else "unmatched"
+
+@app.before_request
+def track_request_start():
+    g.metrics_endpoint = get_endpoint_label()
+    g.metrics_started = start_request(g.metrics_endpoint)
+    
+    # Trace the expensive endpoints; the trace ID doubles as the request ID returned to the client
+    g.request_id = request.headers.get('X-Request-ID') or str(uuid.uuid4())
+    if g.metrics_endpoint in TRACED_ENDPOINTS:
+        g.trace_root, g.trace_token = start_trace(
+            f"{request.method} {g.metrics_endpoint}", g.request_id,
+            **{"http.method": request.method, "http.route": g.metrics_endpoint}
+        )
+        g.request_id = str(uuid.UUID(g.trace_root.trace_id))
+
+def get_client_id():
+    """
+    Client identity for per-client admission limits; there are no accounts, so the client address stands in
+
+    Never taken from a client-supplied header, which a client could rotate to get unlimited slots.
+    """
+    return request.remote_addr or "unknown"
+
+def is_instructor_request():
+    """Whether the request carries the configured instructor token"""
+    if not INSTRUCTOR_TOKEN:
+        return False
+    authorization = request.headers.get('Authorization', '')
+    token = authorization[len('Bearer '):] if authorization.startswith('Bearer ') else ''
+    return hmac.compare_digest(token.encode('utf-8'), INSTRUCTOR_TOKEN.encode('utf-8'))
+
+def busy_response(message, retry_after):
+    response = jsonify({'error': message, 'retry_after': retry_after})
+    response.status_code = 503
+    response.headers['Retry-After'] = str(retry_after)
+    return response
+
+def send_artifact(local_path, mimetype, cache_control=None):
+    """Serve a stored file: from this node if present, else from shared storage by presigned redirect or streaming"""
+    if os.path.exists(local_path) and STATIC_OFFLOAD == 'x-accel-redirect':
+        # nginx streams the file from its internal location; the worker is free immediately
+        response = Response(mimetype=mimetype)
+        response.headers['X-Accel-Redirect'] = offload_uri(local_path)
+    elif os.path.exists(local_path):
+        response = send_file(local_path, mimetype=mimetype)
+    else:
+        url = get_storage().presigned_url(storage_key(local_path)) if STORAGE_PRESIGNED_REDIRECTS else None
+        if url:
+            response = redirect(url)
+            # The presigned URL expires, so the redirect must not be cached longer than it
+            response.headers['Cache-Control'] = f'private, max-age={PRESIGNED_URL_EXPIRES // 2}'
+            return response
+        response = Response(stream_with_context(iter_artifact(local_path)), mimetype=mimetype)
+    if cache_control:
+        response.headers['Cache-Control'] = cache_control
+    return response
+
+@app.before_request
+def admit_request():
+    """Limit concurrent expensive requests per endpoint; excess requests queue briefly, then get 503"""
+    limiter = get_limiter(g.metrics_endpoint, request.method)
+    if limiter is None:
+        return None
+    
+    if request.content_length and request.content_length > limiter.max_body_bytes:
+        ADMISSION_REJECTIONS.inc(endpoint=limiter.endpoint, reason="body_too_large")
+        return jsonify({'error': f'Request body exceeds {limiter.max_body_bytes // (1024 * 1024)} MB'}), 413
+    
+    client_id = get_client_id()
+    try:
+        with span("admission.wait", endpoint=limiter.endpoint):
+            limiter.acquire(client_id)
+    except AdmissionRejected as e:
+        print(f"🚦 Rejected {request.method} {limiter.endpoint} ({e.reason}), retry after {e.retry_after}s")
+        return busy_response(str(e), e.retry_after)
+    g.admission = (limiter, client_id, time.perf_counter())
+    return None
+
+@app.errorhandler(413)
+def request_too_large(error):
+    return jsonify({'error': f'Request body exceeds {MAX_REQUEST_BYTES // (1024 * 1024)} MB'}), 413
+
+@app.after_request
+def track_request_finish(response):
+    if 'metrics_started' in g:
+        finish_request(g.metrics_endpoint, request.method, response.status_code, g.metrics_started)
+    if 'trace_root' in g:
+        g.trace_root.set_attribute("http.status_code", response.status_code)
+    if g.get('request_id'):
+        response.headers['X-Request-ID'] = g.request_id
+    return response
+
+@app.teardown_request
+def track_request_end(error=None):
+    if 'admission' in g:
+        limiter, client_id, admitted = g.pop('admission')
+        limiter.release(client_id, time.perf_counter() - admitted)
+    if 'metrics_started' in g:
+        end_request(g.metrics_endpoint)
+    if 'trace_root' in g:
+        if error is not None:
+            g.trace_root.record_error(error)
+        end_trace(g.trace_root, g.trace_token)
 
 @app.route('/api/chat', methods=['POST'])
 def chat():
@@ -32,6 +188,8 @@ def chat():
             import json
             messages = json.loads(messages_json)
             selected_assignment = request.form.get('selectedAssignment')
+            pdf_session_id = request.form.get('pdfSessionId')
+            current_slides = parse_slide_range(request.form.get('currentSlideRange'))
             
             # Handle audio file if present
             audio_transcription = None
@@ -66,23 +224,50 @@ def chat():
             data = request.get_json()
             messages = data.get('messages', [])
             selected_assignment = data.get('selectedAssignment')
+            pdf_session_id = data.get('pdfSessionId')
+            current_slides = parse_slide_range(data.get('currentSlideRange'))
             audio_transcription = None
             
             if not messages:
                 return jsonify({'error': 'Messages are required'}), 400
         
-        # Extract PDF context if assignment is selected
+        # Show the model the slides on screen plus the slides most relevant to this turn,
+        # with precomputed deck insights (when ready) as an overview of the whole deck
         pdf_context = None
-        if selected_assignment:
-            pdf_context = get_assignment_text(selected_assignment)
+        deck_summary = None
+        slide_context = None
+        with span("chat.build_context") as context_span:
+            if selected_assignment:
+                deck_insights = get_deck_insights(pdf_session_id or get_session_id_from_filename(selected_assignment))
+                if deck_insights:
+                    deck_summary = format_deck_insights(deck_insights)
+                    print(f"🔮 Using precomputed deck insights ({len(deck_insights['slides'])} slides)")
+                
+                latest_message = messages[-1].get('content', '') if messages else ''
+                slide_context, selected_slides = retrieve_slide_context(
+                    selected_assignment,
+                    f"{latest_message}\n{audio_transcription or ''}",
+                    current_slides
+                )
+                if slide_context:
+                    print(f"🔎 Retrieved slides {selected_slides} for this turn")
+                elif not deck_summary:
+                    # No per-page text to index; fall back to the whole deck
+                    pdf_context = get_assignment_text(selected_assignment)
+            context_span.set_attributes(
+                messages=len(messages),
+                deck_insights=bool(deck_summary),
+                slide_context_chars=len(slide_context or ""),
+                pdf_context_chars=len(pdf_context or "")
+            )
         
-        ai_response = chat_with_ai(messages, pdf_context, audio_transcription)
+        ai_response = chat_with_ai(messages, pdf_context, audio_transcription, deck_summary, slide_context)
         
-        # Return simple response for entrepreneurship mentoring
-        return jsonify({'response': ai_response})
+        # Return simple response for entrepreneurship mentoring; the token lets the client have it spoken
+        return jsonify({'response': ai_response, 'tts_token': sign_speech_text(ai_response), 'request_id': g.request_id})
     
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return jsonify({'error': str(e), 'request_id': g.request_id}), 500
 
 
 @app.route('/api/assignments', methods=['GET'])
@@ -90,11 +275,8 @@ def get_assignments():
     try:
         assignments_dir = os.path.join(os.path.dirname(__file__), 'assignments')
         
-        if not os.path.exists(assignments_dir):
-            return jsonify({'assignments': []}), 200
-            
         pdf_files = []
-        for filename in os.listdir(assignments_dir):
+        for filename in list_artifacts(assignments_dir):
             if filename.endswith('.pdf'):
                 pdf_files.append({
                     'filename': filename,
@@ -112,10 +294,10 @@ def get_assignment_file(filename):
         assignments_dir = os.path.join(os.path.dirname(__file__), 'assignments')
         file_path = os.path.join(assignments_dir, filename)
         
-        if not os.path.exists(file_path) or not filename.endswith('.pdf'):
+        if not filename.endswith('.pdf') or not ensure_local_file(file_path):
             return jsonify({'error': 'File not found'}), 404
             
-        return send_file(file_path, mimetype='application/pdf')
+        return send_artifact(file_path, 'application/pdf')
     
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -199,9 +381,20 @@ def generate_pitch_feedback():
             if selected_assignment:
                 slide_content = get_assignment_text(selected_assignment)
             
-            # Handle recording file if present
+            # Handle recording file if present, or a completed chunked upload or live session
             presentation_recording = None
-            if 'recording' in request.files:
+            recording_path = None
+            precomputed_slides = None
+            missing_slides = None
+            recording_upload_id = request.form.get('recordingUploadId')
+            live_session_id = request.form.get('liveSessionId')
+            if live_session_id:
+                recording_path, slide_timestamps, precomputed_slides, missing_slides = collect_live_results(live_session_id)
+                print(f"⚡ Using live session {live_session_id}: {len(precomputed_slides)} slides precomputed, {len(missing_slides)} missing")
+            elif recording_upload_id:
+                recording_path = get_completed_upload_path(recording_upload_id)
+                print(f"🎙️ Using chunked upload {recording_upload_id}: {recording_path}")
+            elif 'recording' in request.files:
                 recording_file = request.files['recording']
                 print(f"🎙️ Recording file received: {recording_file.filename}")
                 
@@ -216,8 +409,15 @@ def generate_pitch_feedback():
                 slide_timestamps=slide_timestamps,
                 assignment_filename=selected_assignment,
                 pdf_session_id=pdf_session_id,
-                pdf_slide_count=pdf_slide_count
+                pdf_slide_count=pdf_slide_count,
+                recording_path=recording_path,
+                precomputed_slides=precomputed_slides,
+                missing_slides=missing_slides,
+                feedback_mode=request.form.get('feedbackMode') or None
             )
+            if live_session_id:
+                # The live recording and slide audio have been copied into the feedback session
+                cleanup_live_session(live_session_id)
             
         else:
             # Handle regular JSON request without recording
@@ -226,6 +426,20 @@ def generate_pitch_feedback():
             selected_assignment = data.get('selectedAssignment')
             pdf_session_id = data.get('pdfSessionId')
             pdf_slide_count = data.get('pdfSlideCount')
+            slide_timestamps = data.get('slideTimestamps') or []
+            
+            # A recording can only be referenced by chunked upload or live session id in JSON requests
+            recording_path = None
+            precomputed_slides = None
+            missing_slides = None
+            recording_upload_id = data.get('recordingUploadId')
+            live_session_id = data.get('liveSessionId')
+            if live_session_id:
+                recording_path, slide_timestamps, precomputed_slides, missing_slides = collect_live_results(live_session_id)
+                print(f"⚡ Using live session {live_session_id}: {len(precomputed_slides)} slides precomputed, {len(missing_slides)} missing")
+            elif recording_upload_id:
+                recording_path = get_completed_upload_path(recording_upload_id)
+                print(f"🎙️ Using chunked upload {recording_upload_id}: {recording_path}")
             
             print(f"📄 PDF session ID received (JSON): {pdf_session_id}")
             print(f"📄 PDF slide count received (JSON): {pdf_slide_count}")
@@ -245,36 +459,237 @@ def generate_pitch_feedback():
                 except:
                     pdf_slide_count = None
             
-            # Generate feedback without recording
+            # Generate feedback without a multipart recording
             feedback_data = generate_feedback(
                 conversation_history=conversation_history,
                 slide_content=slide_content,
                 presentation_recording=None,
-                slide_timestamps=[],
+                slide_timestamps=slide_timestamps if recording_path else [],
                 assignment_filename=selected_assignment,
                 pdf_session_id=pdf_session_id,
-                pdf_slide_count=pdf_slide_count
+                pdf_slide_count=pdf_slide_count,
+                recording_path=recording_path,
+                precomputed_slides=precomputed_slides,
+                missing_slides=missing_slides,
+                feedback_mode=data.get('feedbackMode') or None
             )
+            if live_session_id:
+                cleanup_live_session(live_session_id)
         
+        feedback_data['request_id'] = g.request_id
         return jsonify(feedback_data)
     
+    except UploadError as e:
+        return jsonify({'error': str(e), 'offset': e.offset, 'request_id': g.request_id}), e.status_code
+    except LiveSessionError as e:
+        return jsonify({'error': str(e), 'request_id': g.request_id}), e.status_code
     except Exception as e:
         print(f"❌ Feedback generation failed: {str(e)}")
+        return jsonify({'error': str(e), 'request_id': g.request_id}), 500
+
+@app.route('/api/feedback/<session_id>', methods=['GET'])
+def get_stored_feedback(session_id):
+    """Serve a previously generated feedback report without regenerating it"""
+    try:
+        result_path = get_feedback_result_path(session_id)
+        if not result_path:
+            return jsonify({'error': 'Feedback not found or expired'}), 404
+        
+        # Reports never change once written; cache them until the session is cleaned up.
+        # The gzip and identity bodies differ byte-wise, so the shared ETag is weak
+        try:
+            stat = os.stat(result_path)
+        except OSError:
+            stat = None
+        expires_at = get_session_expiry(session_id)
+        if stat is None or expires_at is None:
+            # Removed by cleanup since the lookup
+            return jsonify({'error': 'Feedback not found or expired'}), 404
+        etag_value = f"{session_id}-{int(stat.st_mtime)}"
+        etag = f'W/"{etag_value}"'
+        headers = {
+            'ETag': etag,
+            'Cache-Control': f'private, max-age={max(0, int(expires_at - time.time()))}',
+            'Expires': time.strftime('%a, %d %b %Y %H:%M:%S GMT', time.gmtime(expires_at)),
+            'Vary': 'Accept-Encoding'
+        }
+        if request.if_none_match.contains_weak(etag_value):
+            return Response(status=304, headers=headers)
+        
+        with open(result_path, 'rb') as f:
+            compressed = f.read()
+        # The report is stored gzipped; send it as-is to clients that accept gzip
+        if 'gzip' in request.accept_encodings:
+            headers['Content-Encoding'] = 'gzip'
+            return Response(compressed, mimetype='application/json', headers=headers)
+        return Response(gzip.decompress(compressed), mimetype='application/json', headers=headers)
+    
+    except Exception as e:
+        print(f"❌ Error serving stored feedback: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/recordings', methods=['POST'])
+def create_recording_upload():
+    """Start a chunked, resumable recording upload"""
+    try:
+        data = request.get_json(silent=True) or {}
+        total_size = data.get('totalSize')
+        status = create_upload(data.get('filename'), int(total_size) if total_size is not None else None)
+        return jsonify(status), 201
+    
+    except UploadError as e:
+        return jsonify({'error': str(e), 'offset': e.offset}), e.status_code
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/recordings/<upload_id>', methods=['GET', 'HEAD'])
+def recording_upload_status(upload_id):
+    """Get the received byte offset of a recording upload so the client can resume"""
+    try:
+        status = get_upload_status(upload_id)
+        response = jsonify(status)
+        response.headers['Upload-Offset'] = str(status['offset'])
+        return response
+    
+    except UploadError as e:
+        return jsonify({'error': str(e), 'offset': e.offset}), e.status_code
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/recordings/<upload_id>', methods=['PATCH'])
+def append_recording_chunk(upload_id):
+    """Append a chunk at the offset given in the Upload-Offset header"""
+    try:
+        offset_header = request.headers.get('Upload-Offset')
+        if offset_header is None:
+            return jsonify({'error': 'Upload-Offset header is required'}), 400
+        
+        new_offset = append_upload_chunk(
+            upload_id,
+            int(offset_header),
+            request.stream,
+            request.content_length
+        )
+        response = jsonify({'upload_id': upload_id, 'offset': new_offset})
+        response.headers['Upload-Offset'] = str(new_offset)
+        return response
+    
+    except UploadError as e:
+        response = jsonify({'error': str(e), 'offset': e.offset})
+        if e.offset is not None:
+            response.headers['Upload-Offset'] = str(e.offset)
+        return response, e.status_code
+    except ValueError:
+        return jsonify({'error': 'Upload-Offset must be an integer'}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/recordings/<upload_id>/complete', methods=['POST'])
+def complete_recording_upload(upload_id):
+    """Mark a recording upload complete; its id can then be passed to /api/feedback"""
+    try:
+        return jsonify(complete_upload(upload_id))
+    
+    except UploadError as e:
+        return jsonify({'error': str(e), 'offset': e.offset}), e.status_code
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/live-sessions', methods=['POST'])
+def start_live_session():
+    """Start receiving audio while the student is pitching"""
+    try:
+        data = request.get_json(silent=True) or {}
+        live_session_id = create_live_session(
+            selected_assignment=data.get('selectedAssignment') or None,
+            pdf_session_id=data.get('pdfSessionId') or None,
+            extension=data.get('extension', '.webm')
+        )
+        return jsonify({'live_session_id': live_session_id}), 201
+    
+    except LiveSessionError as e:
+        return jsonify({'error': str(e)}), e.status_code
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/live-sessions/<live_session_id>/audio', methods=['POST'])
+def upload_live_audio(live_session_id):
+    """Append an audio chunk tagged with the slide currently on screen"""
+    try:
+        if 'chunk' not in request.files:
+            return jsonify({'error': 'No audio chunk provided'}), 400
+        
+        slide_number = request.form.get('slideNumber')
+        slide_started_at = request.form.get('slideStartedAt')
+        if slide_number is None or slide_started_at is None:
+            return jsonify({'error': 'slideNumber and slideStartedAt are required'}), 400
+        
+        result = append_live_audio(
+            live_session_id,
+            request.files['chunk'].stream,
+            int(slide_number),
+            float(slide_started_at)
+        )
+        return jsonify(result)
+    
+    except LiveSessionError as e:
+        return jsonify({'error': str(e)}), e.status_code
+    except ValueError:
+        return jsonify({'error': 'slideNumber and slideStartedAt must be numbers'}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/live-sessions/<live_session_id>/finish', methods=['POST'])
+def end_live_session(live_session_id):
+    """Finalize the last slide when the pitch ends"""
+    try:
+        data = request.get_json(silent=True) or {}
+        end_time = data.get('endTime')
+        finish_live_session(live_session_id, float(end_time) if end_time is not None else None)
+        return jsonify(get_live_session_status(live_session_id))
+    
+    except LiveSessionError as e:
+        return jsonify({'error': str(e)}), e.status_code
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/live-sessions/<live_session_id>', methods=['GET'])
+def live_session_status(live_session_id):
+    """Report which slides have been transcribed and reviewed so far"""
+    try:
+        return jsonify(get_live_session_status(live_session_id))
+    
+    except LiveSessionError as e:
+        return jsonify({'error': str(e)}), e.status_code
+    except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/slide-image/<session_id>/<int:slide_number>', methods=['GET'])
 def get_slide_image(session_id, slide_number):
-    """Get slide image (thumbnail or full size)"""
+    """Get slide image (thumbnail or full size, or resized with ?width= and optional &format=)"""
     try:
         image_type = request.args.get('type', 'thumbnail')  # 'thumbnail' or 'full'
+        width = request.args.get('width', type=int)
+        image_format = request.args.get('format', 'png').lower()
+        
+        if image_format not in VARIANT_FORMATS:
+            return jsonify({'error': f"Unsupported format, use one of: {', '.join(VARIANT_FORMATS)}"}), 400
+        if width is not None and width <= 0:
+            return jsonify({'error': 'width must be a positive integer'}), 400
         
-        print(f"🖼️ Requesting slide image: session={session_id}, slide={slide_number}, type={image_type}")
+        print(f"🖼️ Requesting slide image: session={session_id}, slide={slide_number}, type={image_type}, width={width}, format={image_format}")
         
-        image_path = get_slide_image_path(session_id, slide_number, image_type)
+        if width is not None:
+            image_path = get_slide_variant_path(session_id, slide_number, width, image_format)
+        elif image_format != 'png':
+            # A format without a width converts the full-size image
+            image_path = get_slide_variant_path(session_id, slide_number, VARIANT_WIDTHS[-1], image_format)
+        else:
+            image_path = get_slide_image_path(session_id, slide_number, image_type)
         
         print(f"🖼️ Image path resolved to: {image_path}")
         
-        if not image_path or not os.path.exists(image_path):
+        if not image_path:
             print(f"❌ Image not found at path: {image_path}")
             # List what files exist in the session directory for debugging
             backend_dir = os.path.dirname(os.path.abspath(__file__))
@@ -287,12 +702,42 @@ def get_slide_image(session_id, slide_number):
             return jsonify({'error': 'Slide image not found'}), 404
         
         print(f"✅ Serving image from: {image_path}")
-        return send_file(image_path, mimetype='image/png')
+        mimetype = 'image/png' if image_path.endswith('.png') else VARIANT_FORMATS[image_format][1]
+        # Slide images never change for a session, so browsers can reuse them across srcset picks
+        return send_artifact(image_path, mimetype, cache_control='private, max-age=86400')
     
     except Exception as e:
         print(f"❌ Error serving slide image: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/slide-sprite/<session_id>', methods=['GET'])
+def get_slide_sprite(session_id):
+    """Get every thumbnail of a session as one sprite sheet image"""
+    try:
+        sprite_path, _ = get_thumbnail_sprite(session_id)
+        if not sprite_path:
+            return jsonify({'error': 'No slide thumbnails for this session'}), 404
+        
+        return send_artifact(sprite_path, 'image/png', cache_control='private, max-age=86400')
+    
+    except Exception as e:
+        print(f"❌ Error serving slide sprite: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/slide-sprite/<session_id>/map', methods=['GET'])
+def get_slide_sprite_map(session_id):
+    """Get the sprite sheet URL and each slide's position within it"""
+    try:
+        _, sprite_map = get_thumbnail_sprite(session_id)
+        if not sprite_map:
+            return jsonify({'error': 'No slide thumbnails for this session'}), 404
+        
+        return jsonify({'url': f"/api/slide-sprite/{session_id}", **sprite_map})
+    
+    except Exception as e:
+        print(f"❌ Error serving slide sprite map: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/api/audio-segment/<session_id>/<int:slide_number>', methods=['GET'])
 def get_audio_segment(session_id, slide_number):
     """Get audio segment for a specific slide"""
@@ -303,7 +748,7 @@ def get_audio_segment(session_id, slide_number):
         
         print(f"🎵 Audio path resolved to: {audio_path}")
         
-        if not audio_path or not os.path.exists(audio_path):
+        if not audio_path:
             print(f"❌ Audio not found at path: {audio_path}")
             # List what files exist in the session directory for debugging
             backend_dir = os.path.dirname(os.path.abspath(__file__))
@@ -316,7 +761,7 @@ def get_audio_segment(session_id, slide_number):
             return jsonify({'error': 'Audio segment not found'}), 404
         
         print(f"✅ Serving audio from: {audio_path}")
-        return send_file(audio_path, mimetype='audio/wav')
+        return send_artifact(audio_path, 'audio/wav')
     
     except Exception as e:
         print(f"❌ Error serving audio segment: {str(e)}")
@@ -347,8 +792,19 @@ def process_upload():
         
         # Save the uploaded file permanently
         file.save(permanent_pdf_path)
+        publish_file(permanent_pdf_path)
         print(f"📁 Saved uploaded PDF to: {permanent_pdf_path}")
         
+        # Optionally start generating slide summaries and VC questions in the background
+        precompute = request.form.get('precompute')
+        if precompute is None:
+            precompute_insights = PRECOMPUTE_DECK_INSIGHTS
+        else:
+            precompute_insights = precompute.lower() in ('1', 'true', 'yes')
+        if precompute_insights:
+            start_deck_insights_precompute(permanent_pdf_path, session_id)
+        start_deck_index_build(safe_filename)
+        
         # Extract slide images
         slide_paths = save_slide_images(permanent_pdf_path, session_id)
         
@@ -372,28 +828,168 @@ def process_upload():
             'slides': list(slide_paths.keys()) if slide_paths else list(range(1, slide_count + 1)),
             'filename': safe_filename,  # Return the filename for VC system
             'images_processed': bool(slide_paths),
+            'insights_precompute_started': precompute_insights,
             'message': 'PDF uploaded successfully' + (' with slide images' if slide_paths else ' (images unavailable - install poppler for slide images)')
         })
     
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/tts', methods=['GET', 'POST'])
+def text_to_speech():
+    """Speak text through the server-side TTS proxy, streaming MP3 audio sentence by sentence"""
+    try:
+        # GET lets an <audio> element play the stream directly; POST takes a JSON body
+        params = request.args if request.method == 'GET' else (request.get_json(silent=True) or {})
+        text = params.get('text', '')
+        voice_id = params.get('voiceId') or None
+        token = params.get('token')
+
+        if not text.strip():
+            return jsonify({'error': 'No text provided'}), 400
+        if len(text) > TTS_MAX_CHARS:
+            return jsonify({'error': f'Text exceeds {TTS_MAX_CHARS} characters'}), 400
+        if voice_id and not is_valid_voice_id(voice_id):
+            return jsonify({'error': 'Invalid voice ID'}), 400
+        if not is_speech_allowed(text, token):
+            # Only VC replies from /api/chat are spoken, so the proxy can't spend the TTS quota on arbitrary text
+            return jsonify({'error': 'Text must be a VC reply with its tts_token'}), 403
+
+        sentence_count, audio_stream = synthesize_speech(text, voice_id)
+        response = Response(stream_with_context(audio_stream), mimetype='audio/mpeg')
+        response.headers['X-TTS-Sentences'] = str(sentence_count)
+        response.headers['Cache-Control'] = 'no-store'
+        return response
+
+    except TTSError as e:
+        return jsonify({'error': str(e)}), 502
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/search', methods=['GET'])
+def search_feedback_history():
+    """Full-text search over slide transcripts, feedback comments and Q&A dialogue of past sessions"""
+    try:
+        query = request.args.get('q', '').strip()
+        if not query:
+            return jsonify({'error': 'q is required'}), 400
+        
+        # Students may only search within their own session; searching across sessions is for instructors
+        session_id = request.args.get('sessionId')
+        if not session_id and not is_instructor_request():
+            return jsonify({'error': 'Searching across sessions requires the instructor token; pass sessionId to search one session'}), 403
+        
+        kind = request.args.get('kind')
+        if kind and kind not in SEARCH_KINDS:
+            return jsonify({'error': f"kind must be one of: {', '.join(SEARCH_KINDS)}"}), 400
+        
+        started = time.perf_counter()
+        hits = search(
+            query,
+            kind=kind,
+            criterion=request.args.get('criterion'),
+            status=request.args.get('status'),
+            session_id=session_id,
+            limit=request.args.get('limit', 20, type=int)
+        )
+        return jsonify({'query': query, 'hits': hits, 'took_ms': round((time.perf_counter() - started) * 1000, 2)})
+    
+    except Exception as e:
+        print(f"❌ Search failed: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/analytics/outcomes', methods=['GET'])
+def get_outcome_analytics():
+    """Cohort pass rates per criterion, e.g. delivery pass rate by slide position this week"""
+    try:
+        if not is_instructor_request():
+            return jsonify({'error': 'Cohort analytics require the instructor token'}), 403
+        
+        group_by = request.args.get('groupBy', 'slide_position')
+        if group_by not in GROUP_BY_EXPRESSIONS:
+            return jsonify({'error': f"groupBy must be one of: {', '.join(GROUP_BY_EXPRESSIONS)}"}), 400
+        
+        criterion = request.args.get('criterion')
+        if criterion and criterion not in CRITERIA:
+            return jsonify({'error': f"criterion must be one of: {', '.join(CRITERIA)}"}), 400
+        
+        try:
+            since = parse_time_bound(request.args.get('since'))
+            until = parse_time_bound(request.args.get('until'))
+        except ValueError:
+            return jsonify({'error': "since/until must be a duration (24h, 7d, 4w), 'week', a YYYY-MM-DD date or Unix seconds"}), 400
+        
+        groups = aggregate_outcomes(
+            group_by=group_by,
+            criterion=criterion,
+            since=since,
+            until=until,
+            assignment=request.args.get('assignment')
+        )
+        return jsonify({'group_by': group_by, 'criterion': criterion, 'since': since, 'until': until, 'groups': groups})
+    
+    except Exception as e:
+        print(f"❌ Analytics query failed: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/usage', methods=['GET'])
+def get_usage():
+    """Token usage per OpenAI call type, including prompt-cache hits"""
+    return jsonify({'usage': get_usage_summary()})
+
+@app.route('/api/metrics', methods=['GET'])
+def get_metrics():
+    """Request, stage, token, byte and cache metrics in Prometheus text format"""
+    return Response(render_metrics(), mimetype='text/plain; version=0.0.4')
+
 @app.route('/api/cleanup', methods=['POST'])
 def cleanup_old_files():
     """Manual cleanup of old files"""
     try:
         cleanup_old_sessions()
         cleanup_old_audio_sessions()
+        cleanup_old_uploads()
+        cleanup_old_live_sessions()
+        cleanup_old_deck_insights()
+        cleanup_old_traces()
+        cleanup_old_tts_cache()
+        cleanup_old_slide_variants()
+        cleanup_old_search_entries()
+        cleanup_old_outcomes()
         return jsonify({'message': 'Cleanup completed'})
     
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def warm_up():
+    """Load heavy dependencies and run capability probes so the first request doesn't pay for them"""
+    try:
+        get_openai_client()
+        audio_processing_available()
+        delivery_metrics_available()
+        pdf_processing_available()
+        get_text_engine()
+        # Loads the local Whisper model when TRANSCRIPTION_BACKEND=local
+        get_transcription_backend()
+    except Exception as e:
+        print(f"⚠️ Warm-up failed: {e}")
+
 if __name__ == '__main__':
+    # Imports stay lazy; warm them in the background so startup isn't blocked
+    threading.Thread(target=warm_up, daemon=True).start()
+    
     # Run cleanup on startup
     try:
         cleanup_old_sessions()
         cleanup_old_audio_sessions()
+        cleanup_old_uploads()
+        cleanup_old_live_sessions()
+        cleanup_old_deck_insights()
+        cleanup_old_traces()
+        cleanup_old_tts_cache()
+        cleanup_old_slide_variants()
+        cleanup_old_search_entries()
+        cleanup_old_outcomes()
     except:
         pass
     
@@ -0,0 +1,258 @@
+import os
+import shutil
+import threading
+from urllib.parse import quote
+
+import config
+from metrics import stage_timer, record_bytes
+from lazy_imports import optional_import
+
+# Where uploads, slide images, audio segments and feedback reports live:
+# 'local' (the backend directory) or 's3' (any S3-compatible store, shared by every API node)
+ARTIFACT_STORAGE = os.getenv('ARTIFACT_STORAGE', 'local').lower()
+
+S3_BUCKET = os.getenv('S3_BUCKET')
+S3_PREFIX = os.getenv('S3_PREFIX', '')
+# Set to a MinIO or other S3-compatible endpoint, e.g. http://localhost:9000 for local testing
+S3_ENDPOINT_URL = os.getenv('S3_ENDPOINT_URL') or None
+S3_REGION = os.getenv('S3_REGION') or None
+
+# Serve images and audio by redirecting to a presigned URL instead of proxying the bytes
+STORAGE_PRESIGNED_REDIRECTS = os.getenv('STORAGE_PRESIGNED_REDIRECTS', 'false').lower() == 'true'
+PRESIGNED_URL_EXPIRES = int(os.getenv('PRESIGNED_URL_EXPIRES', '3600'))
+
+# Let a front proxy stream files on this node: 'none' (Flask send_file), 'x-sendfile' (Apache
+# mod_xsendfile, lighttpd) or 'x-accel-redirect' (nginx); the app only does the lookup
+STATIC_OFFLOAD = os.getenv('STATIC_OFFLOAD', 'none').lower()
+# nginx 'internal' location aliased to the backend directory
+STATIC_OFFLOAD_PREFIX = os.getenv('STATIC_OFFLOAD_PREFIX', '/_artifacts/')
+
+# Bytes read per step when streaming an object
+STREAM_CHUNK_BYTES = 256 * 1024
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+class LocalStorage:
+    """Artifacts stored under the backend directory; keys are paths relative to it"""
+    name = "local"
+
+    def __init__(self, root=BACKEND_DIR):
+        self.root = root
+
+    def path(self, key):
+        return os.path.join(self.root, key)
+
+    def put_file(self, key, local_path):
+        """Store a local file under key (a no-op when it is already in place)"""
+        target = self.path(key)
+        if os.path.abspath(local_path) != os.path.abspath(target):
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            shutil.copyfile(local_path, target)
+
+    def write_stream(self, key, stream):
+        """Store a file-like object under key without holding it in memory"""
+        target = self.path(key)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(f"{target}.tmp", 'wb') as f:
+            shutil.copyfileobj(stream, f, STREAM_CHUNK_BYTES)
+        os.replace(f"{target}.tmp", target)
+
+    def open(self, key):
+        """Binary file-like object for key, or None if it does not exist"""
+        try:
+            return open(self.path(key), 'rb')
+        except FileNotFoundError:
+            return None
+
+    def exists(self, key):
+        return os.path.exists(self.path(key))
+
+    def fetch(self, key, local_path):
+        """Copy key to local_path; returns False if it does not exist"""
+        if os.path.abspath(local_path) == os.path.abspath(self.path(key)):
+            return self.exists(key)
+        if not self.exists(key):
+            return False
+        os.makedirs(os.path.dirname(local_path), exist_ok=True)
+        shutil.copyfile(self.path(key), local_path)
+        return True
+
+    def list(self, prefix):
+        """Keys directly under a directory-style prefix ending in '/'"""
+        directory = self.path(prefix)
+        if not os.path.isdir(directory):
+            return []
+        return [prefix + name for name in os.listdir(directory)]
+
+    def delete_prefix(self, prefix):
+        shutil.rmtree(self.path(prefix), ignore_errors=True)
+
+    def presigned_url(self, key):
+        """Local files have no URL of their own; they are served by the app"""
+        return None
+
+class S3Storage:
+    """Artifacts stored in an S3-compatible bucket under S3_PREFIX"""
+    name = "s3"
+
+    def __init__(self, bucket=S3_BUCKET, prefix=S3_PREFIX, endpoint_url=S3_ENDPOINT_URL, region=S3_REGION):
+        boto3 = optional_import('boto3')
+        if boto3 is None:
+            raise RuntimeError("ARTIFACT_STORAGE=s3 requires boto3 (pip install boto3)")
+        if not bucket:
+            raise RuntimeError("ARTIFACT_STORAGE=s3 requires S3_BUCKET")
+        self.bucket = bucket
+        self.prefix = prefix.strip('/') + '/' if prefix.strip('/') else ''
+        self.client = boto3.client('s3', endpoint_url=endpoint_url, region_name=region)
+        self.missing_errors = (self.client.exceptions.NoSuchKey,)
+
+    def object_key(self, key):
+        return self.prefix + key
+
+    def put_file(self, key, local_path):
+        """Upload a local file; large files go up in parallel multipart chunks"""
+        with stage_timer("storage.put", backend=self.name):
+            self.client.upload_file(local_path, self.bucket, self.object_key(key))
+        record_bytes("storage_upload", os.path.getsize(local_path))
+
+    def write_stream(self, key, stream):
+        with stage_timer("storage.put", backend=self.name):
+            self.client.upload_fileobj(stream, self.bucket, self.object_key(key))
+
+    def open(self, key):
+        """Streaming body for key, or None if it does not exist"""
+        try:
+            return self.client.get_object(Bucket=self.bucket, Key=self.object_key(key))['Body']
+        except self.missing_errors:
+            return None
+
+    def exists(self, key):
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self.object_key(key))
+            return True
+        except self.client.exceptions.ClientError as e:
+            if e.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound'):
+                return False
+            raise
+
+    def fetch(self, key, local_path):
+        """Download key to local_path; returns False if it does not exist"""
+        if not self.exists(key):
+            return False
+        os.makedirs(os.path.dirname(local_path), exist_ok=True)
+        temp_path = f"{local_path}.{threading.get_ident()}.tmp"
+        with stage_timer("storage.fetch", backend=self.name):
+            self.client.download_file(self.bucket, self.object_key(key), temp_path)
+        os.replace(temp_path, local_path)
+        record_bytes("storage_download", os.path.getsize(local_path))
+        return True
+
+    def list(self, prefix):
+        keys = []
+        paginator = self.client.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=self.object_key(prefix), Delimiter='/'):
+            keys.extend(item['Key'][len(self.prefix):] for item in page.get('Contents', []))
+        return keys
+
+    def delete_prefix(self, prefix):
+        paginator = self.client.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=self.object_key(prefix)):
+            objects = [{'Key': item['Key']} for item in page.get('Contents', [])]
+            if objects:
+                self.client.delete_objects(Bucket=self.bucket, Delete={'Objects': objects})
+
+    def presigned_url(self, key):
+        return self.client.generate_presigned_url(
+            'get_object', Params={'Bucket': self.bucket, 'Key': self.object_key(key)}, ExpiresIn=PRESIGNED_URL_EXPIRES
+        )
+
+STORAGE_BACKENDS = {
+    'local': LocalStorage,
+    's3': S3Storage,
+}
+
+_storage = None
+_storage_lock = threading.Lock()
+
+def get_storage():
+    """The configured artifact storage, created on first use"""
+    global _storage
+    if _storage is None:
+        with _storage_lock:
+            if _storage is None:
+                backend_class = STORAGE_BACKENDS.get(ARTIFACT_STORAGE)
+                if backend_class is None:
+                    print(f"⚠️ Unknown ARTIFACT_STORAGE '{ARTIFACT_STORAGE}', using local storage")
+                    backend_class = LocalStorage
+                _storage = backend_class()
+                print(f"✅ Artifact storage: {_storage.name}")
+    return _storage
+
+def shared_storage_enabled():
+    """Whether artifacts are mirrored to storage other nodes can read"""
+    return get_storage().name != "local"
+
+def storage_key(local_path):
+    """Storage key of a file under the backend directory, e.g. 'slide_images/<session>/slide_1_full.png'"""
+    return os.path.relpath(os.path.abspath(local_path), BACKEND_DIR).replace(os.sep, '/')
+
+def offload_uri(local_path):
+    """Internal proxy URI of a file under the backend directory, for X-Accel-Redirect"""
+    return STATIC_OFFLOAD_PREFIX.rstrip('/') + '/' + quote(storage_key(local_path))
+
+def publish_file(local_path):
+    """
+    Make a file written under the backend directory visible to every node
+
+    Local files stay in place as this node's working copy; with local storage this is a no-op.
+    """
+    if shared_storage_enabled():
+        get_storage().put_file(storage_key(local_path), local_path)
+
+def artifact_exists(local_path):
+    """Whether a file exists on this node or in shared storage"""
+    return os.path.exists(local_path) or (shared_storage_enabled() and get_storage().exists(storage_key(local_path)))
+
+def ensure_local_file(local_path):
+    """
+    Make sure a file is present on this node, downloading it from shared storage if needed
+
+    Returns:
+        True if the file is available locally
+    """
+    if os.path.exists(local_path):
+        return True
+    if not shared_storage_enabled():
+        return False
+    try:
+        return get_storage().fetch(storage_key(local_path), local_path)
+    except Exception as e:
+        print(f"⚠️ Could not fetch {storage_key(local_path)} from storage: {e}")
+        return False
+
+def list_artifacts(local_dir):
+    """File names in a directory, on this node and in shared storage"""
+    names = set(os.listdir(local_dir)) if os.path.isdir(local_dir) else set()
+    if shared_storage_enabled():
+        prefix = storage_key(local_dir) + '/'
+        names.update(key[len(prefix):] for key in get_storage().list(prefix))
+    return sorted(names)
+
+def delete_artifacts(local_dir):
+    """Remove a session directory from shared storage (the local copy is removed by the caller)"""
+    if shared_storage_enabled():
+        get_storage().delete_prefix(storage_key(local_dir) + '/')
+
+def iter_artifact(local_path):
+    """Stream a file from shared storage in chunks"""
+    body = get_storage().open(storage_key(local_path))
+    if body is None:
+        return
+    try:
+        while True:
+            chunk = body.read(STREAM_CHUNK_BYTES)
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        body.close()
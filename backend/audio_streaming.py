@@ -0,0 +1,158 @@
+import os
+import wave
+import shutil
+import tempfile
+import subprocess
+
+import config
+from metrics import stage_timer, record_bytes
+
+# Non-WAV recordings (WebM/MP4 from the browser) are decoded by ffmpeg to 16-bit PCM at this rate
+STREAM_DECODE_SAMPLE_RATE = int(os.getenv('STREAM_DECODE_SAMPLE_RATE', '48000'))
+STREAM_DECODE_CHANNELS = int(os.getenv('STREAM_DECODE_CHANNELS', '1'))
+
+# Recording containers accepted from clients (MediaRecorder output and uploaded files); the extension names the stored file
+RECORDING_EXTENSIONS = {'.webm', '.ogg', '.wav', '.mp4', '.m4a'}
+
+# PCM read per step; memory use is bounded by this, not by the recording length
+CHUNK_SECONDS = 0.5
+
+class StreamDecodeError(Exception):
+    """The recording could not be decoded incrementally"""
+
+class PCMStream:
+    """Incremental reader of 16-bit PCM audio from a recording"""
+
+    def __init__(self, audio_file_path):
+        self.audio_file_path = audio_file_path
+        self.process = None
+        try:
+            # WAV recordings are read directly, no decoder process needed
+            self.wav = wave.open(audio_file_path, 'rb')
+            self.sample_rate = self.wav.getframerate()
+            self.channels = self.wav.getnchannels()
+            self.sample_width = self.wav.getsampwidth()
+        except (wave.Error, EOFError):
+            self.wav = None
+            self.start_ffmpeg()
+
+    def start_ffmpeg(self):
+        ffmpeg = shutil.which('ffmpeg')
+        if not ffmpeg:
+            raise StreamDecodeError("ffmpeg is required to stream-decode non-WAV recordings")
+        self.sample_rate = STREAM_DECODE_SAMPLE_RATE
+        self.channels = STREAM_DECODE_CHANNELS
+        self.sample_width = 2
+        self.process = subprocess.Popen(
+            [ffmpeg, '-nostdin', '-loglevel', 'error', '-i', self.audio_file_path,
+             '-f', 's16le', '-acodec', 'pcm_s16le', '-ac', str(self.channels), '-ar', str(self.sample_rate), '-'],
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE
+        )
+
+    @property
+    def frame_size(self):
+        return self.channels * self.sample_width
+
+    def read_frames(self, frame_count):
+        """Read up to frame_count frames; returns b"" at the end of the recording"""
+        if self.wav is not None:
+            return self.wav.readframes(frame_count)
+        data = self.process.stdout.read(frame_count * self.frame_size)
+        # Drop a trailing partial frame so slices stay frame-aligned
+        return data[:len(data) - len(data) % self.frame_size]
+
+    def close(self):
+        if self.wav is not None:
+            self.wav.close()
+        if self.process is not None:
+            self.process.stdout.close()
+            self.process.kill()
+            self.process.wait()
+            stderr = self.process.stderr.read().decode(errors='replace').strip()
+            self.process.stderr.close()
+            if stderr:
+                print(f"⚠️ ffmpeg: {stderr[:200]}")
+
+def get_slide_ranges(slide_timestamps):
+    """
+    Turn slide start timestamps into (slide number, start seconds, end seconds or None) ranges
+
+    Returns:
+        Non-empty ranges in recording order, or None if the timestamps are out of order
+        and the recording cannot be split in a single pass
+    """
+    ranges = []
+    for i, timestamp_data in enumerate(slide_timestamps):
+        start_time = timestamp_data["timestamp"]
+        end_time = slide_timestamps[i + 1]["timestamp"] if i + 1 < len(slide_timestamps) else None
+        if end_time is None or start_time < end_time:
+            ranges.append((timestamp_data["slideNumber"], start_time, end_time))
+
+    for (_, _, previous_end), (_, start_time, _) in zip(ranges, ranges[1:]):
+        if previous_end is None or start_time < previous_end:
+            return None
+    return ranges
+
+def iter_audio_segments(audio_file_path, slide_ranges):
+    """
+    Decode a recording once, front to back, writing each slide's slice to its own WAV file
+
+    Each segment is yielded as soon as the decoder passes its end timestamp,
+    so only one chunk of PCM is held in memory at a time.
+
+    Args:
+        audio_file_path: Path to the recording
+        slide_ranges: (slide number, start seconds, end seconds or None) in recording order
+
+    Yields:
+        {"slideNumber": int, "audio_path": str, "start_time": float, "end_time": float}
+    """
+    stream = PCMStream(audio_file_path)
+    chunk_frames = int(stream.sample_rate * CHUNK_SECONDS)
+    position = 0
+    pending = b""
+    try:
+        for slide_number, start_time, end_time in slide_ranges:
+            start_frame = int(start_time * stream.sample_rate)
+            end_frame = int(end_time * stream.sample_rate) if end_time is not None else None
+
+            with stage_timer("audio.segment_export", slide=slide_number):
+                temp_segment = tempfile.NamedTemporaryFile(delete=False, suffix=f'_slide_{slide_number}.wav')
+                temp_segment.close()
+                writer = wave.open(temp_segment.name, 'wb')
+                writer.setnchannels(stream.channels)
+                writer.setsampwidth(stream.sample_width)
+                writer.setframerate(stream.sample_rate)
+                written = 0
+                try:
+                    while end_frame is None or position < end_frame:
+                        if not pending:
+                            pending = stream.read_frames(chunk_frames)
+                            if not pending:
+                                break
+                        frames_available = len(pending) // stream.frame_size
+                        take = frames_available if end_frame is None else min(frames_available, end_frame - position)
+                        # Frames before this slide's start (a gap in the timestamps) are skipped
+                        skip = max(0, min(take, start_frame - position))
+                        data = pending[skip * stream.frame_size:take * stream.frame_size]
+                        if data:
+                            writer.writeframes(data)
+                            written += len(data) // stream.frame_size
+                        pending = pending[take * stream.frame_size:]
+                        position += take
+                finally:
+                    writer.close()
+
+            if not written:
+                os.unlink(temp_segment.name)
+                break
+            record_bytes("audio_segment", os.path.getsize(temp_segment.name))
+
+            yield {
+                "slideNumber": slide_number,
+                "audio_path": temp_segment.name,
+                "start_time": (position - written) / stream.sample_rate,
+                "end_time": position / stream.sample_rate
+            }
+    finally:
+        stream.close()
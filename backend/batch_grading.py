@@ -0,0 +1,504 @@
+"""
+Offline batch grading for a folder of recorded pitches.
+
+Each submission is a directory inside the input folder containing:
+
+    *.pdf              the slide deck
+    recording.*        the presentation recording (webm, wav, mp3, m4a, mp4, ogg)
+    timestamps.json    [{"slideNumber": 1, "timestamp": 0.0}, ...]
+    dialogue.json      optional VC conversation, [{"role": "user", "content": "..."}, ...]
+
+Audio decoding and splitting run in a process pool; transcription and feedback
+requests run with bounded async concurrency. Every finished submission is written
+to <output>/<submission>.json and skipped on the next run, and transcripts are
+checkpointed per submission, so a crashed run resumes where it stopped.
+
+    python backend/batch_grading.py submissions/ --out results/ --workers 4 --concurrency 8
+    python backend/batch_grading.py submissions/ --out results/ --provider batch
+
+With --provider batch, slide and Q&A feedback requests for all submissions are
+sent through the OpenAI Batch API (cheaper, completes within 24h); --provider stub
+answers them locally for tests and dry runs. The stub only replaces feedback:
+recordings are still transcribed by the configured transcription backend
+(set TRANSCRIPTION_BACKEND=local for a run without network access).
+"""
+import os
+import sys
+import json
+import time
+import uuid
+import shutil
+import asyncio
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from feedback_service import (
+    client, split_audio_by_timestamps, join_wav_files, transcribe_recording, generate_feedback,
+    generate_slide_feedback, generate_qa_feedback,
+    build_slide_feedback_request, build_qa_feedback_request
+)
+from delivery_metrics import compute_delivery_metrics
+from pdf_utils import extract_pdf_pages
+from usage_stats import get_usage_summary
+
+# Batch grading configuration
+RECORDING_EXTENSIONS = ('.webm', '.wav', '.mp3', '.m4a', '.mp4', '.ogg')
+WORK_DIR_NAME = "_work"
+BATCH_CHECKPOINT_FILE = "_batch.json"
+SUMMARY_FILE = "summary.json"
+DEFAULT_WORKERS = int(os.getenv('BATCH_GRADING_WORKERS', str(os.cpu_count() or 2)))
+DEFAULT_CONCURRENCY = int(os.getenv('BATCH_GRADING_CONCURRENCY', '8'))
+BATCH_POLL_SECONDS = float(os.getenv('BATCH_POLL_SECONDS', '60'))
+
+class StubBatchProvider:
+    """Local stand-in for the provider batch API; answers every request immediately"""
+    name = "stub"
+
+    # Shared by all instances so a batch can be collected after the provider is recreated
+    _batches = {}
+
+    def submit(self, requests):
+        """Store the requests and return a batch ID"""
+        batch_id = f"stub-{uuid.uuid4()}"
+        self._batches[batch_id] = requests
+        return batch_id
+
+    def collect(self, batch_id):
+        """Return canned feedback text for every request in the batch"""
+        results = {}
+        for custom_id in self._batches.get(batch_id, {}):
+            if custom_id.endswith("::qa"):
+                results[custom_id] = (
+                    "**Q&A Session:**\n"
+                    "- Impromptu response: ✓ - Stub answer.\n"
+                    "- Composure: ✓ - Stub answer."
+                )
+            else:
+                slide_number = custom_id.rsplit("::", 1)[1]
+                results[custom_id] = (
+                    f"**Slide {slide_number}:**\n"
+                    "- Content structuring: ✓ - Stub answer.\n"
+                    "- Delivery: ✓ - Stub answer.\n"
+                    "- Impromptu response: N/A - This is evaluated in the Q&A section\n"
+                    "- Composure: N/A - This is evaluated in the Q&A section"
+                )
+        return results
+
+class OpenAIBatchProvider:
+    """Submit chat completion requests through the OpenAI Batch API"""
+    name = "batch"
+
+    def submit(self, requests):
+        """
+        Upload the requests as a JSONL batch input file and create the batch
+
+        Args:
+            requests: Dictionary mapping custom IDs to chat completion arguments
+
+        Returns:
+            The provider's batch ID
+        """
+        lines = [
+            json.dumps({"custom_id": custom_id, "method": "POST", "url": "/v1/chat/completions", "body": body})
+            for custom_id, body in requests.items()
+        ]
+        input_file = client.files.create(
+            file=("batch_grading.jsonl", "\n".join(lines).encode("utf-8")),
+            purpose="batch"
+        )
+        batch = client.batches.create(
+            input_file_id=input_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h"
+        )
+        return batch.id
+
+    def collect(self, batch_id):
+        """
+        Wait for a batch to finish and download its results
+
+        Returns:
+            Dictionary mapping custom IDs to response text; failed requests are left out
+        """
+        while True:
+            batch = client.batches.retrieve(batch_id)
+            if batch.status in ("completed", "failed", "expired", "cancelled"):
+                break
+            print(f"⏳ Batch {batch_id}: {batch.status}")
+            time.sleep(BATCH_POLL_SECONDS)
+
+        if not batch.output_file_id:
+            print(f"❌ Batch {batch_id} ended with status {batch.status} and no output")
+            return {}
+
+        results = {}
+        for line in client.files.content(batch.output_file_id).text.splitlines():
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            response = item.get("response") or {}
+            if response.get("status_code") == 200:
+                results[item["custom_id"]] = response["body"]["choices"][0]["message"]["content"]
+        return results
+
+BATCH_PROVIDERS = {
+    "batch": OpenAIBatchProvider,
+    "stub": StubBatchProvider
+}
+
+def read_json(path, default=None):
+    """Load a JSON file, returning `default` if it does not exist"""
+    if not os.path.exists(path):
+        return default
+    with open(path, 'r') as f:
+        return json.load(f)
+
+def write_json(path, data):
+    """Atomically write a JSON file so a crash never leaves a half-written checkpoint"""
+    temp_path = path + ".tmp"
+    with open(temp_path, 'w') as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+    os.replace(temp_path, path)
+
+def discover_submissions(input_dir):
+    """
+    Find the submission directories inside the input folder
+
+    Returns:
+        List of {"name", "dir", "deck_path", "recording_path", "timestamps_path", "dialogue_path"} dictionaries,
+        sorted by name; directories without a deck, recording or timestamps are reported and skipped
+    """
+    submissions = []
+    for name in sorted(os.listdir(input_dir)):
+        submission_dir = os.path.join(input_dir, name)
+        if not os.path.isdir(submission_dir):
+            continue
+
+        files = sorted(os.listdir(submission_dir))
+        decks = [f for f in files if f.lower().endswith('.pdf')]
+        recordings = [f for f in files if f.lower().endswith(RECORDING_EXTENSIONS)]
+        timestamps_path = os.path.join(submission_dir, "timestamps.json")
+
+        if not decks or not recordings or not os.path.exists(timestamps_path):
+            print(f"⚠️ Skipping {name}: needs a PDF deck, a recording and timestamps.json")
+            continue
+
+        submissions.append({
+            "name": name,
+            "dir": submission_dir,
+            "deck_path": os.path.join(submission_dir, decks[0]),
+            "recording_path": os.path.join(submission_dir, recordings[0]),
+            "timestamps_path": timestamps_path,
+            "dialogue_path": os.path.join(submission_dir, "dialogue.json")
+        })
+    return submissions
+
+def split_submission_audio(recording_path, slide_timestamps, work_dir):
+    """
+    Decode a recording and split it into per-slide WAV files; runs in a worker process
+
+    A slide shown more than once has its visits joined into one file, so it is
+    transcribed, measured and reviewed as a whole.
+
+    Returns:
+        List of {"slideNumber", "audio_path", "start_time", "end_time"} with files inside work_dir, one per slide
+    """
+    segments = split_audio_by_timestamps(recording_path, slide_timestamps)
+    visits_by_slide = {}
+    for index, segment in enumerate(segments):
+        if segment["audio_path"] != recording_path:
+            target_path = os.path.join(work_dir, f"slide_{segment['slideNumber']}_{index}.wav")
+            shutil.move(segment["audio_path"], target_path)
+            segment["audio_path"] = target_path
+        visits_by_slide.setdefault(segment["slideNumber"], []).append(segment)
+
+    slides = []
+    for slide_number, visits in visits_by_slide.items():
+        if len(visits) > 1:
+            audio_path = join_wav_files([visit["audio_path"] for visit in visits],
+                                        os.path.join(work_dir, f"slide_{slide_number}.wav"))
+            for visit in visits:
+                os.unlink(visit["audio_path"])
+            visits = [{
+                "slideNumber": slide_number,
+                "audio_path": audio_path,
+                "start_time": visits[0]["start_time"],
+                "end_time": visits[-1]["end_time"]
+            }]
+        slides.append(visits[0])
+    return slides
+
+async def call_api(semaphore, func, *args):
+    """Run a blocking API call in a thread, bounded by the shared semaphore"""
+    async with semaphore:
+        return await asyncio.to_thread(func, *args)
+
+async def prepare_submission(submission, work_dir, pool, semaphore):
+    """
+    Split, transcribe and measure a submission's recording, reusing its checkpoint if present
+
+    Returns:
+        Dictionary with the deck text, slide count, timestamps, dialogue and per-slide data
+    """
+    checkpoint_path = os.path.join(work_dir, "prepared.json")
+    prepared = read_json(checkpoint_path)
+    if prepared:
+        print(f"♻️ {submission['name']}: reusing checkpointed transcripts")
+        prepared["slides"] = {int(num): data for num, data in prepared["slides"].items()}
+        return prepared
+
+    loop = asyncio.get_running_loop()
+    slide_timestamps = read_json(submission["timestamps_path"], [])
+    pages_future = loop.run_in_executor(pool, extract_pdf_pages, submission["deck_path"])
+    segments = await loop.run_in_executor(
+        pool, split_submission_audio, submission["recording_path"], slide_timestamps, work_dir
+    )
+    pages = await pages_future or []
+
+    transcripts = await asyncio.gather(*[
+        call_api(semaphore, transcribe_recording, segment["audio_path"]) for segment in segments
+    ])
+    metrics = await asyncio.gather(*[
+        loop.run_in_executor(pool, compute_delivery_metrics, segment["audio_path"], transcript)
+        for segment, transcript in zip(segments, transcripts)
+    ])
+
+    prepared = {
+        "slide_content": "\n\n".join(pages),
+        "slide_count": len(pages) or None,
+        "slide_timestamps": slide_timestamps,
+        "conversation_history": read_json(submission["dialogue_path"], []),
+        "slides": {
+            segment["slideNumber"]: {
+                "transcript": transcript,
+                "start_time": segment["start_time"],
+                "end_time": segment["end_time"],
+                "metrics": slide_metrics
+            }
+            for segment, transcript, slide_metrics in zip(segments, transcripts, metrics)
+        }
+    }
+    write_json(checkpoint_path, prepared)
+    print(f"✅ {submission['name']}: {len(segments)} segments transcribed")
+    return prepared
+
+def slides_needing_feedback(prepared):
+    """Slides of the deck itself; segments past the last slide are the Q&A and get no slide feedback"""
+    slide_count = prepared["slide_count"]
+    return [
+        (num, data) for num, data in sorted(prepared["slides"].items())
+        if not slide_count or num <= slide_count
+    ]
+
+def build_feedback_requests(name, prepared):
+    """Build the batch requests for one submission, keyed by '<submission>::slide::<n>' and '<submission>::qa'"""
+    requests = {}
+    for slide_num, slide_data in slides_needing_feedback(prepared):
+        requests[f"{name}::slide::{slide_num}"] = build_slide_feedback_request(
+            slide_num, slide_data, prepared["slide_content"]
+        )
+    if prepared["conversation_history"]:
+        requests[f"{name}::qa"] = build_qa_feedback_request(prepared["conversation_history"])
+    return requests
+
+def run_provider_batch(provider, requests, output_dir):
+    """
+    Submit feedback requests as one provider batch, resuming a batch submitted by a crashed run
+
+    Returns:
+        Dictionary mapping custom IDs to feedback text
+    """
+    checkpoint_path = os.path.join(output_dir, BATCH_CHECKPOINT_FILE)
+    checkpoint = read_json(checkpoint_path)
+
+    if checkpoint and checkpoint["provider"] == provider.name and set(requests) <= set(checkpoint["custom_ids"]):
+        batch_id = checkpoint["batch_id"]
+        print(f"♻️ Resuming provider batch {batch_id}")
+    else:
+        batch_id = provider.submit(requests)
+        write_json(checkpoint_path, {"provider": provider.name, "batch_id": batch_id, "custom_ids": sorted(requests)})
+        print(f"📦 Submitted {len(requests)} feedback requests as batch {batch_id}")
+
+    results = provider.collect(batch_id)
+    os.unlink(checkpoint_path)
+    return results
+
+async def grade_submission(submission, prepared, batch_results, output_dir, semaphore):
+    """
+    Fill in any feedback missing from the batch results, assemble it with generate_feedback and write the result file
+    """
+    name = submission["name"]
+    conversation_history = prepared["conversation_history"]
+
+    # Requests the batch did not answer (or all of them, without a batch provider) run with bounded concurrency
+    slide_jobs = []
+    for slide_num, slide_data in slides_needing_feedback(prepared):
+        feedback_text = batch_results.get(f"{name}::slide::{slide_num}")
+        if feedback_text:
+            slide_data["feedback_text"] = feedback_text
+        else:
+            slide_jobs.append((slide_num, slide_data))
+
+    slide_texts = await asyncio.gather(*[
+        call_api(semaphore, generate_slide_feedback, slide_num, slide_data, prepared["slide_content"], [])
+        for slide_num, slide_data in slide_jobs
+    ])
+    for (slide_num, slide_data), feedback_text in zip(slide_jobs, slide_texts):
+        slide_data["feedback_text"] = feedback_text
+
+    qa_feedback = batch_results.get(f"{name}::qa")
+    if conversation_history and not qa_feedback:
+        qa_feedback = await call_api(semaphore, generate_qa_feedback, conversation_history)
+
+    # Everything is precomputed, so this only parses and assembles the structured feedback
+    feedback = await asyncio.to_thread(
+        generate_feedback,
+        conversation_history,
+        slide_content=prepared["slide_content"],
+        slide_timestamps=prepared["slide_timestamps"],
+        pdf_slide_count=prepared["slide_count"],
+        precomputed_slides=prepared["slides"],
+        precomputed_qa_feedback=qa_feedback
+    )
+
+    errors = sum(
+        1 for slide in feedback["slides"] if "Error generating feedback" in slide["raw_feedback_text"]
+    )
+    write_json(os.path.join(output_dir, f"{name}.json"), {
+        "submission": name,
+        "graded_at": time.time(),
+        "feedback_errors": errors,
+        "feedback": feedback
+    })
+    print(f"✅ {name}: graded {len(feedback['slides'])} slides")
+
+def summarize_result(result):
+    """Summary row for one result file: slide count and how many criteria were met"""
+    feedback = result["feedback"]
+    statuses = [
+        criterion["status"]
+        for slide in feedback["slides"]
+        for criterion in slide["feedback"].values()
+    ]
+    if feedback.get("qa_feedback"):
+        statuses += [criterion["status"] for criterion in feedback["qa_feedback"].values() if isinstance(criterion, dict)]
+
+    return {
+        "submission": result["submission"],
+        "status": "graded" if not result.get("feedback_errors") else "graded_with_errors",
+        "slides": len(feedback["slides"]),
+        "criteria_met": statuses.count("met"),
+        "criteria_not_met": statuses.count("not_met")
+    }
+
+def write_summary(output_dir, submissions, failures, provider_name, elapsed):
+    """Write summary.json covering every submission, including those graded by earlier runs"""
+    rows = []
+    for submission in submissions:
+        name = submission["name"]
+        result = read_json(os.path.join(output_dir, f"{name}.json"))
+        if result:
+            rows.append(summarize_result(result))
+        else:
+            rows.append({"submission": name, "status": "failed", "error": failures.get(name, "not graded")})
+
+    summary = {
+        "generated_at": time.time(),
+        "provider": provider_name,
+        "run_seconds": round(elapsed, 1),
+        "total": len(rows),
+        "graded": sum(1 for row in rows if row["status"] != "failed"),
+        "failed": sum(1 for row in rows if row["status"] == "failed"),
+        "submissions": rows,
+        "usage": get_usage_summary()
+    }
+    write_json(os.path.join(output_dir, SUMMARY_FILE), summary)
+    return summary
+
+async def grade_submissions_async(input_dir, output_dir, workers, concurrency, provider_name):
+    """Async implementation of grade_submissions"""
+    started = time.time()
+    os.makedirs(os.path.join(output_dir, WORK_DIR_NAME), exist_ok=True)
+
+    submissions = discover_submissions(input_dir)
+    pending = [s for s in submissions if not os.path.exists(os.path.join(output_dir, f"{s['name']}.json"))]
+    print(f"📚 {len(submissions)} submissions, {len(submissions) - len(pending)} already graded, {len(pending)} to grade")
+
+    semaphore = asyncio.Semaphore(concurrency)
+    failures = {}
+    prepared_by_name = {}
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        async def prepare(submission):
+            work_dir = os.path.join(output_dir, WORK_DIR_NAME, submission["name"])
+            os.makedirs(work_dir, exist_ok=True)
+            try:
+                prepared_by_name[submission["name"]] = await prepare_submission(submission, work_dir, pool, semaphore)
+            except Exception as e:
+                print(f"❌ {submission['name']}: preparation failed: {e}")
+                failures[submission["name"]] = str(e)
+
+        await asyncio.gather(*[prepare(submission) for submission in pending])
+
+    batch_results = {}
+    if provider_name in BATCH_PROVIDERS and prepared_by_name:
+        requests = {}
+        for name, prepared in prepared_by_name.items():
+            requests.update(build_feedback_requests(name, prepared))
+        try:
+            batch_results = await asyncio.to_thread(
+                run_provider_batch, BATCH_PROVIDERS[provider_name](), requests, output_dir
+            )
+        except Exception as e:
+            print(f"❌ Provider batch failed, falling back to direct requests: {e}")
+
+    async def grade(submission):
+        try:
+            await grade_submission(
+                submission, prepared_by_name[submission["name"]], batch_results, output_dir, semaphore
+            )
+            shutil.rmtree(os.path.join(output_dir, WORK_DIR_NAME, submission["name"]), ignore_errors=True)
+        except Exception as e:
+            print(f"❌ {submission['name']}: grading failed: {e}")
+            failures[submission["name"]] = str(e)
+
+    await asyncio.gather(*[grade(s) for s in pending if s["name"] in prepared_by_name])
+
+    return write_summary(output_dir, submissions, failures, provider_name, time.time() - started)
+
+def grade_submissions(input_dir, output_dir, workers=DEFAULT_WORKERS, concurrency=DEFAULT_CONCURRENCY, provider="direct"):
+    """
+    Grade every submission in a folder, resuming from earlier runs
+
+    Args:
+        input_dir: Folder with one subdirectory per submission
+        output_dir: Folder for <submission>.json results, checkpoints and summary.json
+        workers: Processes used for audio decoding, splitting and delivery metrics
+        concurrency: Maximum number of API requests in flight
+        provider: 'direct' (regular requests), 'batch' (OpenAI Batch API) or 'stub' (local test provider)
+
+    Returns:
+        The summary dictionary written to summary.json
+    """
+    return asyncio.run(grade_submissions_async(input_dir, output_dir, workers, concurrency, provider))
+
+def main():
+    parser = argparse.ArgumentParser(description="Grade a folder of recorded pitches offline")
+    parser.add_argument("input_dir", help="Folder with one subdirectory per submission")
+    parser.add_argument("--out", default="batch_results", help="Output folder for results and checkpoints")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Audio processing worker processes")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="Maximum concurrent API requests")
+    parser.add_argument("--provider", choices=["direct"] + sorted(BATCH_PROVIDERS), default="direct",
+                        help="How feedback requests are sent; 'stub' answers feedback locally but still transcribes "
+                             "with the configured transcription backend (not an offline run unless TRANSCRIPTION_BACKEND=local)")
+    args = parser.parse_args()
+
+    summary = grade_submissions(args.input_dir, args.out, args.workers, args.concurrency, args.provider)
+    print(f"🏁 Graded {summary['graded']}/{summary['total']} submissions ({summary['failed']} failed) "
+          f"in {summary['run_seconds']}s; summary at {os.path.join(args.out, SUMMARY_FILE)}")
+    return 1 if summary["failed"] else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,113 @@
+"""
+Compare peak memory of whole-file and streaming slide splitting.
+
+Writes synthetic stereo 44.1 kHz recordings of the given lengths (1, 10 and
+30 minutes by default), splits each into one segment per slide in a fresh
+process with both methods, and reports peak RSS above the import baseline.
+Whole-file decoding grows with the recording; streaming should stay flat.
+
+    python backend/benchmarks/audio_decode_memory.py
+    python backend/benchmarks/audio_decode_memory.py --minutes 1 10 30 --slides 12
+    python backend/benchmarks/audio_decode_memory.py --recording pitch.webm
+"""
+import os
+import sys
+import json
+import wave
+import argparse
+import tempfile
+import subprocess
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+# Run in a child process so each measurement starts from a clean heap
+MEASURE_CODE = """
+import os, sys, json, time, resource
+import feedback_service
+from audio_streaming import iter_audio_segments, get_slide_ranges
+
+method, path, timestamps = sys.argv[1], sys.argv[2], json.loads(sys.argv[3])
+baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+started = time.perf_counter()
+if method == "streaming":
+    segments = list(iter_audio_segments(path, get_slide_ranges(timestamps)))
+else:
+    # The previous implementation: decode the whole recording with pydub, then slice
+    audio = feedback_service.load_audio_file(path)
+    segments = []
+    for i, ts in enumerate(timestamps):
+        end = timestamps[i + 1]["timestamp"] * 1000 if i + 1 < len(timestamps) else len(audio)
+        segment_path = f"{path}.{method}.{i}.wav"
+        audio[ts["timestamp"] * 1000:end].export(segment_path, format="wav")
+        segments.append({"audio_path": segment_path})
+elapsed = time.perf_counter() - started
+peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+for segment in segments:
+    os.unlink(segment["audio_path"])
+print(json.dumps({"segments": len(segments), "seconds": elapsed, "peak_kb": peak, "baseline_kb": baseline}))
+"""
+
+def write_synthetic_recording(path, minutes, sample_rate=44100, channels=2):
+    """Write a WAV of low-level noise in one-second blocks, without holding it in memory"""
+    block = os.urandom(sample_rate * channels * 2)
+    with wave.open(path, 'wb') as writer:
+        writer.setnchannels(channels)
+        writer.setsampwidth(2)
+        writer.setframerate(sample_rate)
+        for _ in range(int(minutes * 60)):
+            writer.writeframes(block)
+
+def measure(method, path, timestamps):
+    env = dict(os.environ, OPENAI_API_KEY=os.environ.get('OPENAI_API_KEY', 'benchmark'))
+    result = subprocess.run(
+        [sys.executable, "-c", MEASURE_CODE, method, path, json.dumps(timestamps)],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True
+    )
+    for line in result.stdout.splitlines():
+        if line.startswith("{"):
+            return json.loads(line)
+    raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr else "no result")
+
+def get_duration_seconds(path):
+    """Duration of a recording via ffprobe (or the WAV header)"""
+    try:
+        with wave.open(path, 'rb') as reader:
+            return reader.getnframes() / reader.getframerate()
+    except wave.Error:
+        output = subprocess.run(
+            ["ffprobe", "-v", "error", "-show_entries", "format=duration", "-of", "csv=p=0", path],
+            capture_output=True, text=True, check=True
+        ).stdout
+        return float(output.strip())
+
+def main():
+    parser = argparse.ArgumentParser(description="Peak memory of whole-file vs streaming audio splitting")
+    parser.add_argument("--minutes", type=float, nargs="+", default=[1, 10, 30], help="Synthetic recording lengths")
+    parser.add_argument("--slides", type=int, default=10, help="Slides to split each recording into")
+    parser.add_argument("--recording", help="Benchmark an existing recording instead of synthetic ones")
+    parser.add_argument("--methods", default="pydub,streaming", help="Comma-separated methods to compare")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        if args.recording:
+            recordings = [(args.recording, get_duration_seconds(args.recording))]
+        else:
+            recordings = []
+            for minutes in args.minutes:
+                path = os.path.join(work_dir, f"recording_{minutes:g}min.wav")
+                write_synthetic_recording(path, minutes)
+                recordings.append((path, minutes * 60))
+
+        print(f"\n{'recording':<24}{'method':<12}{'peak MB':>10}{'above base':>12}{'seconds':>10}")
+        for path, duration in recordings:
+            timestamps = [
+                {"slideNumber": i + 1, "timestamp": round(i * duration / args.slides, 2)}
+                for i in range(args.slides)
+            ]
+            for method in args.methods.split(','):
+                result = measure(method, path, timestamps)
+                print(f"{os.path.basename(path):<24}{method:<12}{result['peak_kb'] / 1024:>10.0f}"
+                      f"{(result['peak_kb'] - result['baseline_kb']) / 1024:>12.0f}{result['seconds']:>10.1f}")
+
+if __name__ == '__main__':
+    main()
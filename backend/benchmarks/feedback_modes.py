@@ -0,0 +1,107 @@
+"""
+Compare per-slide and batched feedback generation on a sample deck.
+
+Uses each page's text as that slide's transcript, runs generate_feedback in
+both modes and reports wall time, completion requests and token usage.
+Nothing is stored: the feedback report, search index and analytics writes
+are skipped. Requires OPENAI_API_KEY.
+
+    python backend/benchmarks/feedback_modes.py --deck airbnb-shortened.pdf --runs 3
+"""
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import feedback_service
+from pdf_utils import get_assignment_text, get_assignment_pages
+
+SAMPLE_DIALOGUE = [
+    {"role": "assistant", "content": "Who exactly is your first customer, and how do you reach them?"},
+    {"role": "user", "content": "Budget travelers in big cities. We'll start with college campuses and social ads."},
+    {"role": "assistant", "content": "What does it cost you to acquire one of them?"},
+    {"role": "user", "content": "We haven't measured it yet, but we think it's low because of word of mouth."}
+]
+
+# generate_feedback side effects that would store a session for every benchmark run
+PERSISTENCE_FUNCTIONS = ("save_feedback_result", "start_session_indexing", "start_outcome_recording")
+
+def skip_persistence():
+    """Replace generate_feedback's storage calls with no-ops and return the originals"""
+    originals = {name: getattr(feedback_service, name) for name in PERSISTENCE_FUNCTIONS}
+    for name in PERSISTENCE_FUNCTIONS:
+        setattr(feedback_service, name, lambda *args, **kwargs: None)
+    return originals
+
+def count_completions(stats):
+    """Wrap the chat completions client to count requests and tokens"""
+    original_create = feedback_service.client.chat.completions.create
+
+    def create(**kwargs):
+        response = original_create(**kwargs)
+        stats["requests"] += 1
+        if response.usage:
+            stats["prompt_tokens"] += response.usage.prompt_tokens
+            stats["completion_tokens"] += response.usage.completion_tokens
+        return response
+
+    feedback_service.client.chat.completions.create = create
+    return original_create
+
+def run_mode(mode, deck, pages, runs):
+    """Run generate_feedback in one mode and return averaged statistics"""
+    slide_content = get_assignment_text(deck)
+    precomputed = {
+        i + 1: {"transcript": text, "start_time": i * 30.0, "end_time": (i + 1) * 30.0}
+        for i, text in enumerate(pages)
+    }
+    timestamps = [{"slideNumber": num, "timestamp": data["start_time"]} for num, data in precomputed.items()]
+
+    stats = {"requests": 0, "prompt_tokens": 0, "completion_tokens": 0}
+    original_create = count_completions(stats)
+    original_persistence = skip_persistence()
+    try:
+        started = time.perf_counter()
+        for _ in range(runs):
+            feedback_service.generate_feedback(
+                conversation_history=SAMPLE_DIALOGUE,
+                slide_content=slide_content,
+                slide_timestamps=timestamps,
+                precomputed_slides={num: dict(data) for num, data in precomputed.items()},
+                pdf_slide_count=len(pages),
+                feedback_mode=mode
+            )
+        elapsed = (time.perf_counter() - started) / runs
+    finally:
+        feedback_service.client.chat.completions.create = original_create
+        for name, function in original_persistence.items():
+            setattr(feedback_service, name, function)
+
+    return {
+        "seconds": elapsed,
+        "requests": stats["requests"] / runs,
+        "prompt_tokens": stats["prompt_tokens"] / runs,
+        "completion_tokens": stats["completion_tokens"] / runs
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--deck', default='airbnb-shortened.pdf', help='PDF filename in backend/assignments')
+    parser.add_argument('--runs', type=int, default=1)
+    args = parser.parse_args()
+
+    pages = get_assignment_pages(args.deck)
+    if not pages:
+        sys.exit(f"Could not read {args.deck}")
+
+    print(f"Deck {args.deck}: {len(pages)} slides, {args.runs} run(s) per mode\n")
+    print(f"{'mode':<10} {'seconds':>8} {'requests':>9} {'prompt tok':>11} {'compl tok':>10}")
+    for mode in ('per_slide', 'batched'):
+        result = run_mode(mode, args.deck, pages, args.runs)
+        print(f"{mode:<10} {result['seconds']:>8.1f} {result['requests']:>9.1f} "
+              f"{result['prompt_tokens']:>11.0f} {result['completion_tokens']:>10.0f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+"""
+Compare slide renderers on the decks in backend/assignments/.
+
+Renders every page of each deck at full size (150 DPI) plus a thumbnail,
+exactly as /api/process-upload does, with each available renderer, and
+reports time per page and PNG output size. Renderers that are not installed
+are skipped.
+
+    python backend/benchmarks/pdf_renderers.py
+    python backend/benchmarks/pdf_renderers.py --workers 1 4 --runs 3
+"""
+import os
+import sys
+import glob
+import time
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import pdf_image_service
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+def find_decks(pattern):
+    """Assignment decks, skipping per-upload copies of the same files"""
+    paths = sorted(glob.glob(os.path.join(BACKEND_DIR, 'assignments', pattern)))
+    return [path for path in paths if not os.path.basename(path).startswith('uploaded_')]
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare PDF slide renderers")
+    parser.add_argument("--renderers", default="pdf2image,pymupdf", help="Comma-separated renderers to compare")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1], help="Worker process counts to try")
+    parser.add_argument("--decks", default="*.pdf", help="Glob of decks in backend/assignments/")
+    parser.add_argument("--runs", type=int, default=1, help="Runs per deck (median is reported)")
+    args = parser.parse_args()
+
+    decks = find_decks(args.decks)
+    if not decks:
+        sys.exit("No decks found in backend/assignments/")
+
+    print(f"\n{'deck':<28}{'renderer':<12}{'workers':>8}{'pages':>7}{'s/deck':>9}{'ms/page':>9}{'PNG KB':>9}")
+    for renderer_name in args.renderers.split(','):
+        renderer = pdf_image_service.create_pdf_renderer(renderer_name)
+        if renderer is None:
+            print(f"{'':<28}{renderer_name:<12} skipped (not installed)")
+            continue
+        for workers in args.workers:
+            for deck in decks:
+                timings = []
+                for _ in range(args.runs):
+                    started = time.perf_counter()
+                    pages = pdf_image_service.render_all_pages(renderer, deck, workers=workers)
+                    timings.append(time.perf_counter() - started)
+                seconds = statistics.median(timings)
+                png_kb = sum(len(full) + len(thumb) for _, full, thumb in pages) / 1024
+                print(f"{os.path.basename(deck)[:27]:<28}{renderer.name:<12}{workers:>8}{len(pages):>7}"
+                      f"{seconds:>9.2f}{seconds / len(pages) * 1000:>9.0f}{png_kb:>9.0f}")
+
+if __name__ == '__main__':
+    main()
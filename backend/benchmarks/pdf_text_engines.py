@@ -0,0 +1,68 @@
+"""
+Compare PDF text extraction engines on the decks in backend/assignments/.
+
+Extracts the text of every page of each deck with each available engine, as
+get_assignment_text and get_assignment_pages do. Reports pages per second and
+the characters extracted. Engines that are not installed are skipped. With
+more than one worker, every deck goes through the process pool. The default
+threshold (PDF_TEXT_PARALLEL_MIN_PAGES) would keep the small sample decks
+in-process.
+
+    python backend/benchmarks/pdf_text_engines.py
+    python backend/benchmarks/pdf_text_engines.py --workers 1 2 4 --runs 5
+"""
+import os
+import sys
+import glob
+import time
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import pdf_utils
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+def find_decks(pattern):
+    """Assignment decks, skipping per-upload copies of the same files"""
+    paths = sorted(glob.glob(os.path.join(BACKEND_DIR, 'assignments', pattern)))
+    return [path for path in paths if not os.path.basename(path).startswith('uploaded_')]
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare PDF text extraction engines")
+    parser.add_argument("--engines", default="pypdf2,pymupdf", help="Comma-separated engines to compare")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1], help="Worker process counts to try")
+    parser.add_argument("--decks", default="*.pdf", help="Glob of decks in backend/assignments/")
+    parser.add_argument("--runs", type=int, default=3, help="Runs per deck (median is reported)")
+    args = parser.parse_args()
+
+    decks = find_decks(args.decks)
+    if not decks:
+        sys.exit("No decks found in backend/assignments/")
+    pdf_utils.PDF_TEXT_PARALLEL_MIN_PAGES = 2
+
+    print(f"\n{'deck':<28}{'engine':<10}{'workers':>8}{'pages':>7}{'ms/deck':>9}{'pages/s':>9}{'chars':>9}")
+    for engine_name in args.engines.split(','):
+        engine = pdf_utils.create_text_engine(engine_name)
+        if engine is None:
+            print(f"{'':<28}{engine_name:<10} skipped (not installed)")
+            continue
+        for workers in args.workers:
+            total_pages = total_seconds = 0
+            for deck in decks:
+                timings = []
+                for _ in range(args.runs):
+                    started = time.perf_counter()
+                    pages = pdf_utils.extract_page_texts(deck, engine=engine, workers=workers)
+                    timings.append(time.perf_counter() - started)
+                seconds = statistics.median(timings)
+                total_pages += len(pages)
+                total_seconds += seconds
+                print(f"{os.path.basename(deck)[:27]:<28}{engine.name:<10}{workers:>8}{len(pages):>7}"
+                      f"{seconds * 1000:>9.1f}{len(pages) / seconds:>9.0f}{sum(len(text) for text in pages):>9}")
+            print(f"{'all decks':<28}{engine.name:<10}{workers:>8}{total_pages:>7}"
+                  f"{total_seconds * 1000:>9.1f}{total_pages / total_seconds:>9.0f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+"""
+Measure backend cold-start import time per module.
+
+Imports the target module in fresh interpreters with `python -X importtime`
+and reports the median cumulative and self time of every backend module, the
+heaviest third-party packages, and the cost of the first-use warm-up
+(OpenAI client, pydub, numpy and poppler probes). No API calls are made.
+
+    python backend/benchmarks/startup_imports.py --runs 5
+    python backend/benchmarks/startup_imports.py --module feedback_service
+"""
+import os
+import sys
+import time
+import argparse
+import statistics
+import subprocess
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+BACKEND_MODULES = {
+    os.path.splitext(name)[0] for name in os.listdir(BACKEND_DIR) if name.endswith('.py')
+}
+
+WARM_UP_CODE = """
+import time
+import app
+started = time.perf_counter()
+app.warm_up()
+print(f"WARM_UP {time.perf_counter() - started}")
+"""
+
+def run_importtime(module):
+    """
+    Import a module in a fresh interpreter with -X importtime
+
+    Returns:
+        Tuple of (wall seconds, {module: (self_us, cumulative_us)} for top-level imports of each package)
+    """
+    env = dict(os.environ, OPENAI_API_KEY=os.environ.get('OPENAI_API_KEY', 'benchmark'))
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True
+    )
+    wall = time.perf_counter() - started
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+
+    timings = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        name = name.rstrip()
+        depth = (len(name) - len(name.lstrip())) // 2
+        name = name.strip()
+        # Keep backend modules wherever they appear and only the first level of third-party packages
+        if name in BACKEND_MODULES or (depth <= 1 and "." not in name):
+            timings.setdefault(name, (int(self_us), int(cumulative_us)))
+    return wall, timings
+
+def run_warm_up():
+    """Time app.warm_up() (the work that lazy imports move off the import path)"""
+    env = dict(os.environ, OPENAI_API_KEY=os.environ.get('OPENAI_API_KEY', 'benchmark'))
+    result = subprocess.run(
+        [sys.executable, "-c", WARM_UP_CODE], cwd=BACKEND_DIR, env=env, capture_output=True, text=True
+    )
+    for line in result.stdout.splitlines():
+        if line.startswith("WARM_UP "):
+            return float(line.split()[1])
+    raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr else "warm-up did not report")
+
+def main():
+    parser = argparse.ArgumentParser(description="Report backend import time per module")
+    parser.add_argument("--module", default="app", help="Module to import (default: app)")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters to average over")
+    parser.add_argument("--top", type=int, default=10, help="Third-party packages to list")
+    args = parser.parse_args()
+
+    walls = []
+    samples = {}
+    for _ in range(args.runs):
+        wall, timings = run_importtime(args.module)
+        walls.append(wall)
+        for name, values in timings.items():
+            samples.setdefault(name, []).append(values)
+
+    def median_ms(values, index):
+        return statistics.median(v[index] for v in values) / 1000
+
+    print(f"\nimport {args.module}: median {statistics.median(walls) * 1000:.0f} ms wall "
+          f"(interpreter start included) over {args.runs} runs\n")
+
+    print(f"{'backend module':<28}{'cumulative ms':>15}{'self ms':>10}")
+    for name in sorted((n for n in samples if n in BACKEND_MODULES), key=lambda n: -median_ms(samples[n], 1)):
+        print(f"{name:<28}{median_ms(samples[name], 1):>15.1f}{median_ms(samples[name], 0):>10.1f}")
+
+    third_party = sorted((n for n in samples if n not in BACKEND_MODULES), key=lambda n: -median_ms(samples[n], 1))
+    print(f"\n{'third-party package':<28}{'cumulative ms':>15}")
+    for name in third_party[:args.top]:
+        print(f"{name:<28}{median_ms(samples[name], 1):>15.1f}")
+
+    if args.module == "app":
+        print(f"\nfirst-use warm-up (app.warm_up): {run_warm_up() * 1000:.0f} ms, run in the background at startup")
+
+if __name__ == '__main__':
+    main()
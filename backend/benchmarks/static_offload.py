@@ -0,0 +1,121 @@
+"""
+Measure worker occupancy of slide image serving with and without proxy offload.
+
+Writes a synthetic session of full-size slide images, serves the app from a
+local threaded server, and fetches the images concurrently in each
+STATIC_OFFLOAD mode. A WSGI wrapper times each request from the start of the
+handler until its last byte is handed to the server. That is the time a worker
+is tied up. With offload, the front proxy (not running here) would send the
+bytes, so the worker only does the lookup.
+
+    python backend/benchmarks/static_offload.py
+    python backend/benchmarks/static_offload.py --requests 2000 --concurrency 32 --image-kb 400
+"""
+import os
+import sys
+import time
+import shutil
+import logging
+import argparse
+import threading
+import http.client
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+os.environ.setdefault('OPENAI_API_KEY', 'benchmark')
+
+from werkzeug.serving import make_server
+
+import app as backend_app
+import artifact_storage
+from pdf_image_service import SLIDE_IMAGES_DIR
+
+BENCH_SESSION = "benchmark-static-offload"
+
+class OccupancyMeter:
+    """WSGI wrapper recording how long each request occupies a worker and how many bytes it writes"""
+
+    def __init__(self, wsgi_app):
+        self.wsgi_app = wsgi_app
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.busy_seconds = 0.0
+        self.body_bytes = 0
+        self.requests = 0
+
+    def __call__(self, environ, start_response):
+        started = time.perf_counter()
+        body_bytes = 0
+        result = self.wsgi_app(environ, start_response)
+        try:
+            for chunk in result:
+                body_bytes += len(chunk)
+                yield chunk
+        finally:
+            if hasattr(result, 'close'):
+                result.close()
+            with self.lock:
+                self.busy_seconds += time.perf_counter() - started
+                self.body_bytes += body_bytes
+                self.requests += 1
+
+def set_offload_mode(mode):
+    artifact_storage.STATIC_OFFLOAD = mode
+    backend_app.STATIC_OFFLOAD = mode
+    backend_app.app.config['USE_X_SENDFILE'] = mode == 'x-sendfile'
+
+def write_session(slides, image_kb):
+    session_dir = os.path.join(backend_app.__file__.rsplit(os.sep, 1)[0], SLIDE_IMAGES_DIR, BENCH_SESSION)
+    os.makedirs(session_dir, exist_ok=True)
+    for slide_number in range(1, slides + 1):
+        with open(os.path.join(session_dir, f"slide_{slide_number}_full.png"), 'wb') as f:
+            f.write(os.urandom(image_kb * 1024))
+    return session_dir
+
+def fetch(url):
+    with urllib.request.urlopen(url) as response:
+        try:
+            return len(response.read())
+        except http.client.IncompleteRead as e:
+            # X-Sendfile responses keep the file's Content-Length; without a proxy the body is empty
+            return len(e.partial)
+
+def main():
+    parser = argparse.ArgumentParser(description="Worker occupancy with and without static file offload")
+    parser.add_argument("--modes", default="none,x-sendfile,x-accel-redirect", help="Comma-separated STATIC_OFFLOAD modes")
+    parser.add_argument("--requests", type=int, default=1000, help="Image requests per mode")
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent clients")
+    parser.add_argument("--slides", type=int, default=20, help="Slides in the synthetic session")
+    parser.add_argument("--image-kb", type=int, default=250, help="Size of each full-size image")
+    args = parser.parse_args()
+
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    session_dir = write_session(args.slides, args.image_kb)
+    meter = OccupancyMeter(backend_app.app.wsgi_app)
+    backend_app.app.wsgi_app = meter
+    server = make_server('127.0.0.1', 0, backend_app.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_port}/api/slide-image/{BENCH_SESSION}"
+    urls = [f"{base_url}/{i % args.slides + 1}?type=full" for i in range(args.requests)]
+
+    try:
+        print(f"\n{'mode':<18}{'req/s':>9}{'worker ms/req':>15}{'busy workers':>14}{'MB via Python':>15}")
+        for mode in args.modes.split(','):
+            set_offload_mode(mode)
+            fetch(urls[0])
+            meter.reset()
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+                list(executor.map(fetch, urls))
+            elapsed = time.perf_counter() - started
+            print(f"{mode:<18}{meter.requests / elapsed:>9.0f}{meter.busy_seconds / meter.requests * 1000:>15.2f}"
+                  f"{meter.busy_seconds / elapsed:>14.2f}{meter.body_bytes / (1024 * 1024):>15.0f}")
+    finally:
+        server.shutdown()
+        shutil.rmtree(session_dir, ignore_errors=True)
+
+if __name__ == '__main__':
+    main()
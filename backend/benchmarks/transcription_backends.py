@@ -0,0 +1,110 @@
+"""
+Compare hosted and local transcription on the saved slide recordings.
+
+Transcribes the slide_*.wav files under backend/audio_sessions/ with each
+backend, one file at a time and as one batch, and reports latency and the
+word error rate of the local transcripts against the hosted ones. The local
+backend needs faster-whisper; the hosted backend needs OPENAI_API_KEY.
+
+    python backend/benchmarks/transcription_backends.py --max-files 20
+    python backend/benchmarks/transcription_backends.py --model small.en --compute-type int8
+"""
+import os
+import re
+import sys
+import glob
+import time
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+def normalize_words(text):
+    """Lowercase and strip punctuation so WER only counts word differences"""
+    return re.findall(r"[a-z0-9']+", text.lower())
+
+def word_error_rate(reference, hypothesis):
+    """Word-level Levenshtein distance divided by the reference length"""
+    ref, hyp = normalize_words(reference), normalize_words(hypothesis)
+    if not ref:
+        return 0.0 if not hyp else 1.0
+    previous = list(range(len(hyp) + 1))
+    for i, ref_word in enumerate(ref, 1):
+        current = [i]
+        for j, hyp_word in enumerate(hyp, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ref_word != hyp_word)))
+        previous = current
+    return previous[-1] / len(ref)
+
+def find_recordings(max_files):
+    """Slide recordings saved by feedback sessions, oldest sessions first"""
+    paths = sorted(glob.glob(os.path.join(BACKEND_DIR, 'audio_sessions', '*', 'slide_*.wav')))
+    return paths[:max_files] if max_files else paths
+
+def run_backend(backend, paths):
+    """Transcribe each file sequentially, then all files as one batch"""
+    transcripts, latencies = [], []
+    for path in paths:
+        started = time.perf_counter()
+        transcripts.append(backend.transcribe(path))
+        latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    backend.transcribe_many(paths)
+    batch_seconds = time.perf_counter() - started
+    return transcripts, latencies, batch_seconds
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare transcription backends on saved slide recordings")
+    parser.add_argument("--backends", default="openai,local", help="Comma-separated backends to run")
+    parser.add_argument("--max-files", type=int, default=20, help="Recordings to use (0 for all)")
+    parser.add_argument("--model", help="Local model (default: LOCAL_WHISPER_MODEL)")
+    parser.add_argument("--compute-type", help="Local compute type (default: LOCAL_WHISPER_COMPUTE_TYPE)")
+    args = parser.parse_args()
+
+    # Settings are read when transcription_service is imported
+    if args.model:
+        os.environ['LOCAL_WHISPER_MODEL'] = args.model
+    if args.compute_type:
+        os.environ['LOCAL_WHISPER_COMPUTE_TYPE'] = args.compute_type
+    from transcription_service import create_transcription_backend
+
+    paths = find_recordings(args.max_files)
+    if not paths:
+        sys.exit("No slide recordings found in backend/audio_sessions/")
+
+    audio_seconds = None
+    AudioSegment = None
+    try:
+        from pydub import AudioSegment
+    except ImportError:
+        pass
+    if AudioSegment is not None:
+        audio_seconds = sum(len(AudioSegment.from_file(path)) for path in paths) / 1000
+
+    print(f"\n{len(paths)} recordings" + (f", {audio_seconds:.0f}s of audio" if audio_seconds else "") + "\n")
+
+    results = {}
+    for name in args.backends.split(','):
+        started = time.perf_counter()
+        backend = create_transcription_backend(name)
+        load_seconds = time.perf_counter() - started
+        if backend.name != name:
+            print(f"⚠️ Skipping {name}: backend not available")
+            continue
+        transcripts, latencies, batch_seconds = run_backend(backend, paths)
+        results[name] = transcripts
+        sequential = sum(latencies)
+        print(f"{name}: load {load_seconds:.1f}s, median {statistics.median(latencies):.2f}s per file, "
+              f"{sequential:.1f}s sequential, {batch_seconds:.1f}s batched"
+              + (f", real-time factor {batch_seconds / audio_seconds:.2f}" if audio_seconds else ""))
+
+    if "openai" in results and "local" in results:
+        rates = [word_error_rate(ref, hyp) for ref, hyp in zip(results["openai"], results["local"])]
+        print(f"\nlocal vs hosted WER: mean {statistics.mean(rates):.1%}, "
+              f"median {statistics.median(rates):.1%}, worst {max(rates):.1%}")
+
+if __name__ == '__main__':
+    main()
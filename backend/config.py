@@ -0,0 +1,6 @@
+import os
+from dotenv import load_dotenv
+
+# Load the project .env once, before any backend module reads its settings with os.getenv.
+# Modules that read settings at import time import this module first.
+load_dotenv(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '.env'))
@@ -0,0 +1,178 @@
+import os
+import re
+import json
+import math
+import threading
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import config
+from pdf_utils import get_assignment_pages
+from metrics import stage_timer, record_cache_lookup
+from artifact_storage import ensure_local_file
+
+# Slides retrieved per chat turn, in addition to the slides on screen
+CHAT_RETRIEVAL_TOP_K = int(os.getenv('CHAT_RETRIEVAL_TOP_K', '4'))
+MAX_SLIDE_CHARS = 1500
+
+# BM25 parameters (standard defaults)
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+# Indexes are small (one term-frequency table per slide); keep the most recently used decks in memory
+MAX_CACHED_INDEXES = 32
+
+_indexes = OrderedDict()
+_lock = threading.Lock()
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="deck-index")
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[.'][a-z0-9]+)*")
+STOPWORDS = frozenset("""
+a about an and are as at be but by can do does for from has have how i if in into is it its me my
+no not of on or our so than that the their them there these they this to was we what when where which
+who why will with you your
+""".split())
+
+def tokenize(text):
+    """Lowercase word tokens without stopwords"""
+    return [token for token in TOKEN_PATTERN.findall((text or "").lower()) if token not in STOPWORDS]
+
+class DeckIndex:
+    """BM25 index over the text of each slide in one deck"""
+
+    def __init__(self, pages):
+        self.pages = pages
+        self.term_counts = [Counter(tokenize(page)) for page in pages]
+        self.lengths = [sum(counts.values()) for counts in self.term_counts]
+        self.average_length = (sum(self.lengths) / len(pages)) if pages else 0
+        document_frequency = Counter(term for counts in self.term_counts for term in counts)
+        self.idf = {
+            term: math.log(1 + (len(pages) - df + 0.5) / (df + 0.5))
+            for term, df in document_frequency.items()
+        }
+
+    def score(self, query_terms):
+        """BM25 score of every slide for the query terms"""
+        scores = []
+        for counts, length in zip(self.term_counts, self.lengths):
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * length / (self.average_length or 1))
+            scores.append(sum(
+                self.idf[term] * counts[term] * (BM25_K1 + 1) / (counts[term] + norm)
+                for term in query_terms if counts.get(term)
+            ))
+        return scores
+
+    def search(self, query, top_k):
+        """
+        Find the slides most relevant to a query
+
+        Returns:
+            Slide numbers (1-indexed) of up to top_k slides with a positive score, best first
+        """
+        query_terms = set(tokenize(query))
+        if not query_terms:
+            return []
+        scores = self.score(query_terms)
+        ranked = sorted(range(len(scores)), key=lambda i: scores[i], reverse=True)
+        return [i + 1 for i in ranked[:top_k] if scores[i] > 0]
+
+def get_deck_index(filename):
+    """
+    Get the BM25 index for an assignment deck, building it on first use
+
+    Indexes are rebuilt when the PDF changes on disk.
+
+    Args:
+        filename: Name of the PDF file in the assignments directory
+
+    Returns:
+        DeckIndex, or None if the deck's text could not be extracted
+    """
+    assignments_dir = os.path.join(os.path.dirname(__file__), 'assignments')
+    try:
+        pdf_path = os.path.join(assignments_dir, filename)
+        ensure_local_file(pdf_path)
+        key = (filename, os.path.getmtime(pdf_path))
+    except OSError:
+        return None
+
+    with _lock:
+        index = _indexes.get(key)
+        if index is not None:
+            _indexes.move_to_end(key)
+    record_cache_lookup("deck_index", index is not None)
+    if index is not None:
+        return index
+
+    with stage_timer("chat.build_index"):
+        pages = get_assignment_pages(filename)
+        if not pages:
+            return None
+        index = DeckIndex(pages)
+
+    with _lock:
+        _indexes[key] = index
+        while len(_indexes) > MAX_CACHED_INDEXES:
+            _indexes.popitem(last=False)
+    print(f"🔎 Built slide index for {filename} ({len(pages)} slides)")
+    return index
+
+def start_deck_index_build(filename):
+    """Build a deck's index in the background at upload time so the first chat turn doesn't wait"""
+    _executor.submit(get_deck_index, filename)
+
+def retrieve_slide_context(filename, query, current_slides=None, top_k=CHAT_RETRIEVAL_TOP_K):
+    """
+    Select the slides to show the model for one chat turn
+
+    Args:
+        filename: Name of the PDF file in the assignments directory
+        query: Latest user message and transcription
+        current_slides: Slide numbers on screen, always included
+        top_k: Number of additional slides to retrieve by relevance
+
+    Returns:
+        Tuple of (formatted slide text in deck order, list of slide numbers), or (None, []) if the deck has no index
+    """
+    index = get_deck_index(filename)
+    if index is None:
+        return None, []
+
+    slide_count = len(index.pages)
+    selected = [num for num in (current_slides or []) if 1 <= num <= slide_count]
+    retrieved = [num for num in index.search(query, top_k + len(selected)) if num not in selected]
+    selected += retrieved[:top_k]
+
+    # With no matching terms (e.g. a greeting), open with the first slides so the model knows the company
+    if not selected:
+        selected = list(range(1, min(top_k, slide_count) + 1))
+
+    selected.sort()
+    context = "\n\n".join(
+        f"--- Slide {num} of {slide_count} ---\n{index.pages[num - 1][:MAX_SLIDE_CHARS]}" for num in selected
+    )
+    return context, selected
+
+def parse_slide_range(value):
+    """
+    Parse the slides on screen from a request field
+
+    Accepts {"start": 3, "end": 5}, a list of slide numbers, or the same as a JSON string.
+
+    Returns:
+        List of slide numbers (empty if missing or invalid)
+    """
+    if isinstance(value, str):
+        try:
+            value = json.loads(value)
+        except ValueError:
+            return []
+    try:
+        if isinstance(value, dict):
+            start, end = int(value["start"]), int(value.get("end", value["start"]))
+            return list(range(start, min(end, start + 20) + 1))
+        if isinstance(value, list):
+            return [int(num) for num in value[:20]]
+    except (KeyError, TypeError, ValueError):
+        pass
+    return []
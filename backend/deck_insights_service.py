@@ -0,0 +1,214 @@
+import os
+import re
+import json
+import time
+import uuid
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import config
+from openai_client import client
+from pdf_utils import extract_pdf_pages
+from usage_stats import timed_completion
+from metrics import record_cache_lookup
+
+# Deck insights storage configuration
+DECK_INSIGHTS_DIR = "deck_insights"
+PRECOMPUTE_DECK_INSIGHTS = os.getenv('PRECOMPUTE_DECK_INSIGHTS', 'false').lower() in ('1', 'true', 'yes')
+MAX_SLIDE_CHARS = 2000
+
+# Insights are a few KB per deck; keep the most recently used sessions in memory
+MAX_CACHED_INSIGHTS = 64
+
+# Background pool for precompute jobs started from /api/process-upload
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="deck-insights")
+_pending = {}
+_cache = OrderedDict()
+_lock = threading.Lock()
+
+UPLOADED_FILENAME_PATTERN = re.compile(r"^uploaded_([0-9a-f-]{36})_")
+
+DECK_INSIGHTS_PROMPT = """You are a seasoned VC preparing to hear a founder pitch the deck below. For every slide, write:
+- "summary": one sentence describing what the slide says
+- "key_claims": the 1-3 claims the founder must defend (numbers, assumptions, positioning)
+- "probing_questions": 2-3 short, skeptical questions you would ask about this slide
+
+Respond with a JSON object of the form:
+{"slides": [{"slide": 1, "summary": "...", "key_claims": ["..."], "probing_questions": ["..."]}]}
+Include every slide, in order. Keep each string under 30 words."""
+
+def ensure_insights_directories():
+    """Ensure required directories exist"""
+    # Get absolute path to the backend directory
+    backend_dir = os.path.dirname(os.path.abspath(__file__))
+    os.makedirs(os.path.join(backend_dir, DECK_INSIGHTS_DIR), exist_ok=True)
+
+def get_insights_path(session_id):
+    """Get the file path for a session's deck insights; session_id must be a UUID"""
+    backend_dir = os.path.dirname(os.path.abspath(__file__))
+    return os.path.join(backend_dir, DECK_INSIGHTS_DIR, f"{uuid.UUID(session_id)}.json")
+
+def cache_deck_insights(session_id, insights):
+    """Keep a session's insights in the in-memory LRU cache"""
+    with _lock:
+        _cache[session_id] = insights
+        _cache.move_to_end(session_id)
+        while len(_cache) > MAX_CACHED_INSIGHTS:
+            _cache.popitem(last=False)
+
+def get_session_id_from_filename(filename):
+    """Recover the upload session ID from an 'uploaded_<session_id>_<name>.pdf' assignment filename"""
+    match = UPLOADED_FILENAME_PATTERN.match(filename or "")
+    return match.group(1) if match else None
+
+def generate_deck_insights(pdf_path):
+    """
+    Produce per-slide summaries, key claims and probing questions for a deck
+
+    Args:
+        pdf_path: Path to the PDF file
+
+    Returns:
+        List of {"slide", "summary", "key_claims", "probing_questions"} dictionaries, or None on failure
+    """
+    pages = extract_pdf_pages(pdf_path)
+    if not pages:
+        return None
+
+    deck_text = "\n\n".join(
+        f"--- Slide {i + 1} ---\n{text[:MAX_SLIDE_CHARS]}" for i, text in enumerate(pages)
+    )
+
+    response = timed_completion(
+        "deck_insights",
+        client.chat.completions.create,
+        model="gpt-5",
+        messages=[
+            {"role": "system", "content": DECK_INSIGHTS_PROMPT},
+            {"role": "user", "content": deck_text}
+        ],
+        response_format={"type": "json_object"},
+        max_completion_tokens=300 * len(pages) + 200,
+        reasoning_effort="minimal"
+    )
+
+    slides = json.loads(response.choices[0].message.content).get("slides", [])
+    return [
+        {
+            "slide": int(slide.get("slide", i + 1)),
+            "summary": slide.get("summary", ""),
+            "key_claims": list(slide.get("key_claims", [])),
+            "probing_questions": list(slide.get("probing_questions", []))
+        }
+        for i, slide in enumerate(slides)
+    ]
+
+def precompute_deck_insights(pdf_path, session_id):
+    """Generate and cache deck insights for a session; runs in the background pool"""
+    try:
+        started = time.time()
+        slides = generate_deck_insights(pdf_path)
+        if not slides:
+            print(f"⚠️ No deck insights produced for session {session_id}")
+            return None
+
+        insights = {"created_at": time.time(), "slides": slides}
+        ensure_insights_directories()
+        with open(get_insights_path(session_id), 'w') as f:
+            json.dump(insights, f)
+
+        cache_deck_insights(session_id, insights)
+        print(f"✅ Deck insights precomputed for session {session_id} in {time.time() - started:.1f}s")
+        return insights
+
+    except Exception as e:
+        print(f"❌ Deck insights precompute failed for session {session_id}: {e}")
+        return None
+    finally:
+        with _lock:
+            _pending.pop(session_id, None)
+
+def start_deck_insights_precompute(pdf_path, session_id):
+    """Queue deck insights generation without blocking the upload response"""
+    with _lock:
+        if session_id in _pending or session_id in _cache:
+            return
+        _pending[session_id] = _executor.submit(precompute_deck_insights, pdf_path, session_id)
+    print(f"🔮 Deck insights precompute started for session {session_id}")
+
+def get_deck_insights(session_id):
+    """
+    Get cached deck insights for a session without waiting for a running precompute
+
+    Returns:
+        Insights dictionary, or None if they are not available (yet)
+    """
+    if not session_id:
+        return None
+    try:
+        session_id = str(uuid.UUID(session_id))
+    except (ValueError, TypeError, AttributeError):
+        return None
+
+    with _lock:
+        insights = _cache.get(session_id)
+        if insights is not None:
+            _cache.move_to_end(session_id)
+    if insights is not None:
+        record_cache_lookup("deck_insights", True)
+        return insights
+
+    insights_path = get_insights_path(session_id)
+    if not os.path.exists(insights_path):
+        record_cache_lookup("deck_insights", False)
+        return None
+
+    try:
+        with open(insights_path, 'r') as f:
+            insights = json.load(f)
+        if not isinstance(insights, dict) or not isinstance(insights.get("slides"), list):
+            raise ValueError("missing slides list")
+        cache_deck_insights(session_id, insights)
+        record_cache_lookup("deck_insights", True)
+        return insights
+    except Exception as e:
+        print(f"⚠️ Could not read deck insights for session {session_id}: {e}")
+        return None
+
+def format_deck_insights(insights):
+    """
+    Format deck insights as compact chat context
+
+    Returns:
+        One block per slide with its summary, claims and the questions to probe
+    """
+    lines = []
+    for slide in insights.get("slides", []):
+        lines.append(f"Slide {slide['slide']}: {slide['summary']}")
+        if slide["key_claims"]:
+            lines.append(f"  Claims: {'; '.join(slide['key_claims'])}")
+        if slide["probing_questions"]:
+            lines.append(f"  Probe: {' | '.join(slide['probing_questions'])}")
+    return "\n".join(lines)
+
+def cleanup_old_deck_insights(max_age_hours=24):
+    """Remove old deck insights files"""
+    try:
+        cutoff_time = time.time() - (max_age_hours * 3600)
+        backend_dir = os.path.dirname(os.path.abspath(__file__))
+        insights_dir = os.path.join(backend_dir, DECK_INSIGHTS_DIR)
+
+        if not os.path.exists(insights_dir):
+            return
+
+        for filename in os.listdir(insights_dir):
+            insights_path = os.path.join(insights_dir, filename)
+            if os.path.getmtime(insights_path) < cutoff_time:
+                os.unlink(insights_path)
+                with _lock:
+                    _cache.pop(filename.replace('.json', ''), None)
+                print(f"🗑️ Cleaned up deck insights {filename}")
+
+    except Exception as e:
+        print(f"⚠️ Error during deck insights cleanup: {e}")
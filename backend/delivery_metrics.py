@@ -0,0 +1,221 @@
+import os
+import re
+import wave
+
+from metrics import stage_timer
+from lazy_imports import lazy_module, optional_import
+
+# numpy is imported on first use so importing the backend stays fast
+np = lazy_module('numpy')
+
+def delivery_metrics_available():
+    """Whether numpy can be imported (checked once, on first use)"""
+    return optional_import('numpy') is not None
+
+# Analysis window and pause detection settings
+FRAME_SECONDS = 0.02
+MIN_PAUSE_SECONDS = 0.3
+LONG_PAUSE_SECONDS = 1.5
+SILENCE_FLOOR_DB = -50.0
+SILENCE_MARGIN_DB = 12.0
+
+# Only unambiguous disfluencies count as fillers; the rate is reported to the model as a measured fact
+FILLER_PATTERN = re.compile(r"\b(?:um+|uh+|erm+|ah+|hmm+)\b", re.IGNORECASE)
+# Words and phrases that are fillers only in some uses ("it's, like, fast" vs "customers like it"),
+# counted separately so they never inflate the filler rate
+DISCOURSE_MARKER_PATTERN = re.compile(
+    r"\b(?:like|you know|i mean|kind of|sort of|basically|actually|literally)\b",
+    re.IGNORECASE
+)
+WORD_PATTERN = re.compile(r"[A-Za-z0-9']+")
+
+def load_audio_samples(audio_path):
+    """
+    Decode an audio file into mono float samples in the range [-1, 1]
+
+    Args:
+        audio_path: Path to a WAV file (other formats are decoded through pydub)
+
+    Returns:
+        Tuple of (samples, sample_rate)
+    """
+    try:
+        with wave.open(audio_path, 'rb') as wav_file:
+            sample_rate = wav_file.getframerate()
+            channels = wav_file.getnchannels()
+            sample_width = wav_file.getsampwidth()
+            raw = wav_file.readframes(wav_file.getnframes())
+    except (wave.Error, EOFError):
+        AudioSegment = optional_import('pydub', 'AudioSegment')
+        if AudioSegment is None:
+            raise
+        audio = AudioSegment.from_file(audio_path)
+        sample_rate = audio.frame_rate
+        channels = audio.channels
+        sample_width = audio.sample_width
+        raw = audio.raw_data
+
+    if sample_width == 1:
+        samples = (np.frombuffer(raw, dtype=np.uint8).astype(np.float32) - 128.0) / 128.0
+    elif sample_width == 2:
+        samples = np.frombuffer(raw, dtype='<i2').astype(np.float32) / 32768.0
+    elif sample_width == 4:
+        samples = np.frombuffer(raw, dtype='<i4').astype(np.float32) / 2147483648.0
+    else:
+        raise ValueError(f"Unsupported sample width: {sample_width} bytes")
+
+    if channels > 1:
+        samples = samples[:len(samples) - len(samples) % channels].reshape(-1, channels).mean(axis=1)
+
+    return samples, sample_rate
+
+def frame_loudness_db(samples, sample_rate):
+    """Compute per-frame RMS loudness in dBFS"""
+    frame_length = max(1, int(sample_rate * FRAME_SECONDS))
+    frame_count = len(samples) // frame_length
+    if frame_count == 0:
+        return np.zeros(0, dtype=np.float32)
+
+    frames = samples[:frame_count * frame_length].reshape(frame_count, frame_length)
+    rms = np.sqrt(np.mean(np.square(frames), axis=1))
+    return 20.0 * np.log10(np.maximum(rms, 1e-10))
+
+def find_pauses(voiced):
+    """
+    Find runs of unvoiced frames
+
+    Args:
+        voiced: Boolean array with one entry per analysis frame
+
+    Returns:
+        Array of pause lengths in seconds (leading and trailing silence excluded)
+    """
+    if len(voiced) == 0 or not voiced.any():
+        return np.zeros(0, dtype=np.float32)
+
+    # Trim silence before the first and after the last voiced frame
+    voiced_indices = np.flatnonzero(voiced)
+    inner = voiced[voiced_indices[0]:voiced_indices[-1] + 1]
+
+    padded = np.concatenate(([1], inner.astype(np.int8), [1]))
+    edges = np.diff(padded)
+    starts = np.flatnonzero(edges == -1)
+    ends = np.flatnonzero(edges == 1)
+    lengths = (ends - starts) * FRAME_SECONDS
+    return lengths[lengths >= MIN_PAUSE_SECONDS]
+
+def count_words(transcript):
+    """Count spoken words in a transcript"""
+    return len(WORD_PATTERN.findall(transcript or ""))
+
+def count_fillers(transcript):
+    """Count filler sounds (um, uh, ...) in a transcript"""
+    return len(FILLER_PATTERN.findall(transcript or ""))
+
+def count_discourse_markers(transcript):
+    """Count words and phrases that may be fillers depending on context (like, actually, ...)"""
+    return len(DISCOURSE_MARKER_PATTERN.findall(transcript or ""))
+
+def compute_delivery_metrics(audio_path, transcript, duration=None):
+    """
+    Compute local delivery metrics for one slide
+
+    Args:
+        audio_path: Path to the slide's audio segment, or None if only the transcript is available
+        transcript: Whisper transcript for the slide
+        duration: Slide duration in seconds, used when no audio is available
+
+    Returns:
+        Dictionary of delivery metrics, or None if nothing could be measured
+    """
+    with stage_timer("audio.delivery_metrics"):
+        return measure_delivery(audio_path, transcript, duration)
+
+def measure_delivery(audio_path, transcript, duration=None):
+    """Compute delivery metrics; see compute_delivery_metrics"""
+    try:
+        word_count = count_words(transcript)
+        filler_count = count_fillers(transcript)
+
+        metrics = {
+            "duration_seconds": None,
+            "word_count": word_count,
+            "words_per_minute": None,
+            "filler_count": filler_count,
+            "fillers_per_minute": None,
+            "filler_rate_percent": round(100.0 * filler_count / word_count, 1) if word_count else 0.0,
+            "discourse_marker_count": count_discourse_markers(transcript),
+            "pause_count": None,
+            "long_pause_count": None,
+            "mean_pause_seconds": None,
+            "max_pause_seconds": None,
+            "speaking_time_ratio": None,
+            "loudness_std_db": None
+        }
+
+        if audio_path and delivery_metrics_available() and os.path.exists(audio_path):
+            samples, sample_rate = load_audio_samples(audio_path)
+            duration = len(samples) / float(sample_rate) if sample_rate else duration
+
+            loudness = frame_loudness_db(samples, sample_rate)
+            if len(loudness):
+                # Adaptive threshold: a margin above the quiet floor, never below the absolute floor
+                threshold = max(SILENCE_FLOOR_DB, float(np.percentile(loudness, 10)) + SILENCE_MARGIN_DB)
+                voiced = loudness > threshold
+                pauses = find_pauses(voiced)
+                voiced_loudness = loudness[voiced]
+
+                metrics["pause_count"] = int(len(pauses))
+                metrics["long_pause_count"] = int(np.count_nonzero(pauses >= LONG_PAUSE_SECONDS))
+                metrics["mean_pause_seconds"] = round(float(pauses.mean()), 2) if len(pauses) else 0.0
+                metrics["max_pause_seconds"] = round(float(pauses.max()), 2) if len(pauses) else 0.0
+                metrics["speaking_time_ratio"] = round(float(voiced.mean()), 2)
+                metrics["loudness_std_db"] = round(float(voiced_loudness.std()), 1) if len(voiced_loudness) else 0.0
+
+        if duration and duration > 0:
+            minutes = duration / 60.0
+            metrics["duration_seconds"] = round(duration, 1)
+            metrics["words_per_minute"] = round(word_count / minutes)
+            metrics["fillers_per_minute"] = round(filler_count / minutes, 1)
+
+        return metrics
+
+    except Exception as e:
+        print(f"❌ Delivery metrics failed for {audio_path}: {e}")
+        return None
+
+def format_delivery_metrics(metrics):
+    """
+    Format delivery metrics as a compact single line for the feedback prompt
+
+    Args:
+        metrics: Dictionary returned by compute_delivery_metrics
+
+    Returns:
+        String like "140 wpm; 3 pauses ≥0.3s (1 ≥1.5s, max 2.1s); ..."
+    """
+    if not metrics:
+        return ""
+
+    parts = []
+    if metrics.get("duration_seconds"):
+        parts.append(f"{metrics['duration_seconds']}s")
+    if metrics.get("words_per_minute") is not None:
+        parts.append(f"{metrics['words_per_minute']} wpm")
+    if metrics.get("pause_count") is not None:
+        parts.append(
+            f"{metrics['pause_count']} pauses ≥{MIN_PAUSE_SECONDS}s "
+            f"({metrics['long_pause_count']} ≥{LONG_PAUSE_SECONDS}s, max {metrics['max_pause_seconds']}s)"
+        )
+    if metrics.get("speaking_time_ratio") is not None:
+        parts.append(f"speaking {int(metrics['speaking_time_ratio'] * 100)}% of the time")
+    if metrics.get("loudness_std_db") is not None:
+        parts.append(f"loudness variation {metrics['loudness_std_db']} dB")
+    filler_text = f"{metrics['filler_count']} fillers ({metrics['filler_rate_percent']}% of words"
+    if metrics.get("fillers_per_minute") is not None:
+        filler_text += f", {metrics['fillers_per_minute']}/min"
+    parts.append(filler_text + ")")
+    if metrics.get("discourse_marker_count"):
+        parts.append(f"{metrics['discourse_marker_count']} possible verbal tics (like, actually, ...; not all are fillers)")
+
+    return "; ".join(parts)
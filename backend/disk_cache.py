@@ -0,0 +1,98 @@
+import os
+import time
+import threading
+
+class BoundedDiskCache:
+    """
+    Directory of cached files with a total size limit
+
+    Reading an entry refreshes its modification time, so eviction removes the
+    least recently used files first once the directory outgrows its limit.
+    """
+
+    def __init__(self, directory, max_bytes):
+        backend_dir = os.path.dirname(os.path.abspath(__file__))
+        self.directory = os.path.join(backend_dir, directory)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        # Total size of the directory, computed on first write
+        self._total_bytes = None
+
+    def path_for(self, name):
+        return os.path.join(self.directory, name)
+
+    def get_path(self, name):
+        """Path of a cached entry, marked as recently used; None on a miss"""
+        path = self.path_for(name)
+        try:
+            os.utime(path)
+            return path
+        except FileNotFoundError:
+            return None
+
+    def read(self, name):
+        """Bytes of a cached entry, marked as recently used; None on a miss"""
+        path = self.get_path(name)
+        if path is None:
+            return None
+        try:
+            with open(path, 'rb') as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def write(self, name, data):
+        """Store an entry atomically, then evict least recently used entries beyond the size limit"""
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.path_for(name)
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(data)
+        os.replace(temp_path, path)
+
+        with self._lock:
+            if self._total_bytes is None:
+                self._total_bytes = sum(entry.stat().st_size for entry in os.scandir(self.directory))
+            else:
+                self._total_bytes += len(data)
+            if self._total_bytes > self.max_bytes:
+                self.evict(keep_path=path)
+        return path
+
+    def evict(self, keep_path=None):
+        """Delete least recently used entries until the cache is under 90% of its limit (caller holds _lock)"""
+        entries = sorted(os.scandir(self.directory), key=lambda entry: entry.stat().st_mtime)
+        for entry in entries:
+            if self._total_bytes <= self.max_bytes * 0.9:
+                break
+            if entry.path == keep_path:
+                continue
+            try:
+                size = entry.stat().st_size
+                os.unlink(entry.path)
+                self._total_bytes -= size
+            except FileNotFoundError:
+                pass
+
+    def cleanup(self, max_age_hours):
+        """
+        Remove entries not used within max_age_hours
+
+        Returns:
+            Number of entries removed
+        """
+        if not os.path.exists(self.directory):
+            return 0
+
+        cutoff_time = time.time() - (max_age_hours * 3600)
+        removed = 0
+        for filename in os.listdir(self.directory):
+            path = os.path.join(self.directory, filename)
+            if os.path.getmtime(path) < cutoff_time:
+                os.unlink(path)
+                removed += 1
+
+        if removed:
+            with self._lock:
+                self._total_bytes = None
+        return removed
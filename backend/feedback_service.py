@@ -1,33 +1,52 @@
 import os
+import re
+import gzip
 import tempfile
 import json
 import time
+import bisect
 import uuid
 import shutil
-from openai import OpenAI
-from dotenv import load_dotenv
+import wave
+import config
+from openai_client import client
+from lazy_imports import optional_import
+from delivery_metrics import compute_delivery_metrics, format_delivery_metrics
+from usage_stats import timed_completion
+from transcription_service import get_transcription_backend
+from metrics import stage_timer, record_bytes
+from audio_streaming import iter_audio_segments, get_slide_ranges, StreamDecodeError
+from pdf_image_service import get_thumbnail_sprite
+from search_index import start_session_indexing
+from analytics_store import start_outcome_recording
+from artifact_storage import publish_file, artifact_exists, ensure_local_file, delete_artifacts
 
-# Try to import pydub, fallback if not available
-try:
-    from pydub import AudioSegment
-    AUDIO_PROCESSING_AVAILABLE = True
-    print("✅ Audio processing available")
-except ImportError as e:
-    print(f"⚠️ Audio processing not available: {e}")
-    AudioSegment = None
-    AUDIO_PROCESSING_AVAILABLE = False
+def get_audio_segment_class():
+    """Import pydub on first use; returns AudioSegment, or None if audio processing is not available"""
+    return optional_import('pydub', 'AudioSegment')
 
-load_dotenv(os.path.join(os.path.dirname(__file__), '..', '.env'))
-
-api_key = os.getenv('OPENAI_API_KEY')
-if not api_key:
-    raise ValueError("OPENAI_API_KEY not found in environment variables")
-
-client = OpenAI(api_key=api_key)
+def audio_processing_available():
+    """Whether pydub can be imported (checked once, on first use)"""
+    return get_audio_segment_class() is not None
 
 # Audio session storage configuration
 AUDIO_SESSIONS_DIR = "audio_sessions"
 
+# Sessions (audio segments and the stored feedback report) are removed after this long
+AUDIO_SESSION_MAX_AGE_HOURS = 24
+
+# Feedback report stored with the session as gzipped compact JSON, so it can be reopened without regenerating
+FEEDBACK_RESULT_FILE = "feedback.json.gz"
+SESSION_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+# Transcription mode: 'per_slide' uploads each slide segment to Whisper,
+# 'full' uploads the whole recording once and splits the transcript locally
+TRANSCRIPTION_MODE = os.getenv('TRANSCRIPTION_MODE', 'per_slide')
+
+# Feedback mode: 'per_slide' makes one completion per slide plus one for Q&A,
+# 'batched' requests a single JSON-schema response covering every slide and Q&A
+FEEDBACK_MODE = os.getenv('FEEDBACK_MODE', 'per_slide')
+
 def ensure_audio_directories():
     """Ensure required directories exist"""
     # Get absolute path to the backend directory
@@ -57,19 +76,128 @@ Start with "Content structuring:" then deliver a blunt verdict including a "Met:
 
 def transcribe_recording(audio_file_path):
     """
-    Transcribe the full presentation recording using OpenAI Whisper
+    Transcribe the full presentation recording with the configured transcription backend
     """
     try:
-        with open(audio_file_path, 'rb') as f:
-            transcript = client.audio.transcriptions.create(
-                model="whisper-1",
-                file=f,
-                response_format="text"
-            )
-        return transcript
+        return get_transcription_backend().transcribe(audio_file_path)
     except Exception as e:
         raise Exception(f"Recording transcription error: {str(e)}")
 
+def transcribe_recordings(audio_file_paths):
+    """
+    Transcribe several slide segments in one batch (concurrently on the local engine)
+    
+    Args:
+        audio_file_paths: Paths to the segment audio files
+    
+    Returns:
+        List with the transcript of each file, or an Exception for files that failed
+    """
+    return get_transcription_backend().transcribe_many(audio_file_paths)
+
+def transcribe_recording_with_timestamps(audio_file_path):
+    """
+    Transcribe the full presentation recording once with word and segment timestamps
+    
+    Args:
+        audio_file_path: Path to the full audio recording
+    
+    Returns:
+        Dictionary with "text", "duration", "words" and "segments"; words and
+        segments are lists of {"text": str, "start": float, "end": float}
+    """
+    try:
+        return get_transcription_backend().transcribe_with_timestamps(audio_file_path)
+    except Exception as e:
+        raise Exception(f"Recording transcription error: {str(e)}")
+
+def split_transcript_by_timestamps(transcription, slide_timestamps):
+    """
+    Split a timestamped transcription into per-slide transcripts
+    
+    Each word (or segment, if Whisper returned no words) is assigned to the slide
+    that was on screen at its midpoint, so words spoken across a slide change
+    are kept whole.
+    
+    Args:
+        transcription: Dictionary returned by transcribe_recording_with_timestamps
+        slide_timestamps: List of {"slideNumber": int, "timestamp": float} objects
+    
+    Returns:
+        Dictionary mapping slide numbers to {"transcript": str, "start_time": float, "end_time": float}
+    """
+    boundaries = [ts["timestamp"] for ts in slide_timestamps]
+    pieces = transcription["words"] or transcription["segments"]
+    slide_texts = [[] for _ in slide_timestamps]
+    
+    for piece in pieces:
+        midpoint = (piece["start"] + piece["end"]) / 2
+        # Index of the last slide that started at or before this piece
+        index = max(0, bisect.bisect_right(boundaries, midpoint) - 1)
+        slide_texts[index].append(piece["text"].strip())
+    
+    slide_transcripts = {}
+    for i, timestamp_data in enumerate(slide_timestamps):
+        end_time = boundaries[i + 1] if i + 1 < len(boundaries) else transcription.get("duration")
+        text = " ".join(text for text in slide_texts[i] if text)
+        slide_data = slide_transcripts.get(timestamp_data["slideNumber"])
+        if slide_data is None:
+            slide_transcripts[timestamp_data["slideNumber"]] = {
+                "transcript": text,
+                "start_time": timestamp_data["timestamp"],
+                "end_time": end_time
+            }
+        else:
+            # A revisited slide keeps the words of every visit, spanning its first start to its last end
+            slide_data["transcript"] = " ".join(part for part in (slide_data["transcript"], text) if part)
+            slide_data["start_time"] = min(slide_data["start_time"], timestamp_data["timestamp"])
+            if end_time is None or slide_data["end_time"] is None:
+                slide_data["end_time"] = None
+            else:
+                slide_data["end_time"] = max(slide_data["end_time"], end_time)
+    
+    return slide_transcripts
+
+def transcribe_slides_from_full_recording(audio_file_path, slide_timestamps, audio_segments=None):
+    """
+    Transcribe the full recording with one Whisper call and split it by slide locally
+    
+    Args:
+        audio_file_path: Path to the full audio recording
+        slide_timestamps: List of {"slideNumber": int, "timestamp": float} objects
+        audio_segments: Optional per-slide audio segments used for delivery metrics
+    
+    Returns:
+        Dictionary mapping slide numbers to {"transcript", "start_time", "end_time", "metrics"}
+    """
+    transcription = transcribe_recording_with_timestamps(audio_file_path)
+    print(f"✅ Full recording transcribed once: {len(transcription['words'])} words, {len(transcription['segments'])} segments")
+    
+    slide_transcripts = split_transcript_by_timestamps(transcription, slide_timestamps)
+    segment_paths = {segment["slideNumber"]: segment["audio_path"] for segment in (audio_segments or [])}
+    
+    # Time on screen per slide, summed over visits (a revisited slide's start-to-end span includes other slides)
+    durations = {}
+    visit_counts = {}
+    for i, timestamp_data in enumerate(slide_timestamps):
+        slide_num = timestamp_data["slideNumber"]
+        end_time = slide_timestamps[i + 1]["timestamp"] if i + 1 < len(slide_timestamps) else transcription.get("duration")
+        visit_counts[slide_num] = visit_counts.get(slide_num, 0) + 1
+        if end_time is None or durations.get(slide_num, 0) is None:
+            durations[slide_num] = None
+        else:
+            durations[slide_num] = durations.get(slide_num, 0) + end_time - timestamp_data["timestamp"]
+    
+    for slide_num, slide_data in slide_transcripts.items():
+        duration = durations.get(slide_num)
+        if visit_counts.get(slide_num, 1) > 1:
+            # The segment file holds only one visit; measure the slide from its transcript and total time
+            segment_paths.pop(slide_num, None)
+        slide_data["metrics"] = compute_delivery_metrics(segment_paths.get(slide_num), slide_data["transcript"], duration)
+        print(f"📝 Slide {slide_num} transcript from full recording: {len(slide_data['transcript'])} chars")
+    
+    return slide_transcripts
+
 def save_audio_segments(session_id, audio_segments):
     """
     Save audio segments to session directory
@@ -96,7 +224,10 @@ def save_audio_segments(session_id, audio_segments):
             
             # Copy to session directory with permanent name
             permanent_path = os.path.join(session_dir, f"slide_{slide_number}.wav")
-            shutil.copy2(temp_audio_path, permanent_path)
+            with stage_timer("feedback.segment_save"):
+                shutil.copy2(temp_audio_path, permanent_path)
+                publish_file(permanent_path)
+            record_bytes("audio_segment_saved", os.path.getsize(permanent_path))
             
             saved_segments[slide_number] = permanent_path
             print(f"💾 Saved audio segment for slide {slide_number}")
@@ -111,6 +242,7 @@ def save_audio_segments(session_id, audio_segments):
         metadata_path = os.path.join(session_dir, "metadata.json")
         with open(metadata_path, 'w') as f:
             json.dump(metadata, f)
+        publish_file(metadata_path)
         
         print(f"✅ Saved {len(saved_segments)} audio segments for session {session_id}")
         return saved_segments
@@ -127,11 +259,74 @@ def get_audio_segment_path(session_id, slide_number):
     audio_file = f"slide_{slide_number}.wav"
     audio_path = os.path.join(session_dir, audio_file)
     
-    if os.path.exists(audio_path):
+    if artifact_exists(audio_path):
         return audio_path
     
     return None
 
+def save_feedback_result(session_id, structured_feedback):
+    """
+    Store a feedback report with its session so GET /api/feedback/<session_id> can serve it
+
+    Returns:
+        Path of the stored report, or None if it could not be saved
+    """
+    try:
+        ensure_audio_directories()
+        backend_dir = os.path.dirname(os.path.abspath(__file__))
+        session_dir = os.path.join(backend_dir, AUDIO_SESSIONS_DIR, session_id)
+        os.makedirs(session_dir, exist_ok=True)
+        
+        result_path = os.path.join(session_dir, FEEDBACK_RESULT_FILE)
+        payload = json.dumps(structured_feedback, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+        with stage_timer("feedback.result_save"):
+            compressed = gzip.compress(payload, compresslevel=6, mtime=0)
+            with open(f"{result_path}.tmp", 'wb') as f:
+                f.write(compressed)
+            os.replace(f"{result_path}.tmp", result_path)
+            publish_file(result_path)
+        record_bytes("feedback_result", len(compressed))
+        
+        print(f"💾 Saved feedback report for session {session_id} ({len(payload)} → {len(compressed)} bytes)")
+        return result_path
+        
+    except Exception as e:
+        print(f"❌ Error saving feedback report: {e}")
+        return None
+
+def get_feedback_result_path(session_id):
+    """
+    Get the stored (gzipped JSON) feedback report for a session
+
+    Returns:
+        File path or None if there is no report (never generated, or expired)
+    """
+    if not SESSION_ID_PATTERN.match(session_id or ""):
+        return None
+    backend_dir = os.path.dirname(os.path.abspath(__file__))
+    result_path = os.path.join(backend_dir, AUDIO_SESSIONS_DIR, session_id, FEEDBACK_RESULT_FILE)
+    
+    if ensure_local_file(result_path):
+        return result_path
+    
+    return None
+
+def get_session_expiry(session_id):
+    """Unix time at which cleanup_old_audio_sessions will remove a session, or None if it is gone"""
+    backend_dir = os.path.dirname(os.path.abspath(__file__))
+    session_dir = os.path.join(backend_dir, AUDIO_SESSIONS_DIR, session_id)
+    metadata_path = os.path.join(session_dir, "metadata.json")
+    try:
+        ensure_local_file(metadata_path)
+        with open(metadata_path, 'r') as f:
+            created_at = json.load(f).get("created_at", 0)
+    except (OSError, ValueError):
+        try:
+            created_at = os.path.getctime(session_dir)
+        except OSError:
+            return None
+    return created_at + AUDIO_SESSION_MAX_AGE_HOURS * 3600
+
 def cleanup_session_audio(session_id):
     """Remove all audio files for a specific session"""
     try:
@@ -139,11 +334,12 @@ def cleanup_session_audio(session_id):
         if os.path.exists(session_dir):
             shutil.rmtree(session_dir)
             print(f"🗑️ Cleaned up audio for session {session_id}")
+        delete_artifacts(session_dir)
     except Exception as e:
         print(f"⚠️ Error cleaning up audio for session {session_id}: {e}")
 
-def cleanup_old_audio_sessions(max_age_hours=24):
-    """Remove old audio session directories"""
+def cleanup_old_audio_sessions(max_age_hours=AUDIO_SESSION_MAX_AGE_HOURS):
+    """Remove old audio session directories, including their stored feedback reports"""
     try:
         current_time = time.time()
         cutoff_time = current_time - (max_age_hours * 3600)
@@ -168,10 +364,164 @@ def cleanup_old_audio_sessions(max_age_hours=24):
                         creation_time = os.path.getctime(session_path)
                         if creation_time < cutoff_time:
                             cleanup_session_audio(session_dir)
+                elif os.path.getctime(session_path) < cutoff_time:
+                    # Sessions without audio only hold a feedback report
+                    cleanup_session_audio(session_dir)
                             
     except Exception as e:
         print(f"⚠️ Error during audio cleanup: {e}")
 
+def load_audio_file(audio_file_path):
+    """Load an audio file with pydub, trying WebM and MP4 if auto-detection fails"""
+    with stage_timer("audio.decode"):
+        return decode_audio_file(audio_file_path)
+
+def decode_audio_file(audio_file_path):
+    """Decode an audio file with pydub; see load_audio_file"""
+    # Load the full audio file - try different formats
+    try:
+        # First try as-is (pydub auto-detects format)
+        audio = get_audio_segment_class().from_file(audio_file_path)
+        print(f"🎵 Successfully loaded audio file")
+    except Exception as e:
+        print(f"⚠️ Failed to load audio file directly: {e}")
+        # If that fails, try specific formats
+        try:
+            audio = get_audio_segment_class().from_file(audio_file_path, format="webm")
+            print(f"🎵 Successfully loaded as WebM")
+        except:
+            try:
+                audio = get_audio_segment_class().from_file(audio_file_path, format="mp4")
+                print(f"🎵 Successfully loaded as MP4")
+            except:
+                print(f"❌ Could not load audio in any supported format")
+                raise e
+    return audio
+
+def extract_audio_segment(audio_file_path, slide_number, start_time, end_time=None):
+    """
+    Extract a single slide's audio from a recording
+    
+    Args:
+        audio_file_path: Path to the recording (may be a prefix of a longer recording)
+        slide_number: Slide number, used in the temporary file name
+        start_time: Segment start in seconds
+        end_time: Segment end in seconds, or None for the end of the recording
+    
+    Returns:
+        {"slideNumber": int, "audio_path": str, "start_time": float, "end_time": float}, or None if the range is empty
+    """
+    try:
+        return next(iter_audio_segments(audio_file_path, [(slide_number, start_time, end_time)]), None)
+    except StreamDecodeError as e:
+        print(f"⚠️ Streaming decode unavailable, decoding the whole recording: {e}")
+    
+    if not audio_processing_available():
+        return None
+    
+    audio = load_audio_file(audio_file_path)
+    start_ms = start_time * 1000
+    end_ms = min(end_time * 1000, len(audio)) if end_time is not None else len(audio)
+    if start_ms >= end_ms:
+        return None
+    
+    segment = audio[start_ms:end_ms]
+    with stage_timer("audio.segment_export", slide=slide_number), tempfile.NamedTemporaryFile(delete=False, suffix=f'_slide_{slide_number}.wav') as temp_segment:
+        segment.export(temp_segment.name, format="wav")
+    record_bytes("audio_segment", os.path.getsize(temp_segment.name))
+    
+    return {
+        "slideNumber": slide_number,
+        "audio_path": temp_segment.name,
+        "start_time": start_ms / 1000,
+        "end_time": end_ms / 1000
+    }
+
+def join_wav_files(audio_file_paths, output_path):
+    """Concatenate WAV files that share one format (e.g. segments of the same recording) into output_path"""
+    with wave.open(output_path, 'wb') as writer:
+        for index, audio_file_path in enumerate(audio_file_paths):
+            with wave.open(audio_file_path, 'rb') as reader:
+                if index == 0:
+                    writer.setparams(reader.getparams())
+                writer.writeframes(reader.readframes(reader.getnframes()))
+    return output_path
+
+def transcribe_missing_slides(audio_file_path, slide_timestamps, slide_numbers):
+    """
+    Cut, transcribe and measure selected slides from the full recording
+
+    Used for slides whose live results are missing; every visit to such a slide is
+    cut from the recording and the visits are joined so the slide is reviewed whole.
+
+    Args:
+        audio_file_path: Path to the full audio recording
+        slide_timestamps: List of {"slideNumber": int, "timestamp": float} objects
+        slide_numbers: Slides to process
+
+    Returns:
+        Tuple of (slide number -> {"transcript", "start_time", "end_time", "metrics", "audio_path"},
+        temporary files to clean up)
+    """
+    slide_numbers = set(slide_numbers)
+    visits = [
+        (timestamp_data["slideNumber"], timestamp_data["timestamp"],
+         slide_timestamps[i + 1]["timestamp"] if i + 1 < len(slide_timestamps) else None)
+        for i, timestamp_data in enumerate(slide_timestamps)
+        if timestamp_data["slideNumber"] in slide_numbers
+    ]
+
+    # One pass over the recording when the timestamps allow it, otherwise one extraction per visit
+    segments = []
+    slide_ranges = get_slide_ranges(slide_timestamps)
+    if slide_ranges:
+        try:
+            segments = list(iter_audio_segments(audio_file_path, [r for r in slide_ranges if r[0] in slide_numbers]))
+        except StreamDecodeError as e:
+            print(f"⚠️ Streaming decode unavailable, extracting slides one at a time: {e}")
+    if not segments:
+        segments = [segment for segment in (extract_audio_segment(audio_file_path, *visit) for visit in visits) if segment]
+
+    temp_files = [segment["audio_path"] for segment in segments]
+    segments_by_slide = {}
+    for segment in segments:
+        segments_by_slide.setdefault(segment["slideNumber"], []).append(segment)
+
+    slide_audio = []
+    for slide_number, slide_segments in sorted(segments_by_slide.items()):
+        audio_path = slide_segments[0]["audio_path"]
+        if len(slide_segments) > 1:
+            with tempfile.NamedTemporaryFile(delete=False, suffix=f'_slide_{slide_number}.wav') as joined:
+                audio_path = joined.name
+            temp_files.append(audio_path)
+            join_wav_files([segment["audio_path"] for segment in slide_segments], audio_path)
+        slide_audio.append((slide_number, audio_path, slide_segments[0]["start_time"], slide_segments[-1]["end_time"]))
+
+    slides = {}
+    transcripts = transcribe_recordings([audio_path for _, audio_path, _, _ in slide_audio])
+    for (slide_number, audio_path, start_time, end_time), transcript in zip(slide_audio, transcripts):
+        slide_data = {"start_time": start_time, "end_time": end_time, "audio_path": audio_path}
+        if isinstance(transcript, Exception):
+            print(f"❌ Failed to transcribe slide {slide_number}: {transcript}")
+            slide_data["transcript"] = "Transcription failed"
+        else:
+            slide_data["transcript"] = transcript
+            slide_data["metrics"] = compute_delivery_metrics(audio_path, transcript)
+            print(f"✅ Slide {slide_number} transcribed from the full recording: {len(transcript)} chars")
+        slides[slide_number] = slide_data
+
+    return slides, temp_files
+
+def log_audio_header(audio_file_path):
+    """Print a WAV recording's duration, rate and channels from its header, without decoding it"""
+    try:
+        with wave.open(audio_file_path, 'rb') as wav_file:
+            print(f"🔧 DEBUG: Audio duration: {wav_file.getnframes() / wav_file.getframerate():.1f}s")
+            print(f"🔧 DEBUG: Audio sample rate: {wav_file.getframerate()}Hz")
+            print(f"🔧 DEBUG: Audio channels: {wav_file.getnchannels()}")
+    except (wave.Error, EOFError):
+        print("🔧 DEBUG: Not a WAV recording; it is decoded while splitting")
+
 def split_audio_by_timestamps(audio_file_path, slide_timestamps):
     """
     Split audio into segments based on slide timestamps
@@ -184,32 +534,30 @@ def split_audio_by_timestamps(audio_file_path, slide_timestamps):
         List of {"slideNumber": int, "audio_path": str, "start_time": float, "end_time": float}
     """
     try:
-        if not AUDIO_PROCESSING_AVAILABLE:
-            print("⚠️ Audio processing not available, returning full audio as single segment")
-            return [{"slideNumber": 1, "audio_path": audio_file_path, "start_time": 0, "end_time": None}]
-        
         if not slide_timestamps or len(slide_timestamps) < 2:
             print("⚠️ Not enough timestamps for splitting, returning full audio as single segment")
             return [{"slideNumber": 1, "audio_path": audio_file_path, "start_time": 0, "end_time": None}]
         
-        # Load the full audio file - try different formats
-        try:
-            # First try as-is (pydub auto-detects format)
-            audio = AudioSegment.from_file(audio_file_path)
-            print(f"🎵 Successfully loaded audio file")
-        except Exception as e:
-            print(f"⚠️ Failed to load audio file directly: {e}")
-            # If that fails, try specific formats
+        # Decode once, front to back, writing each slide as soon as its end is reached
+        slide_ranges = get_slide_ranges(slide_timestamps)
+        if slide_ranges:
             try:
-                audio = AudioSegment.from_file(audio_file_path, format="webm")
-                print(f"🎵 Successfully loaded as WebM")
-            except:
-                try:
-                    audio = AudioSegment.from_file(audio_file_path, format="mp4")
-                    print(f"🎵 Successfully loaded as MP4")
-                except:
-                    print(f"❌ Could not load audio in any supported format")
-                    raise e
+                print(f"🎵 Stream-splitting audio based on {len(slide_timestamps)} timestamps")
+                audio_segments = []
+                for segment in iter_audio_segments(audio_file_path, slide_ranges):
+                    audio_segments.append(segment)
+                    print(f"📊 Slide {segment['slideNumber']}: {segment['start_time']:.1f}s - {segment['end_time']:.1f}s")
+                if audio_segments:
+                    return audio_segments
+                print("⚠️ Streaming decode produced no audio, decoding the whole recording")
+            except StreamDecodeError as e:
+                print(f"⚠️ Streaming decode unavailable, decoding the whole recording: {e}")
+        
+        if not audio_processing_available():
+            print("⚠️ Audio processing not available, returning full audio as single segment")
+            return [{"slideNumber": 1, "audio_path": audio_file_path, "start_time": 0, "end_time": None}]
+        
+        audio = load_audio_file(audio_file_path)
         audio_segments = []
         
         print(f"🎵 Splitting audio based on {len(slide_timestamps)} timestamps")
@@ -231,8 +579,9 @@ def split_audio_by_timestamps(audio_file_path, slide_timestamps):
                 segment = audio[start_time:end_time]
                 
                 # Save segment to temporary file
-                with tempfile.NamedTemporaryFile(delete=False, suffix=f'_slide_{slide_number}.wav') as temp_segment:
+                with stage_timer("audio.segment_export", slide=slide_number), tempfile.NamedTemporaryFile(delete=False, suffix=f'_slide_{slide_number}.wav') as temp_segment:
                     segment.export(temp_segment.name, format="wav")
+                    record_bytes("audio_segment", os.path.getsize(temp_segment.name))
                     
                     audio_segments.append({
                         "slideNumber": slide_number,
@@ -250,7 +599,23 @@ def split_audio_by_timestamps(audio_file_path, slide_timestamps):
         # Fallback to full audio as single segment
         return [{"slideNumber": 1, "audio_path": audio_file_path, "start_time": 0, "end_time": None}]
 
-def generate_feedback(conversation_history, slide_content=None, presentation_recording=None, slide_timestamps=None, assignment_filename=None, pdf_session_id=None, pdf_slide_count=None):
+def save_recording_to_temp_file(presentation_recording):
+    """
+    Stream an uploaded recording (file-like object or bytes) to a temporary file
+    
+    Returns:
+        Path to the temporary file; the caller is responsible for deleting it
+    """
+    with stage_timer("feedback.upload_write"), tempfile.NamedTemporaryFile(delete=False, suffix='.wav') as temp_audio:
+        if hasattr(presentation_recording, 'read'):
+            # Copy in blocks so the full recording is never held in memory
+            shutil.copyfileobj(presentation_recording, temp_audio, 64 * 1024)
+        else:
+            temp_audio.write(presentation_recording)
+    record_bytes("recording_upload", os.path.getsize(temp_audio.name))
+    return temp_audio.name
+
+def generate_feedback(conversation_history, slide_content=None, presentation_recording=None, slide_timestamps=None, assignment_filename=None, pdf_session_id=None, pdf_slide_count=None, recording_path=None, precomputed_slides=None, feedback_mode=None, precomputed_qa_feedback=None, missing_slides=None):
     """
     Generate slide-specific feedback based on the VC conversation and presentation recording
     
@@ -262,16 +627,23 @@ def generate_feedback(conversation_history, slide_content=None, presentation_rec
         assignment_filename: PDF filename for slide image extraction
         pdf_session_id: Session ID from PDF upload for linking images
         pdf_slide_count: Actual number of slides in the PDF
+        recording_path: Path to an already stored recording (e.g. a chunked upload), used instead of presentation_recording
+        precomputed_slides: Slide number -> {"transcript", "start_time", "end_time", "metrics", "audio_path", "feedback_text"}
+            already produced during the live pitch; these slides skip transcription and feedback generation
+        feedback_mode: 'per_slide' (one request per slide) or 'batched' (one structured-output request); defaults to FEEDBACK_MODE
+        precomputed_qa_feedback: Q&A feedback text generated ahead of time (e.g. by the offline batch grader)
+        missing_slides: Slides whose live results are missing; they are cut from recording_path and reviewed here
     
     Returns:
         Dictionary containing structured feedback data with session info
     """
     try:
-        print("📝 Generating slide-specific feedback...")
+        feedback_mode = feedback_mode or FEEDBACK_MODE
+        print(f"📝 Generating slide-specific feedback ({feedback_mode} mode)...")
         print(f"💬 Conversation messages: {len(conversation_history)}")
         print(f"💬 First few messages: {conversation_history[:3] if conversation_history else 'None'}")
         print(f"📄 Slide content provided: {bool(slide_content)}")
-        print(f"🎙️ Presentation recording provided: {bool(presentation_recording)}")
+        print(f"🎙️ Presentation recording provided: {bool(presentation_recording or recording_path)}")
         print(f"📊 Slide timestamps provided: {len(slide_timestamps) if slide_timestamps else 0}")
         if slide_timestamps:
             print(f"📊 Detailed timestamps: {slide_timestamps}")
@@ -286,32 +658,52 @@ def generate_feedback(conversation_history, slide_content=None, presentation_rec
         temp_files_to_cleanup = []
         original_audio_segments = []
         
-        if presentation_recording and slide_timestamps:
+        has_recording = bool(presentation_recording or recording_path)
+        
+        if precomputed_slides:
+            print(f"⚡ Using {len(precomputed_slides)} slides precomputed during the live pitch")
+            for slide_num, slide_data in sorted(precomputed_slides.items()):
+                slide_audio_transcripts[slide_num] = slide_data
+                if slide_data.get("audio_path"):
+                    original_audio_segments.append({
+                        "slideNumber": slide_num,
+                        "audio_path": slide_data["audio_path"],
+                        "start_time": slide_data["start_time"],
+                        "end_time": slide_data["end_time"]
+                    })
+            
+            if missing_slides and recording_path and slide_timestamps:
+                print(f"🔊 Transcribing slides {sorted(missing_slides)} from the full recording (no live result)")
+                try:
+                    recovered_slides, recovered_files = transcribe_missing_slides(recording_path, slide_timestamps, missing_slides)
+                    temp_files_to_cleanup.extend(recovered_files)
+                    for slide_num, slide_data in recovered_slides.items():
+                        slide_audio_transcripts[slide_num] = slide_data
+                        original_audio_segments.append({
+                            "slideNumber": slide_num,
+                            "audio_path": slide_data["audio_path"],
+                            "start_time": slide_data["start_time"],
+                            "end_time": slide_data["end_time"]
+                        })
+                    original_audio_segments.sort(key=lambda segment: segment["slideNumber"])
+                except Exception as e:
+                    print(f"❌ Could not process the missing slides from the recording: {e}")
+        
+        elif has_recording and slide_timestamps:
             print("🔊 Processing slide-specific audio segments...")
             
-            # Save recording to temporary file
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.wav') as temp_audio:
-                if hasattr(presentation_recording, 'read'):
-                    temp_audio.write(presentation_recording.read())
-                else:
-                    temp_audio.write(presentation_recording)
-                temp_audio_path = temp_audio.name
+            # Use the uploaded recording in place, or save the request body to a temporary file
+            temp_audio_path = recording_path
+            if not temp_audio_path:
+                temp_audio_path = save_recording_to_temp_file(presentation_recording)
                 temp_files_to_cleanup.append(temp_audio_path)
             
             try:
-                # Debug the received audio file
+                # Debug the received audio file (header only; decoding it here would hold the whole recording in memory)
                 print(f"🔧 DEBUG: About to split audio with {len(slide_timestamps)} timestamps")
                 print(f"🔧 DEBUG: Audio file path: {temp_audio_path}")
                 print(f"🔧 DEBUG: Audio file size: {os.path.getsize(temp_audio_path)} bytes")
-                
-                # Try to get audio info
-                try:
-                    test_audio = AudioSegment.from_file(temp_audio_path)
-                    print(f"🔧 DEBUG: Audio duration: {len(test_audio)/1000:.1f}s")
-                    print(f"🔧 DEBUG: Audio sample rate: {test_audio.frame_rate}Hz")
-                    print(f"🔧 DEBUG: Audio channels: {test_audio.channels}")
-                except Exception as audio_info_error:
-                    print(f"🔧 DEBUG: Cannot read audio info: {audio_info_error}")
+                log_audio_header(temp_audio_path)
                 
                 audio_segments = split_audio_by_timestamps(temp_audio_path, slide_timestamps)
                 print(f"🔧 DEBUG: split_audio_by_timestamps returned {len(audio_segments)} segments")
@@ -322,44 +714,43 @@ def generate_feedback(conversation_history, slide_content=None, presentation_rec
                     original_audio_segments = audio_segments.copy()
                     print(f"🔧 DEBUG: original_audio_segments set with {len(original_audio_segments)} segments")
                     
-                    # Transcribe each segment
-                    for segment in audio_segments:
+                    if TRANSCRIPTION_MODE == 'full':
                         try:
-                            transcript = transcribe_recording(segment["audio_path"])
-                            slide_audio_transcripts[segment["slideNumber"]] = {
-                                "transcript": transcript,
-                                "start_time": segment["start_time"],
-                                "end_time": segment["end_time"]
-                            }
-                            temp_files_to_cleanup.append(segment["audio_path"])
-                            print(f"✅ Slide {segment['slideNumber']} transcribed: {len(transcript)} chars")
+                            slide_audio_transcripts = transcribe_slides_from_full_recording(
+                                temp_audio_path, slide_timestamps, audio_segments
+                            )
                         except Exception as e:
-                            print(f"❌ Failed to transcribe slide {segment['slideNumber']}: {e}")
-                            slide_audio_transcripts[segment["slideNumber"]] = {
-                                "transcript": "Transcription failed",
-                                "start_time": segment["start_time"],
-                                "end_time": segment["end_time"]
-                            }
+                            print(f"❌ Full-recording transcription failed, transcribing per slide: {e}")
+                    
+                    for segment in audio_segments:
+                        temp_files_to_cleanup.append(segment["audio_path"])
+                    
+                    if not slide_audio_transcripts:
+                        # Transcribe all segments in one batch
+                        transcripts = transcribe_recordings([segment["audio_path"] for segment in audio_segments])
+                        for segment, transcript in zip(audio_segments, transcripts):
+                            try:
+                                if isinstance(transcript, Exception):
+                                    raise transcript
+                                slide_audio_transcripts[segment["slideNumber"]] = {
+                                    "transcript": transcript,
+                                    "start_time": segment["start_time"],
+                                    "end_time": segment["end_time"],
+                                    "metrics": compute_delivery_metrics(segment["audio_path"], transcript)
+                                }
+                                print(f"✅ Slide {segment['slideNumber']} transcribed: {len(transcript)} chars")
+                            except Exception as e:
+                                print(f"❌ Failed to transcribe slide {segment['slideNumber']}: {e}")
+                                slide_audio_transcripts[segment["slideNumber"]] = {
+                                    "transcript": "Transcription failed",
+                                    "start_time": segment["start_time"],
+                                    "end_time": segment["end_time"]
+                                }
                 else:
-                    print("⚠️ Audio splitting returned only one segment, treating as full audio")
-                    # Create fake segments based on timestamps for feedback structure
+                    print("⚠️ Audio splitting returned only one segment, transcribing full audio with timestamps")
+                    # Split the timestamped transcript locally instead of guessing by word count
                     if slide_timestamps and len(slide_timestamps) > 1:
-                        full_transcript = transcribe_recording(temp_audio_path)
-                        for i, timestamp_data in enumerate(slide_timestamps):
-                            slide_num = timestamp_data["slideNumber"]
-                            # Split transcript roughly by slide count
-                            words = full_transcript.split()
-                            words_per_slide = len(words) // len(slide_timestamps)
-                            start_word = i * words_per_slide
-                            end_word = (i + 1) * words_per_slide if i < len(slide_timestamps) - 1 else len(words)
-                            slide_transcript = " ".join(words[start_word:end_word])
-                            
-                            slide_audio_transcripts[slide_num] = {
-                                "transcript": slide_transcript,
-                                "start_time": timestamp_data["timestamp"],
-                                "end_time": slide_timestamps[i + 1]["timestamp"] if i + 1 < len(slide_timestamps) else None
-                            }
-                            print(f"📝 Created fake segment for slide {slide_num}: {len(slide_transcript)} chars")
+                        slide_audio_transcripts = transcribe_slides_from_full_recording(temp_audio_path, slide_timestamps)
                 
             except Exception as e:
                 print(f"❌ Audio processing failed: {e}")
@@ -371,20 +762,22 @@ def generate_feedback(conversation_history, slide_content=None, presentation_rec
                 except Exception as transcribe_error:
                     print(f"❌ Full audio transcription also failed: {transcribe_error}")
         
-        elif presentation_recording:
+        elif has_recording:
             # No timestamps provided, transcribe full audio
             print("🔊 Transcribing full presentation recording (no timestamps)...")
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.wav') as temp_audio:
-                if hasattr(presentation_recording, 'read'):
-                    temp_audio.write(presentation_recording.read())
-                else:
-                    temp_audio.write(presentation_recording)
-                temp_audio_path = temp_audio.name
+            temp_audio_path = recording_path
+            if not temp_audio_path:
+                temp_audio_path = save_recording_to_temp_file(presentation_recording)
                 temp_files_to_cleanup.append(temp_audio_path)
             
             try:
                 full_transcript = transcribe_recording(temp_audio_path)
-                slide_audio_transcripts[1] = {"transcript": full_transcript, "start_time": 0, "end_time": None}
+                slide_audio_transcripts[1] = {
+                    "transcript": full_transcript,
+                    "start_time": 0,
+                    "end_time": None,
+                    "metrics": compute_delivery_metrics(temp_audio_path, full_transcript)
+                }
                 print(f"✅ Full audio transcribed: {len(full_transcript)} chars")
             except Exception as e:
                 print(f"❌ Full audio transcription failed: {e}")
@@ -434,13 +827,16 @@ def generate_feedback(conversation_history, slide_content=None, presentation_rec
             else:
                 slide_timestamps_only = slide_timestamps
         
+        # Collect the slides to review and whether the Q&A section should be evaluated
+        slides_to_review = []
+        include_qa = False
+        
         # Always try to generate per-slide feedback if we have timestamps
         if slide_timestamps_only and len(slide_timestamps_only) > 1:
             print(f"📊 Generating per-slide feedback for {len(slide_timestamps_only)} slides based on timestamps")
             print(f"📊 Slide timestamps (filtered): {slide_timestamps_only}")
             print(f"📊 Audio transcripts available for slides: {list(slide_audio_transcripts.keys())}")
             
-            # Generate feedback for each slide based on timestamps
             for i, timestamp_data in enumerate(slide_timestamps_only):
                 slide_num = timestamp_data["slideNumber"]
                 print(f"📊 Processing slide {slide_num} (index {i})")
@@ -452,49 +848,21 @@ def generate_feedback(conversation_history, slide_content=None, presentation_rec
                 else:
                     slide_data = {"transcript": "Audio not available for this slide", "start_time": 0, "end_time": None}
                     print(f"📊 No audio transcript for slide {slide_num}, using placeholder")
-                
-                try:
-                    feedback_part = generate_slide_feedback(slide_num, slide_data, slide_content, conversation_history)
-                    feedback_parts.append(feedback_part)
-                    print(f"✅ Successfully generated feedback for slide {slide_num}")
-                except Exception as e:
-                    print(f"❌ Error generating feedback for slide {slide_num}: {e}")
-                    feedback_parts.append(f"**Slide {slide_num} Feedback:** Error: {str(e)}")
+                slides_to_review.append((slide_num, slide_data))
             
             # Add Q&A section analysis if we detected Q&A or have conversation history
             print(f"🔍 Q&A Generation Check:")
             print(f"  - Has conversation history: {bool(conversation_history)}")
             print(f"  - Conversation length: {len(conversation_history) if conversation_history else 0}")
             print(f"  - Has Q&A section detected: {has_qa_section}")
-            
-            if conversation_history and (has_qa_section or len(conversation_history) > 2):
-                print(f"✅ Generating Q&A feedback...")
-                qa_feedback = generate_qa_feedback(conversation_history)
-                feedback_parts.append(qa_feedback)
-                print(f"✅ Q&A feedback added to parts")
-            else:
-                print(f"⚠️ Skipping Q&A feedback generation")
+            include_qa = bool(conversation_history) and (has_qa_section or len(conversation_history) > 2)
         
         elif slide_audio_transcripts and len(slide_audio_transcripts) > 1:
             print(f"📊 Generating per-slide feedback for {len(slide_audio_transcripts)} slides based on audio")
             
             for slide_num in sorted(slide_audio_transcripts.keys()):
-                slide_data = slide_audio_transcripts[slide_num]
-                feedback_part = generate_slide_feedback(slide_num, slide_data, slide_content, conversation_history)
-                feedback_parts.append(feedback_part)
-            
-            # Add Q&A section analysis
-            print(f"🔍 Q&A Generation Check (branch 2):")
-            print(f"  - Has conversation history: {bool(conversation_history)}")
-            print(f"  - Conversation length: {len(conversation_history) if conversation_history else 0}")
-            
-            if conversation_history:
-                print(f"✅ Generating Q&A feedback...")
-                qa_feedback = generate_qa_feedback(conversation_history)
-                feedback_parts.append(qa_feedback)
-                print(f"✅ Q&A feedback added to parts")
-            else:
-                print(f"⚠️ No conversation history for Q&A feedback")
+                slides_to_review.append((slide_num, slide_audio_transcripts[slide_num]))
+            include_qa = bool(conversation_history)
         
         else:
             # Fallback to single slide feedback when no timestamps available
@@ -504,22 +872,46 @@ def generate_feedback(conversation_history, slide_content=None, presentation_rec
             slide_data = {"transcript": "Audio not available", "start_time": 0, "end_time": None}
             if slide_audio_transcripts and 1 in slide_audio_transcripts:
                 slide_data = slide_audio_transcripts[1]
-            
-            feedback_part = generate_slide_feedback(1, slide_data, slide_content, conversation_history)
-            feedback_parts.append(feedback_part)
-            
-            # Add Q&A section analysis
-            print(f"🔍 Q&A Generation Check (branch 2):")
-            print(f"  - Has conversation history: {bool(conversation_history)}")
-            print(f"  - Conversation length: {len(conversation_history) if conversation_history else 0}")
-            
-            if conversation_history:
-                print(f"✅ Generating Q&A feedback...")
-                qa_feedback = generate_qa_feedback(conversation_history)
-                feedback_parts.append(qa_feedback)
-                print(f"✅ Q&A feedback added to parts")
+            slides_to_review.append((1, slide_data))
+            include_qa = bool(conversation_history)
+        
+        # Slides precomputed during the live pitch already have their feedback
+        slides_to_generate = [(num, data) for num, data in slides_to_review if not data.get("feedback_text")]
+        
+        batched_feedback = None
+        if feedback_mode == 'batched' and (slides_to_generate or (include_qa and not precomputed_qa_feedback)):
+            print(f"📦 Generating batched feedback for {len(slides_to_generate)} slides (Q&A: {include_qa}) in one request")
+            try:
+                batched_feedback = generate_batched_feedback(
+                    slides_to_generate, slide_content, conversation_history if include_qa and not precomputed_qa_feedback else None
+                )
+            except Exception as e:
+                print(f"❌ Batched feedback failed, falling back to per-slide requests: {e}")
+        
+        for slide_num, slide_data in slides_to_review:
+            if slide_data.get("feedback_text"):
+                feedback_parts.append(slide_data["feedback_text"])
+            elif batched_feedback and slide_num in batched_feedback["slides"]:
+                feedback_parts.append(format_slide_feedback_text(slide_num, batched_feedback["slides"][slide_num]))
             else:
-                print(f"⚠️ No conversation history for Q&A feedback")
+                try:
+                    feedback_parts.append(generate_slide_feedback(slide_num, slide_data, slide_content, conversation_history))
+                    print(f"✅ Successfully generated feedback for slide {slide_num}")
+                except Exception as e:
+                    print(f"❌ Error generating feedback for slide {slide_num}: {e}")
+                    feedback_parts.append(f"**Slide {slide_num} Feedback:** Error: {str(e)}")
+        
+        if include_qa:
+            print(f"✅ Generating Q&A feedback...")
+            if precomputed_qa_feedback:
+                feedback_parts.append(precomputed_qa_feedback)
+            elif batched_feedback and batched_feedback["qa"]:
+                feedback_parts.append(format_qa_feedback_text(batched_feedback["qa"]))
+            else:
+                feedback_parts.append(generate_qa_feedback(conversation_history))
+            print(f"✅ Q&A feedback added to parts")
+        else:
+            print(f"⚠️ Skipping Q&A feedback generation")
         
         # Use PDF session ID for images, generate new session ID for audio
         feedback_session_id = str(uuid.uuid4())
@@ -562,6 +954,7 @@ def generate_feedback(conversation_history, slide_content=None, presentation_rec
             "qa_feedback": None,
             "metadata": {
                 "generated_at": time.time(),
+                "feedback_mode": "batched" if batched_feedback else "per_slide",
                 "slide_count": actual_slide_count or (len(slide_timestamps_only) if slide_timestamps_only else 1),
                 "has_audio": bool(slide_audio_transcripts),
                 "has_conversation": bool(conversation_history),
@@ -593,8 +986,11 @@ def generate_feedback(conversation_history, slide_content=None, presentation_rec
                 print(f"⚠️ Skipping slide {slide_num} as it exceeds actual slide count {actual_slide_count}")
                 continue
             
-            # Parse the feedback text to extract individual scores
-            parsed_feedback = parse_slide_feedback(feedback_text)
+            # Batched results are already structured; otherwise parse the feedback text
+            if batched_feedback and slide_num in batched_feedback["slides"]:
+                parsed_feedback = batched_feedback["slides"][slide_num]
+            else:
+                parsed_feedback = parse_slide_feedback(feedback_text)
             
             # Check if audio exists for this slide
             has_audio = slide_num in audio_session_data
@@ -612,7 +1008,10 @@ def generate_feedback(conversation_history, slide_content=None, presentation_rec
                 "slide_number": slide_num,
                 "image_url": f"/api/slide-image/{image_session_id}/{slide_num}?type=thumbnail",
                 "image_url_full": f"/api/slide-image/{image_session_id}/{slide_num}?type=full",
+                # Base URL for resized variants: append ?width=<px>&format=webp
+                "image_url_base": f"/api/slide-image/{image_session_id}/{slide_num}",
                 "audio_url": audio_url,
+                "delivery_metrics": slide_audio_transcripts.get(slide_num, {}).get("metrics"),
                 "feedback": parsed_feedback,
                 "raw_feedback_text": feedback_text
             }
@@ -620,13 +1019,23 @@ def generate_feedback(conversation_history, slide_content=None, presentation_rec
             structured_feedback["slides"].append(slide_data)
         
         # Add Q&A feedback if available
-        if qa_feedback_text:
+        if qa_feedback_text and not precomputed_qa_feedback and batched_feedback and batched_feedback["qa"]:
+            structured_feedback["qa_feedback"] = batched_feedback["qa"]
+        elif qa_feedback_text:
             print(f"📝 Parsing Q&A feedback text...")
             structured_feedback["qa_feedback"] = parse_qa_feedback(qa_feedback_text)
             print(f"✅ Q&A feedback parsed: {structured_feedback['qa_feedback']}")
         else:
             print(f"⚠️ No Q&A feedback text found to parse")
         
+        add_asset_hints(structured_feedback, image_session_id)
+        structured_feedback["feedback_url"] = f"/api/feedback/{feedback_session_id}"
+        save_feedback_result(feedback_session_id, structured_feedback)
+        start_session_indexing(
+            feedback_session_id, structured_feedback, slide_audio_transcripts, conversation_history, assignment_filename
+        )
+        start_outcome_recording(feedback_session_id, structured_feedback, slide_audio_transcripts, assignment_filename)
+        
         # Clean up temporary files
         for temp_file in temp_files_to_cleanup:
             try:
@@ -641,6 +1050,121 @@ def generate_feedback(conversation_history, slide_content=None, presentation_rec
         print(f"❌ Feedback generation error: {str(e)}")
         raise Exception(f"Feedback generation error: {str(e)}")
 
+def add_asset_hints(structured_feedback, image_session_id):
+    """
+    Add the thumbnail sprite map and preload hints to the feedback response
+
+    With the sprite coordinates inline, the feedback view draws every thumbnail
+    from one image request; preload hints let it start fetching that image and
+    the first full-size slide as soon as the JSON arrives.
+    """
+    try:
+        _, sprite_map = get_thumbnail_sprite(image_session_id)
+    except Exception as e:
+        print(f"⚠️ Thumbnail sprite unavailable: {e}")
+        sprite_map = None
+    
+    preload = []
+    if sprite_map:
+        sprite_url = f"/api/slide-sprite/{image_session_id}"
+        structured_feedback["thumbnail_sprite"] = {"url": sprite_url, **sprite_map}
+        preload.append({"url": sprite_url, "as": "image"})
+    if structured_feedback["slides"]:
+        preload.append({"url": structured_feedback["slides"][0]["image_url_full"], "as": "image"})
+    structured_feedback["preload"] = preload
+
+def format_slide_audio_context(slide_number, slide_audio_data):
+    """Format a slide's transcript, duration and delivery metrics as prompt context"""
+    if not slide_audio_data or not slide_audio_data["transcript"]:
+        return ""
+    
+    transcript = slide_audio_data["transcript"]
+    start_time = slide_audio_data.get("start_time", 0) or 0
+    end_time = slide_audio_data.get("end_time") or 0
+    duration = end_time - start_time if end_time else 0
+    duration_text = f"({duration:.1f}s)" if duration > 0 else ""
+    context = f'\n\nSLIDE {slide_number} AUDIO {duration_text}: """{transcript}"""'
+    
+    metrics_text = format_delivery_metrics(slide_audio_data.get("metrics"))
+    if metrics_text:
+        context += f'\n\nSLIDE {slide_number} DELIVERY METRICS: {metrics_text}'
+    
+    return context
+
+def format_dialogue(conversation_history):
+    """Format the VC conversation as VC/STUDENT lines"""
+    dialogue_content = ""
+    for msg in conversation_history:
+        role = "VC" if msg['role'] == 'assistant' else "STUDENT"
+        dialogue_content += f"{role}: {msg['content']}\n"
+    return dialogue_content.strip()
+
+# Slide and Q&A instructions contain no per-request data so they form a cacheable prompt prefix
+SLIDE_FEEDBACK_PROMPT = """You are evaluating one slide of a startup pitch presentation. Provide feedback in this exact format:
+
+**Slide <number>:**
+- Content structuring: [✓/✗] - [One-sentence analysis of slide content and flow]
+- Delivery: [✓/✗] - [One-sentence analysis citing the measured delivery metrics]
+- Impromptu response: N/A - [This is evaluated in the Q&A section]
+- Composure: N/A - [This is evaluated in the Q&A section]
+
+Use ✓ for met criteria, ✗ for not met, and N/A when not applicable. Be specific and actionable.
+For slide feedback, focus ONLY on the slide content and delivery. Q&A aspects are evaluated separately.
+Pacing, pauses and filler counts are measured for you in DELIVERY METRICS; quote them instead of estimating from the transcript. Target range is 120-160 wpm with under 3% fillers."""
+
+QA_FEEDBACK_PROMPT = """You are evaluating the Q&A portion of a startup pitch presentation. Focus specifically on impromptu responses and composure under pressure. Provide feedback in this exact format:
+
+**Q&A Session:**
+- Impromptu response: [✓/✗] - [Analysis of how well the founder answered questions on the spot with specific evidence]
+- Composure: [✓/✗] - [Analysis of how the founder handled challenging or critical questions]
+
+Use ✓ for met criteria, ✗ for not met. Be specific about what questions were asked and how they were handled."""
+
+def build_slide_feedback_request(slide_number, slide_audio_data, slide_content):
+    """
+    Build the chat completion arguments for one slide's feedback
+    
+    Shared by generate_slide_feedback and the offline batch grader, which submits
+    the same requests through the provider's batch API.
+    
+    Returns:
+        Keyword arguments for client.chat.completions.create
+    """
+    # Stable prefix shared by every slide of the deck: static instructions, then the deck
+    system_content = SLIDE_FEEDBACK_PROMPT
+    
+    if slide_content:
+        system_content += f'\n\nFULL SLIDE DECK: """{slide_content}"""'
+    
+    # Volatile suffix: which slide to evaluate and what was said on it.
+    # Don't include Q&A dialogue for slide feedback - that's separate
+    return {
+        "model": "gpt-5",
+        "messages": [
+            {"role": "system", "content": system_content},
+            {"role": "user", "content": f"Analyze slide {slide_number} and provide feedback in the specified format, starting with **Slide {slide_number}:**" + format_slide_audio_context(slide_number, slide_audio_data)}
+        ],
+        "max_completion_tokens": 300,
+        "reasoning_effort": "minimal"
+    }
+
+def build_qa_feedback_request(conversation_history):
+    """
+    Build the chat completion arguments for the Q&A feedback
+    
+    Returns:
+        Keyword arguments for client.chat.completions.create
+    """
+    return {
+        "model": "gpt-5",
+        "messages": [
+            {"role": "system", "content": QA_FEEDBACK_PROMPT},
+            {"role": "user", "content": f'Analyze the Q&A session and provide feedback in the specified format.\n\nQ&A DIALOGUE: """{format_dialogue(conversation_history)}"""'}
+        ],
+        "max_completion_tokens": 300,
+        "reasoning_effort": "minimal"
+    }
+
 def generate_slide_feedback(slide_number, slide_audio_data, slide_content, conversation_history):
     """
     Generate feedback for a specific slide
@@ -655,44 +1179,10 @@ def generate_slide_feedback(slide_number, slide_audio_data, slide_content, conve
         Formatted feedback string for this slide
     """
     try:
-        # Create slide-specific prompt - for slides, we don't analyze Q&A
-        slide_prompt = f"""You are evaluating slide {slide_number} of a startup pitch presentation. Provide feedback in this exact format:
-
-**Slide {slide_number}:**
-- Content structuring: [✓/✗] - [Brief analysis of slide content and flow]
-- Delivery: [✓/✗] - [Analysis based on audio transcript for pacing, clarity, filler words]  
-- Impromptu response: N/A - [This is evaluated in the Q&A section]
-- Composure: N/A - [This is evaluated in the Q&A section]
-
-Use ✓ for met criteria, ✗ for not met, and N/A when not applicable. Be specific and actionable.
-For slide feedback, focus ONLY on the slide content and delivery. Q&A aspects are evaluated separately."""
-
-        # Build context
-        system_content = slide_prompt
-        
-        if slide_content:
-            system_content += f'\n\nFULL SLIDE DECK: """{slide_content}"""'
-        
-        if slide_audio_data and slide_audio_data["transcript"]:
-            transcript = slide_audio_data["transcript"]
-            start_time = slide_audio_data.get("start_time", 0) or 0
-            end_time = slide_audio_data.get("end_time") or 0
-            duration = end_time - start_time if end_time else 0
-            duration_text = f"({duration:.1f}s)" if duration > 0 else ""
-            system_content += f'\n\nSLIDE {slide_number} AUDIO {duration_text}: """{transcript}"""'
-        
-        # Don't include Q&A dialogue for slide feedback - that's separate
-        
-        feedback_messages = [
-            {"role": "system", "content": system_content},
-            {"role": "user", "content": f"Analyze slide {slide_number} and provide feedback in the specified format."}
-        ]
-        
-        response = client.chat.completions.create(
-            model="gpt-5",
-            messages=feedback_messages,
-            max_completion_tokens=400,
-            reasoning_effort="minimal"
+        response = timed_completion(
+            "slide_feedback",
+            client.chat.completions.create,
+            **build_slide_feedback_request(slide_number, slide_audio_data, slide_content)
         )
         
         return response.choices[0].message.content
@@ -717,32 +1207,10 @@ def generate_qa_feedback(conversation_history):
         Formatted Q&A feedback string
     """
     try:
-        qa_prompt = """You are evaluating the Q&A portion of a startup pitch presentation. Focus specifically on impromptu responses and composure under pressure. Provide feedback in this exact format:
-
-**Q&A Session:**
-- Impromptu response: [✓/✗] - [Analysis of how well the founder answered questions on the spot with specific evidence]
-- Composure: [✓/✗] - [Analysis of how the founder handled challenging or critical questions]
-
-Use ✓ for met criteria, ✗ for not met. Be specific about what questions were asked and how they were handled."""
-
-        # Format conversation history
-        dialogue_content = ""
-        for msg in conversation_history:
-            role = "VC" if msg['role'] == 'assistant' else "STUDENT"
-            dialogue_content += f"{role}: {msg['content']}\n"
-        
-        system_content = qa_prompt + f'\n\nQ&A DIALOGUE: """{dialogue_content.strip()}"""'
-        
-        feedback_messages = [
-            {"role": "system", "content": system_content},
-            {"role": "user", "content": "Analyze the Q&A session and provide feedback in the specified format."}
-        ]
-        
-        response = client.chat.completions.create(
-            model="gpt-5",
-            messages=feedback_messages,
-            max_completion_tokens=300,
-            reasoning_effort="minimal"
+        response = timed_completion(
+            "qa_feedback",
+            client.chat.completions.create,
+            **build_qa_feedback_request(conversation_history)
         )
         
         return response.choices[0].message.content
@@ -751,6 +1219,151 @@ Use ✓ for met criteria, ✗ for not met. Be specific about what questions were
         print(f"❌ Failed to generate Q&A feedback: {e}")
         return "**Q&A Session:** Error generating Q&A feedback."
 
+BATCHED_FEEDBACK_PROMPT = """You are evaluating a startup pitch presentation slide by slide, plus the Q&A that followed it.
+
+For every slide listed below, judge:
+- content_structuring: is the slide's content clear and does it advance a logical argument?
+- delivery: pacing, clarity and filler words, citing the measured DELIVERY METRICS instead of estimating from the transcript (target 120-160 wpm, under 3% fillers)
+
+If a Q&A DIALOGUE is given, also judge:
+- impromptu_response: were answers concise and backed by specific evidence?
+- composure: were challenging or critical questions handled professionally?
+Otherwise set "qa" to null.
+
+Use status "met" or "not_met" and keep each comment to one specific, actionable sentence. Return one entry per listed slide."""
+
+FEEDBACK_CRITERION_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "status": {"type": "string", "enum": ["met", "not_met"]},
+        "comment": {"type": "string"}
+    },
+    "required": ["status", "comment"],
+    "additionalProperties": False
+}
+
+BATCHED_FEEDBACK_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "slides": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "slide_number": {"type": "integer"},
+                    "content_structuring": FEEDBACK_CRITERION_SCHEMA,
+                    "delivery": FEEDBACK_CRITERION_SCHEMA
+                },
+                "required": ["slide_number", "content_structuring", "delivery"],
+                "additionalProperties": False
+            }
+        },
+        "qa": {
+            "anyOf": [
+                {
+                    "type": "object",
+                    "properties": {
+                        "impromptu_response": FEEDBACK_CRITERION_SCHEMA,
+                        "composure": FEEDBACK_CRITERION_SCHEMA
+                    },
+                    "required": ["impromptu_response", "composure"],
+                    "additionalProperties": False
+                },
+                {"type": "null"}
+            ]
+        }
+    },
+    "required": ["slides", "qa"],
+    "additionalProperties": False
+}
+
+def generate_batched_feedback(slides_to_review, slide_content, conversation_history=None):
+    """
+    Generate feedback for every slide and the Q&A section with one structured-output request
+    
+    Args:
+        slides_to_review: List of (slide_number, slide_audio_data) tuples
+        slide_content: Full slide deck content
+        conversation_history: Q&A conversation, or None to skip the Q&A section
+    
+    Returns:
+        Dictionary with "slides" (slide number -> parsed feedback, same shape as parse_slide_feedback)
+        and "qa" (same shape as parse_qa_feedback, or None)
+    """
+    # Stable prefix: static instructions, then the deck
+    system_content = BATCHED_FEEDBACK_PROMPT
+    
+    if slide_content:
+        system_content += f'\n\nFULL SLIDE DECK: """{slide_content}"""'
+    
+    # Volatile suffix: this pitch's transcripts and dialogue
+    slide_numbers = [slide_num for slide_num, _ in slides_to_review]
+    user_content = f"Evaluate slides {slide_numbers}" + (" and the Q&A session." if conversation_history else ".")
+    for slide_num, slide_data in slides_to_review:
+        user_content += format_slide_audio_context(slide_num, slide_data) or f"\n\nSLIDE {slide_num} AUDIO: not available"
+    
+    if conversation_history:
+        user_content += f'\n\nQ&A DIALOGUE: """{format_dialogue(conversation_history)}"""'
+    
+    response = timed_completion(
+        "batched_feedback",
+        client.chat.completions.create,
+        model="gpt-5",
+        messages=[
+            {"role": "system", "content": system_content},
+            {"role": "user", "content": user_content}
+        ],
+        response_format={
+            "type": "json_schema",
+            "json_schema": {"name": "pitch_feedback", "strict": True, "schema": BATCHED_FEEDBACK_SCHEMA}
+        },
+        max_completion_tokens=150 * len(slides_to_review) + 300,
+        reasoning_effort="minimal"
+    )
+    
+    result = json.loads(response.choices[0].message.content)
+    not_applicable = {"status": "not_applicable", "comment": "This is evaluated in the Q&A section"}
+    
+    slides = {}
+    for slide in result["slides"]:
+        if slide["slide_number"] in slide_numbers:
+            slides[slide["slide_number"]] = {
+                "content_structuring": slide["content_structuring"],
+                "delivery": slide["delivery"],
+                "impromptu_response": dict(not_applicable),
+                "composure": dict(not_applicable)
+            }
+    
+    missing = [num for num in slide_numbers if num not in slides]
+    if missing:
+        print(f"⚠️ Batched feedback missing slides {missing}; they will be generated individually")
+    
+    qa = result["qa"] if conversation_history else None
+    return {"slides": slides, "qa": qa}
+
+def format_feedback_criterion(label, criterion):
+    """Render one parsed criterion back into the '- Label: ✓ - comment' line format"""
+    symbol = {"met": "✓", "not_met": "✗", "not_applicable": "N/A"}.get(criterion["status"], "?")
+    return f"- {label}: {symbol} - {criterion['comment']}"
+
+def format_slide_feedback_text(slide_number, parsed_feedback):
+    """Render structured slide feedback as the text format produced by generate_slide_feedback"""
+    return "\n".join([
+        f"**Slide {slide_number}:**",
+        format_feedback_criterion("Content structuring", parsed_feedback["content_structuring"]),
+        format_feedback_criterion("Delivery", parsed_feedback["delivery"]),
+        format_feedback_criterion("Impromptu response", parsed_feedback["impromptu_response"]),
+        format_feedback_criterion("Composure", parsed_feedback["composure"])
+    ])
+
+def format_qa_feedback_text(parsed_feedback):
+    """Render structured Q&A feedback as the text format produced by generate_qa_feedback"""
+    return "\n".join([
+        "**Q&A Session:**",
+        format_feedback_criterion("Impromptu response", parsed_feedback["impromptu_response"]),
+        format_feedback_criterion("Composure", parsed_feedback["composure"])
+    ])
+
 def parse_slide_feedback(feedback_text):
     """
     Parse slide feedback text into structured data
@@ -0,0 +1,46 @@
+import importlib
+import threading
+
+# Modules imported through optional_import, including failed imports (stored as None)
+_optional_modules = {}
+_optional_modules_lock = threading.Lock()
+
+def optional_import(module_name, attribute=None):
+    """
+    Import an optional dependency on first use and cache the result
+
+    Args:
+        module_name: Module to import, e.g. "pydub"
+        attribute: Attribute to return from the module, e.g. "AudioSegment"
+
+    Returns:
+        The module (or attribute), or None if the import failed
+    """
+    with _optional_modules_lock:
+        if module_name not in _optional_modules:
+            try:
+                _optional_modules[module_name] = importlib.import_module(module_name)
+            except ImportError as e:
+                print(f"⚠️ Optional dependency {module_name} not available: {e}")
+                _optional_modules[module_name] = None
+        module = _optional_modules[module_name]
+
+    if module is None or attribute is None:
+        return module
+    return getattr(module, attribute)
+
+class LazyModule:
+    """Module stand-in that performs the real import on first attribute access"""
+
+    def __init__(self, module_name):
+        self._module_name = module_name
+
+    def __getattr__(self, name):
+        module = optional_import(self._module_name)
+        if module is None:
+            raise ImportError(f"{self._module_name} is not installed")
+        return getattr(module, name)
+
+def lazy_module(module_name):
+    """Return a stand-in for a heavy module that is imported when first used"""
+    return LazyModule(module_name)
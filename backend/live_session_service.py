@@ -0,0 +1,309 @@
+import os
+import json
+import time
+import uuid
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import config
+from feedback_service import (
+    extract_audio_segment, join_wav_files, transcribe_recording, generate_slide_feedback
+)
+from delivery_metrics import compute_delivery_metrics
+from audio_streaming import RECORDING_EXTENSIONS
+from pdf_utils import get_assignment_text
+
+# Live session storage configuration
+LIVE_SESSIONS_DIR = "live_sessions"
+LIVE_FEEDBACK_WORKERS = int(os.getenv('LIVE_FEEDBACK_WORKERS', '4'))
+LIVE_RESULT_TIMEOUT = float(os.getenv('LIVE_RESULT_TIMEOUT', '120'))
+
+# Background pool shared by all live sessions in this worker
+_executor = ThreadPoolExecutor(max_workers=LIVE_FEEDBACK_WORKERS, thread_name_prefix="live-slide")
+
+# In-memory state for live sessions handled by this process
+_live_sessions = {}
+_live_sessions_lock = threading.Lock()
+
+class LiveSessionError(Exception):
+    """Live session request that cannot be applied; carries the HTTP status to return"""
+    def __init__(self, message, status_code=400):
+        super().__init__(message)
+        self.status_code = status_code
+
+def get_live_session_dir(live_session_id):
+    """Get the directory for a live session, rejecting ids that are not UUIDs"""
+    try:
+        live_session_id = str(uuid.UUID(live_session_id))
+    except (ValueError, TypeError, AttributeError):
+        raise LiveSessionError("Invalid live session id", 400)
+    backend_dir = os.path.dirname(os.path.abspath(__file__))
+    return os.path.join(backend_dir, LIVE_SESSIONS_DIR, live_session_id)
+
+def get_live_session(live_session_id):
+    """Get the in-memory state for a live session, raising 404 if unknown"""
+    with _live_sessions_lock:
+        session = _live_sessions.get(live_session_id)
+    if session is None:
+        raise LiveSessionError("Live session not found", 404)
+    return session
+
+def create_live_session(selected_assignment=None, pdf_session_id=None, extension=".webm"):
+    """
+    Start a live session that receives audio while the student is pitching
+
+    Args:
+        selected_assignment: Assignment PDF filename, used as slide context for feedback
+        pdf_session_id: Session ID from the PDF upload
+        extension: Container extension of the recorded audio stream
+
+    Returns:
+        The new live session ID
+    """
+    extension = (extension or ".webm").lower()
+    if extension not in RECORDING_EXTENSIONS:
+        raise LiveSessionError(f"Unsupported audio extension; use one of {', '.join(sorted(RECORDING_EXTENSIONS))}", 400)
+
+    live_session_id = str(uuid.uuid4())
+    session_dir = get_live_session_dir(live_session_id)
+    os.makedirs(session_dir, exist_ok=True)
+
+    session = {
+        "id": live_session_id,
+        "dir": session_dir,
+        "recording_path": os.path.join(session_dir, f"recording{extension}"),
+        "created_at": time.time(),
+        "selected_assignment": selected_assignment,
+        "pdf_session_id": pdf_session_id,
+        "slide_content": get_assignment_text(selected_assignment) if selected_assignment else None,
+        "slide_timestamps": [],
+        # (slide number, future) per slide visit, in submission order; a revisited slide appears more than once
+        "futures": [],
+        "finished": False,
+        "lock": threading.Lock()
+    }
+    open(session["recording_path"], 'wb').close()
+
+    with open(os.path.join(session_dir, "metadata.json"), 'w') as f:
+        json.dump({"created_at": session["created_at"], "pdf_session_id": pdf_session_id}, f)
+
+    with _live_sessions_lock:
+        _live_sessions[live_session_id] = session
+
+    print(f"🎬 Live session {live_session_id} started")
+    return live_session_id
+
+def append_live_audio(live_session_id, chunk_stream, slide_number, slide_started_at):
+    """
+    Append an audio chunk to the live recording and finalize the previous slide when the slide changes
+
+    The chunks of a live session must concatenate into one recording (e.g. the
+    successive blobs of a MediaRecorder started with a timeslice).
+
+    Args:
+        live_session_id: Live session identifier
+        chunk_stream: Readable binary stream with the chunk bytes
+        slide_number: Slide on screen while this chunk was recorded
+        slide_started_at: Seconds since recording start at which that slide was first shown
+
+    Returns:
+        Dictionary with the slides finalized so far
+    """
+    session = get_live_session(live_session_id)
+
+    with session["lock"]:
+        if session["finished"]:
+            raise LiveSessionError("Live session already finished", 409)
+
+        with open(session["recording_path"], 'ab') as f:
+            shutil.copyfileobj(chunk_stream, f, 64 * 1024)
+
+        timestamps = session["slide_timestamps"]
+        if not timestamps or timestamps[-1]["slideNumber"] != slide_number:
+            # The student moved past the previous slide; process it in the background
+            if timestamps:
+                previous = timestamps[-1]
+                submit_slide(session, previous["slideNumber"], previous["timestamp"], slide_started_at)
+            timestamps.append({"slideNumber": slide_number, "timestamp": slide_started_at})
+            print(f"🎬 Live session {live_session_id}: slide {slide_number} started at {slide_started_at:.1f}s")
+
+        return {"finalized_slides": sorted({slide_number for slide_number, _ in session["futures"]})}
+
+def submit_slide(session, slide_number, start_time, end_time):
+    """Queue transcription and feedback for one slide visit"""
+    visit_index = len(session["futures"])
+    session["futures"].append((slide_number, _executor.submit(
+        process_live_slide, session, visit_index, slide_number, start_time, end_time
+    )))
+
+def process_live_slide(session, visit_index, slide_number, start_time, end_time):
+    """
+    Transcribe one finished slide visit and precompute its feedback
+
+    The visit's time range is decoded straight from the recording, which is still being
+    appended to; everything up to end_time was received before the slide changed.
+
+    Returns:
+        Slide data dictionary in the shape generate_feedback accepts as precomputed_slides
+    """
+    try:
+        started = time.time()
+        segment = extract_audio_segment(session["recording_path"], slide_number, start_time, end_time)
+        if not segment:
+            raise Exception("No audio for this slide")
+
+        # Keep the slide audio in the live session directory so it survives until feedback is requested
+        audio_path = os.path.join(session["dir"], f"visit_{visit_index}_slide_{slide_number}.wav")
+        shutil.move(segment["audio_path"], audio_path)
+
+        transcript = transcribe_recording(audio_path)
+        slide_data = {
+            "transcript": transcript,
+            "start_time": segment["start_time"],
+            "end_time": segment["end_time"],
+            "audio_path": audio_path,
+            "metrics": compute_delivery_metrics(audio_path, transcript)
+        }
+        # Slide feedback does not use the Q&A dialogue, so it can be generated before the pitch ends
+        feedback_text = generate_slide_feedback(slide_number, slide_data, session["slide_content"], [])
+        if "Error generating feedback" not in feedback_text:
+            slide_data["feedback_text"] = feedback_text
+
+        print(f"⚡ Live slide {slide_number} precomputed in {time.time() - started:.1f}s")
+        return slide_data
+
+    except Exception as e:
+        print(f"❌ Live processing failed for slide {slide_number}: {e}")
+        raise
+
+def merge_slide_visits(session, slide_number, visits):
+    """
+    Combine the results of a slide the student showed more than once
+
+    The visits' audio is joined into one WAV and the metrics are measured on it; the
+    per-visit feedback is dropped so generate_feedback reviews the slide as a whole.
+    """
+    audio_path = join_wav_files([visit["audio_path"] for visit in visits],
+                                os.path.join(session["dir"], f"slide_{slide_number}.wav"))
+
+    transcript = " ".join(visit["transcript"] for visit in visits if visit.get("transcript"))
+    return {
+        "transcript": transcript,
+        "start_time": visits[0]["start_time"],
+        "end_time": visits[-1]["end_time"],
+        "audio_path": audio_path,
+        "metrics": compute_delivery_metrics(audio_path, transcript)
+    }
+
+def finish_live_session(live_session_id, end_time=None):
+    """
+    Finalize the last slide when the pitch ends
+
+    Args:
+        live_session_id: Live session identifier
+        end_time: Seconds since recording start at which the pitch ended, or None for the end of the audio
+    """
+    session = get_live_session(live_session_id)
+
+    with session["lock"]:
+        if session["finished"]:
+            return
+        session["finished"] = True
+        timestamps = session["slide_timestamps"]
+        if timestamps:
+            last = timestamps[-1]
+            submit_slide(session, last["slideNumber"], last["timestamp"], end_time)
+
+    print(f"🏁 Live session {live_session_id} finished with {len(session['slide_timestamps'])} slides")
+
+def get_live_session_status(live_session_id):
+    """
+    Report which slides have been precomputed
+
+    Returns:
+        Dictionary with "slide_timestamps", "finished" and per-slide "slides" status (pending/done/failed)
+    """
+    session = get_live_session(live_session_id)
+    slides = {}
+    for slide_number, future in session["futures"]:
+        if not future.done():
+            status = "pending"
+        else:
+            status = "failed" if future.exception() else "done"
+        # A revisited slide is only done once every visit is
+        if slides.get(slide_number) not in ("pending", "failed"):
+            slides[slide_number] = status
+
+    return {
+        "live_session_id": live_session_id,
+        "slide_timestamps": list(session["slide_timestamps"]),
+        "finished": session["finished"],
+        "slides": slides
+    }
+
+def collect_live_results(live_session_id, timeout=None):
+    """
+    Wait for all background slide jobs and return what generate_feedback needs
+
+    Returns:
+        Tuple of (recording_path, slide_timestamps, precomputed_slides, missing_slides); missing_slides
+        lists the slides with a visit that failed or did not finish in time, which generate_feedback
+        cuts from the recording and processes itself
+    """
+    finish_live_session(live_session_id)
+    session = get_live_session(live_session_id)
+    timeout = LIVE_RESULT_TIMEOUT if timeout is None else timeout
+    deadline = time.time() + timeout
+
+    visits_by_slide = {}
+    missing_slides = set()
+    for slide_number, future in session["futures"]:
+        try:
+            visits_by_slide.setdefault(slide_number, []).append(future.result(timeout=max(0, deadline - time.time())))
+        except Exception as e:
+            print(f"⚠️ Live result for slide {slide_number} unavailable, using the full recording: {e}")
+            missing_slides.add(slide_number)
+
+    precomputed_slides = {}
+    for slide_number, visits in visits_by_slide.items():
+        # A slide is only precomputed if every visit to it is
+        if slide_number in missing_slides:
+            continue
+        try:
+            precomputed_slides[slide_number] = visits[0] if len(visits) == 1 else merge_slide_visits(session, slide_number, visits)
+        except Exception as e:
+            print(f"⚠️ Could not combine the visits to slide {slide_number}, using the full recording: {e}")
+            missing_slides.add(slide_number)
+
+    return session["recording_path"], list(session["slide_timestamps"]), precomputed_slides, sorted(missing_slides)
+
+def cleanup_live_session(live_session_id):
+    """Remove a live session's state and files"""
+    try:
+        with _live_sessions_lock:
+            _live_sessions.pop(live_session_id, None)
+        session_dir = get_live_session_dir(live_session_id)
+        if os.path.exists(session_dir):
+            shutil.rmtree(session_dir)
+            print(f"🗑️ Cleaned up live session {live_session_id}")
+    except Exception as e:
+        print(f"⚠️ Error cleaning up live session {live_session_id}: {e}")
+
+def cleanup_old_live_sessions(max_age_hours=24):
+    """Remove old live session directories"""
+    try:
+        cutoff_time = time.time() - (max_age_hours * 3600)
+        backend_dir = os.path.dirname(os.path.abspath(__file__))
+        live_sessions_path = os.path.join(backend_dir, LIVE_SESSIONS_DIR)
+
+        if not os.path.exists(live_sessions_path):
+            return
+
+        for live_session_id in os.listdir(live_sessions_path):
+            session_path = os.path.join(live_sessions_path, live_session_id)
+            if os.path.isdir(session_path) and os.path.getctime(session_path) < cutoff_time:
+                cleanup_live_session(live_session_id)
+
+    except Exception as e:
+        print(f"⚠️ Error during live session cleanup: {e}")
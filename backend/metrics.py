@@ -0,0 +1,220 @@
+import time
+import bisect
+import threading
+from contextlib import contextmanager
+
+from tracing import span, current_span
+
+# Latency buckets in seconds, from fast file operations up to long Whisper/LLM calls
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+# All metrics in registration order, rendered by render_metrics
+_registry = []
+
+def escape_label_value(value):
+    """Escape a label value for the Prometheus text format"""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def format_labels(label_names, label_values, extra=None):
+    """Format a label set as {name="value",...}, or an empty string if there are no labels"""
+    pairs = [f'{name}="{escape_label_value(value)}"' for name, value in zip(label_names, label_values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+class Metric:
+    """Base class for a labelled metric kept in process memory"""
+    type_name = None
+
+    def __init__(self, name, help_text, label_names=()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self._values = {}
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def label_key(self, labels):
+        """Order label values by the metric's label names"""
+        return tuple(str(labels.get(name, "")) for name in self.label_names)
+
+    def render(self):
+        """Render this metric's HELP, TYPE and sample lines"""
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.type_name}"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.extend(self.render_samples(key, value))
+        return lines
+
+    def render_samples(self, key, value):
+        return [f"{self.name}{format_labels(self.label_names, key)} {value}"]
+
+class Counter(Metric):
+    """Monotonically increasing count"""
+    type_name = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self.label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+class Gauge(Metric):
+    """Value that can go up and down"""
+    type_name = "gauge"
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[self.label_key(labels)] = value
+
+    def inc(self, amount=1, **labels):
+        key = self.label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+class Histogram(Metric):
+    """Bucketed distribution, used for latency percentiles"""
+    type_name = "histogram"
+
+    def __init__(self, name, help_text, label_names=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text, label_names)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self.label_key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = {"counts": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            index = bisect.bisect_left(self.buckets, value)
+            if index < len(self.buckets):
+                state["counts"][index] += 1
+            state["sum"] += value
+            state["count"] += 1
+
+    def render_samples(self, key, state):
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets, state["counts"]):
+            cumulative += count
+            bucket_labels = format_labels(self.label_names, key, 'le="%s"' % bound)
+            lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+        bucket_labels = format_labels(self.label_names, key, 'le="+Inf"')
+        lines.append(f"{self.name}_bucket{bucket_labels} {state['count']}")
+        lines.append(f"{self.name}_sum{format_labels(self.label_names, key)} {state['sum']}")
+        lines.append(f"{self.name}_count{format_labels(self.label_names, key)} {state['count']}")
+        return lines
+
+# HTTP requests
+HTTP_REQUESTS = Counter("http_requests_total", "HTTP requests by endpoint, method and status", ("endpoint", "method", "status"))
+HTTP_REQUEST_SECONDS = Histogram("http_request_duration_seconds", "HTTP request latency by endpoint", ("endpoint",))
+HTTP_IN_FLIGHT = Gauge("http_requests_in_flight", "HTTP requests currently being handled", ("endpoint",))
+
+# Pipeline stages (decode, split, transcribe, slide_llm, render, ...)
+STAGE_SECONDS = Histogram("stage_duration_seconds", "Time spent in each processing stage", ("stage",))
+STAGE_ERRORS = Counter("stage_errors_total", "Processing stages that raised an exception", ("stage",))
+
+# OpenAI API usage
+OPENAI_REQUESTS = Counter("openai_requests_total", "OpenAI chat completion requests by call site", ("call",))
+OPENAI_TOKENS = Counter("openai_tokens_total", "OpenAI tokens by call site and kind (prompt, cached, completion)", ("call", "kind"))
+
+# Bytes moved through the pipeline (uploads, audio segments, slide images)
+BYTES_PROCESSED = Counter("bytes_processed_total", "Bytes written or read by kind", ("kind",))
+
+# Caches: prompt cache, deck insights, slide images
+CACHE_REQUESTS = Counter("cache_requests_total", "Cache lookups by cache and result (hit, miss)", ("cache", "result"))
+CACHE_HIT_RATIO = Gauge("cache_hit_ratio", "Share of lookups served from cache; for the prompt cache, share of prompt tokens", ("cache",))
+_cache_totals = {}
+_cache_totals_lock = threading.Lock()
+
+# Admission control for expensive endpoints
+ADMISSION_ACTIVE = Gauge("admission_active_requests", "Requests holding an admission slot by endpoint", ("endpoint",))
+ADMISSION_QUEUED = Gauge("admission_queue_depth", "Requests waiting for an admission slot by endpoint", ("endpoint",))
+ADMISSION_LIMIT = Gauge("admission_limit", "Configured admission limits by endpoint and kind (concurrency, queue, per_user, max_body_bytes)", ("endpoint", "kind"))
+ADMISSION_REJECTIONS = Counter("admission_rejections_total", "Requests turned away by endpoint and reason (queue_full, timeout, per_user, body_too_large)", ("endpoint", "reason"))
+ADMISSION_WAIT_SECONDS = Histogram("admission_wait_seconds", "Time spent waiting for an admission slot by endpoint", ("endpoint",))
+
+@contextmanager
+def stage_timer(stage, **attributes):
+    """
+    Time a processing stage, record it in the stage latency histogram and trace it as a span
+
+    Args:
+        stage: Stage name, e.g. "feedback.decode" or "upload.render"
+        attributes: Span attributes, e.g. the slide number
+
+    Yields:
+        The stage's span, for adding attributes
+    """
+    started = time.perf_counter()
+    with span(stage, **attributes) as stage_span:
+        try:
+            yield stage_span
+        except Exception:
+            STAGE_ERRORS.inc(stage=stage)
+            raise
+        finally:
+            STAGE_SECONDS.observe(time.perf_counter() - started, stage=stage)
+
+def record_bytes(kind, amount):
+    """Add to the byte counter for one kind of payload"""
+    if amount:
+        BYTES_PROCESSED.inc(amount, kind=kind)
+        current_span().add_to_attribute(f"bytes.{kind}", amount)
+
+def record_cache_lookup(cache, hit, weight=1):
+    """
+    Count a cache lookup and update the cache's hit ratio
+
+    Args:
+        cache: Cache name
+        hit: Whether the lookup was served from cache
+        weight: Number of units looked up (e.g. prompt tokens), 1 for a single lookup
+    """
+    if weight <= 0:
+        return
+    CACHE_REQUESTS.inc(weight, cache=cache, result="hit" if hit else "miss")
+    with _cache_totals_lock:
+        hits, total = _cache_totals.get(cache, (0, 0))
+        hits, total = hits + (weight if hit else 0), total + weight
+        _cache_totals[cache] = (hits, total)
+    CACHE_HIT_RATIO.set(round(hits / total, 4), cache=cache)
+
+def record_openai_call(call, prompt_tokens, cached_tokens, completion_tokens):
+    """Record one chat completion's token counts (its latency is the llm.<call> stage)"""
+    OPENAI_REQUESTS.inc(call=call)
+    OPENAI_TOKENS.inc(prompt_tokens, call=call, kind="prompt")
+    OPENAI_TOKENS.inc(cached_tokens, call=call, kind="cached")
+    OPENAI_TOKENS.inc(completion_tokens, call=call, kind="completion")
+    # Prompt cache hits are measured in tokens: cached tokens out of all prompt tokens
+    record_cache_lookup("openai_prompt", True, cached_tokens)
+    record_cache_lookup("openai_prompt", False, prompt_tokens - cached_tokens)
+
+def start_request(endpoint):
+    """Mark a request as in flight; returns the start time to pass to finish_request"""
+    HTTP_IN_FLIGHT.inc(endpoint=endpoint)
+    return time.perf_counter()
+
+def finish_request(endpoint, method, status, started):
+    """Record a finished request's status and latency"""
+    HTTP_REQUESTS.inc(endpoint=endpoint, method=method, status=status)
+    HTTP_REQUEST_SECONDS.observe(time.perf_counter() - started, endpoint=endpoint)
+
+def end_request(endpoint):
+    """Remove a request from the in-flight gauge (called on teardown, including after errors)"""
+    HTTP_IN_FLIGHT.dec(endpoint=endpoint)
+
+def render_metrics():
+    """
+    Render all metrics in the Prometheus text exposition format
+
+    Returns:
+        Text body for /api/metrics
+    """
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,31 @@
+import os
+import threading
+
+import config
+from tracing import traced_http_client
+
+api_key = os.getenv('OPENAI_API_KEY')
+if not api_key:
+    raise ValueError("OPENAI_API_KEY not found in environment variables")
+
+# One client for the whole process; the SDK is imported when the first request needs it
+_client = None
+_client_lock = threading.Lock()
+
+def get_openai_client():
+    """Create the shared OpenAI client on first use"""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                from openai import OpenAI
+                _client = OpenAI(api_key=api_key, http_client=traced_http_client())
+    return _client
+
+class LazyOpenAIClient:
+    """Stand-in for the shared client that forwards attribute access to it, creating it if needed"""
+
+    def __getattr__(self, name):
+        return getattr(get_openai_client(), name)
+
+client = LazyOpenAIClient()
@@ -1,27 +1,185 @@
 import os
 import tempfile
 import io
+import json
+import threading
 import base64
-import subprocess
-
-# Check if PDF processing is available
-try:
-    from pdf2image import convert_from_path
-    from PIL import Image
-    # Test if poppler is available
-    result = subprocess.run(['which', 'pdftoppm'], capture_output=True)
-    if result.returncode == 0:
-        PDF_PROCESSING_AVAILABLE = True
-        print("✅ PDF processing available")
+import shutil
+import functools
+from concurrent.futures import ProcessPoolExecutor
+
+import config
+from metrics import stage_timer, record_bytes, record_cache_lookup
+from lazy_imports import optional_import
+from disk_cache import BoundedDiskCache
+from artifact_storage import publish_file, artifact_exists, ensure_local_file, list_artifacts, delete_artifacts
+
+# Slide renderer: 'auto' prefers in-process PyMuPDF and falls back to pdf2image (poppler subprocesses)
+PDF_RENDERER = os.getenv('PDF_RENDERER', 'auto').lower()
+
+# Worker processes for rendering a deck; PyMuPDF holds the GIL, so parallel rendering needs processes
+PDF_RENDER_WORKERS = int(os.getenv('PDF_RENDER_WORKERS', '1'))
+
+SLIDE_DPI = 150
+THUMBNAIL_SIZE = (300, 200)
+
+# Resized slide variants: requested widths snap up to one of these so the cache stays small
+VARIANT_WIDTHS = (160, 320, 480, 640, 960, 1280, 1600)
+VARIANT_FORMATS = {
+    'png': ('PNG', 'image/png'),
+    'webp': ('WEBP', 'image/webp'),
+    'jpeg': ('JPEG', 'image/jpeg'),
+}
+VARIANT_QUALITY = int(os.getenv('SLIDE_VARIANT_QUALITY', '80'))
+SLIDE_VARIANTS_DIR = "slide_variants"
+
+# All of a session's thumbnails in one image, so the feedback view needs one request instead of one per slide
+SPRITE_COLUMNS = 4
+SPRITE_IMAGE_FILE = "thumbnails_sprite.png"
+SPRITE_MAP_FILE = "thumbnails_sprite.json"
+SLIDE_VARIANT_CACHE_MAX_BYTES = int(os.getenv('SLIDE_VARIANT_CACHE_MAX_MB', '500')) * 1024 * 1024
+_variant_cache = BoundedDiskCache(SLIDE_VARIANTS_DIR, SLIDE_VARIANT_CACHE_MAX_BYTES)
+
+def get_image_module():
+    """PIL.Image, imported on first use"""
+    return optional_import('PIL.Image')
+
+class Pdf2ImageRenderer:
+    """Renders with pdf2image: poppler's pdftoppm in a subprocess, decoded into PIL and downscaled in Python"""
+    name = "pdf2image"
+
+    @staticmethod
+    def available():
+        if optional_import('pdf2image') is None or get_image_module() is None:
+            print("⚠️ pdf2image renderer not available: pdf2image or Pillow not installed")
+            return False
+        if shutil.which('pdftoppm') is None:
+            print("⚠️ pdf2image renderer not available: poppler-utils not found")
+            print("💡 Install with: brew install poppler")
+            return False
+        return True
+
+    def page_count(self, pdf_path):
+        info = optional_import('pdf2image').pdfinfo_from_path(pdf_path)
+        return int(info["Pages"])
+
+    def render_pages(self, pdf_path, first_page, last_page, dpi=SLIDE_DPI, thumbnail_size=THUMBNAIL_SIZE):
+        """
+        Render a range of pages to PNG
+
+        Returns:
+            List of (slide_number, full_size_png_bytes, thumbnail_png_bytes)
+        """
+        with stage_timer("upload.render", renderer=self.name):
+            images = optional_import('pdf2image').convert_from_path(
+                pdf_path, first_page=first_page, last_page=last_page, dpi=dpi
+            )
+
+        rendered = []
+        for slide_number, image in enumerate(images, start=first_page):
+            with stage_timer("upload.thumbnail", renderer=self.name):
+                thumbnail = image.copy()
+                thumbnail.thumbnail(thumbnail_size, get_image_module().Resampling.LANCZOS)
+            with stage_timer("upload.png_encode", renderer=self.name):
+                rendered.append((slide_number, image_to_bytes(image), image_to_bytes(thumbnail)))
+        return rendered
+
+class PyMuPDFRenderer:
+    """Renders in-process with PyMuPDF: one open document per call, thumbnails rasterized at their own size"""
+    name = "pymupdf"
+
+    @staticmethod
+    def available():
+        if optional_import('pymupdf') is None:
+            print("⚠️ PyMuPDF renderer not available: pymupdf not installed")
+            return False
+        return True
+
+    def page_count(self, pdf_path):
+        with optional_import('pymupdf').open(pdf_path) as document:
+            return document.page_count
+
+    def render_pages(self, pdf_path, first_page, last_page, dpi=SLIDE_DPI, thumbnail_size=THUMBNAIL_SIZE):
+        """
+        Render a range of pages to PNG
+
+        Returns:
+            List of (slide_number, full_size_png_bytes, thumbnail_png_bytes)
+        """
+        pymupdf = optional_import('pymupdf')
+        rendered = []
+        with pymupdf.open(pdf_path) as document:
+            for slide_number in range(first_page, last_page + 1):
+                page = document[slide_number - 1]
+                with stage_timer("upload.render", renderer=self.name):
+                    full_pixmap = page.get_pixmap(dpi=dpi, alpha=False)
+                # Scale the page straight to the thumbnail box instead of downscaling the full render
+                with stage_timer("upload.thumbnail", renderer=self.name):
+                    zoom = min(thumbnail_size[0] / page.rect.width, thumbnail_size[1] / page.rect.height)
+                    thumbnail_pixmap = page.get_pixmap(matrix=pymupdf.Matrix(zoom, zoom), alpha=False)
+                with stage_timer("upload.png_encode", renderer=self.name):
+                    rendered.append((slide_number, full_pixmap.tobytes("png"), thumbnail_pixmap.tobytes("png")))
+        return rendered
+
+PDF_RENDERERS = {
+    'pymupdf': PyMuPDFRenderer,
+    'pdf2image': Pdf2ImageRenderer,
+}
+
+def create_pdf_renderer(name):
+    """Create a renderer by name ('pymupdf', 'pdf2image' or 'auto'), or None if it is not available"""
+    names = ['pymupdf', 'pdf2image'] if name == 'auto' else [name]
+    for renderer_name in names:
+        renderer_class = PDF_RENDERERS.get(renderer_name)
+        if renderer_class is None:
+            print(f"⚠️ Unknown PDF_RENDERER '{renderer_name}'")
+        elif renderer_class.available():
+            return renderer_class()
+    return None
+
+@functools.lru_cache(maxsize=None)
+def get_pdf_renderer():
+    """
+    The configured slide renderer, chosen once on first use
+
+    Runs on first use rather than at import time; app.py warms it in the background on startup.
+    """
+    renderer = create_pdf_renderer(PDF_RENDERER)
+    if renderer is None:
+        print("⚠️ PDF processing not available: no slide renderer installed")
     else:
-        PDF_PROCESSING_AVAILABLE = False
-        print("⚠️ PDF processing not available: poppler-utils not found")
-        print("💡 Install with: brew install poppler")
-except ImportError as e:
-    PDF_PROCESSING_AVAILABLE = False
-    print(f"⚠️ PDF processing not available: {e}")
-    convert_from_path = None
-    Image = None
+        print(f"✅ PDF processing available ({renderer.name})")
+    return renderer
+
+def pdf_processing_available():
+    """Whether slide images can be rendered"""
+    return get_pdf_renderer() is not None
+
+def render_page_range(renderer_name, pdf_path, first_page, last_page, dpi):
+    """Process pool entry point: render a range of pages with a fresh renderer"""
+    return PDF_RENDERERS[renderer_name]().render_pages(pdf_path, first_page, last_page, dpi)
+
+def render_all_pages(renderer, pdf_path, dpi=SLIDE_DPI, workers=PDF_RENDER_WORKERS):
+    """
+    Render every page of a PDF, split into contiguous page ranges across worker processes
+
+    Returns:
+        List of (slide_number, full_size_png_bytes, thumbnail_png_bytes) in page order
+    """
+    page_count = renderer.page_count(pdf_path)
+    if workers <= 1 or page_count < 2:
+        return renderer.render_pages(pdf_path, 1, page_count, dpi)
+
+    # Each worker opens the document once and renders a run of pages
+    workers = min(workers, page_count)
+    bounds = [round(i * page_count / workers) for i in range(workers + 1)]
+    with stage_timer("upload.render_parallel", renderer=renderer.name, workers=workers), \
+            ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(render_page_range, renderer.name, pdf_path, bounds[i] + 1, bounds[i + 1], dpi)
+            for i in range(workers)
+        ]
+        return [page for future in futures for page in future.result()]
 
 SLIDE_IMAGES_DIR = "slide_images"
 
@@ -32,7 +190,7 @@ def ensure_directories():
     slide_images_path = os.path.join(backend_dir, SLIDE_IMAGES_DIR)
     os.makedirs(slide_images_path, exist_ok=True)
 
-def get_pdf_slide_image(pdf_path, slide_number, thumbnail_size=(300, 200)):
+def get_pdf_slide_image(pdf_path, slide_number, thumbnail_size=THUMBNAIL_SIZE):
     """
     Extract a specific slide from PDF as image
     
@@ -47,28 +205,16 @@ def get_pdf_slide_image(pdf_path, slide_number, thumbnail_size=(300, 200)):
     try:
         print(f"📄 Extracting slide {slide_number} from {pdf_path}")
         
-        # Convert specific page to image
-        images = convert_from_path(
-            pdf_path, 
-            first_page=slide_number, 
-            last_page=slide_number,
-            dpi=150  # Good quality for display
-        )
+        renderer = get_pdf_renderer()
+        if renderer is None:
+            return None, None
         
-        if not images:
+        rendered = renderer.render_pages(pdf_path, slide_number, slide_number, SLIDE_DPI, thumbnail_size)
+        if not rendered:
             print(f"❌ No image found for slide {slide_number}")
             return None, None
         
-        slide_image = images[0]
-        
-        # Create thumbnail
-        thumbnail = slide_image.copy()
-        thumbnail.thumbnail(thumbnail_size, Image.Resampling.LANCZOS)
-        
-        # Convert to bytes
-        full_size_bytes = image_to_bytes(slide_image)
-        thumbnail_bytes = image_to_bytes(thumbnail)
-        
+        _, full_size_bytes, thumbnail_bytes = rendered[0]
         print(f"✅ Successfully extracted slide {slide_number}")
         return thumbnail_bytes, full_size_bytes
         
@@ -98,10 +244,10 @@ def save_slide_images(pdf_path, session_id):
         print(f"📁 PDF file exists: {os.path.exists(pdf_path)}")
         print(f"📏 PDF file size: {os.path.getsize(pdf_path) if os.path.exists(pdf_path) else 'N/A'} bytes")
         
-        if not PDF_PROCESSING_AVAILABLE:
+        if not pdf_processing_available():
             print("⚠️ PDF processing not available - skipping image extraction")
             print("💡 The feedback will work but without slide images")
-            print("💡 To enable slide images: brew install poppler")
+            print("💡 To enable slide images: pip install pymupdf (or brew install poppler)")
             # Return empty dict to indicate no images processed
             return {}
         
@@ -112,44 +258,43 @@ def save_slide_images(pdf_path, session_id):
         os.makedirs(session_dir, exist_ok=True)
         print(f"📁 Session directory created: {session_dir}")
         
-        print(f"📄 Converting PDF to images: {pdf_path}")
+        renderer = get_pdf_renderer()
+        print(f"📄 Converting PDF to images with {renderer.name}: {pdf_path}")
         
-        # Convert all pages to images with better error handling
+        # Render all pages with better error handling
         try:
-            images = convert_from_path(pdf_path, dpi=150)
-            print(f"✅ PDF conversion successful: {len(images)} pages")
+            pages = render_all_pages(renderer, pdf_path)
+            print(f"✅ PDF conversion successful: {len(pages)} pages")
         except Exception as convert_error:
             print(f"❌ PDF conversion failed: {convert_error}")
             print(f"❌ Error type: {type(convert_error)}")
             # Try with different settings
             try:
                 print("🔄 Retrying with lower DPI...")
-                images = convert_from_path(pdf_path, dpi=72)
-                print(f"✅ PDF conversion successful with lower DPI: {len(images)} pages")
+                pages = render_all_pages(renderer, pdf_path, dpi=72, workers=1)
+                print(f"✅ PDF conversion successful with lower DPI: {len(pages)} pages")
             except Exception as retry_error:
                 print(f"❌ Retry also failed: {retry_error}")
                 raise retry_error
         
-        if not images:
+        if not pages:
             raise Exception("No pages found in PDF")
         
         slide_paths = {}
         
-        for i, image in enumerate(images):
-            slide_number = i + 1
-            print(f"📷 Processing slide {slide_number}...")
-            
+        for slide_number, full_bytes, thumbnail_bytes in pages:
             try:
-                # Create thumbnail
-                thumbnail = image.copy()
-                thumbnail.thumbnail((300, 200), Image.Resampling.LANCZOS)
-                
                 # Save both full size and thumbnail
                 full_path = os.path.join(session_dir, f"slide_{slide_number}_full.png")
                 thumb_path = os.path.join(session_dir, f"slide_{slide_number}_thumb.png")
                 
-                image.save(full_path, 'PNG')
-                thumbnail.save(thumb_path, 'PNG')
+                with open(full_path, 'wb') as f:
+                    f.write(full_bytes)
+                with open(thumb_path, 'wb') as f:
+                    f.write(thumbnail_bytes)
+                publish_file(full_path)
+                publish_file(thumb_path)
+                record_bytes("slide_image", len(full_bytes) + len(thumbnail_bytes))
                 
                 slide_paths[slide_number] = {
                     'full': full_path,
@@ -162,7 +307,8 @@ def save_slide_images(pdf_path, session_id):
                 print(f"❌ Failed to save slide {slide_number}: {save_error}")
                 raise save_error
         
-        print(f"✅ Successfully converted {len(images)} slides")
+        print(f"✅ Successfully converted {len(pages)} slides")
+        get_thumbnail_sprite(session_id, rebuild=True)
         return slide_paths
         
     except Exception as e:
@@ -192,11 +338,160 @@ def get_slide_image_path(session_id, slide_number, image_type='thumbnail'):
     image_file = f"slide_{slide_number}_{file_type}.png"
     image_path = os.path.join(session_dir, image_file)
     
-    if os.path.exists(image_path):
+    if artifact_exists(image_path):
         return image_path
     
     return None
 
+def snap_variant_width(width):
+    """Smallest allowed variant width that is at least the requested width"""
+    for allowed in VARIANT_WIDTHS:
+        if allowed >= width:
+            return allowed
+    return VARIANT_WIDTHS[-1]
+
+def get_slide_variant_path(session_id, slide_number, width, image_format='png'):
+    """
+    Get a resized copy of a slide, generating it from the full-size image on first request
+
+    Args:
+        session_id: Session identifier
+        slide_number: Slide number (1-indexed)
+        width: Requested width in pixels (snapped up to one of VARIANT_WIDTHS)
+        image_format: 'png', 'webp' or 'jpeg'
+
+    Returns:
+        File path or None if the slide does not exist
+    """
+    source_path = get_slide_image_path(session_id, slide_number, 'full')
+    if source_path is None:
+        return None
+
+    width = snap_variant_width(width)
+    cache_key = f"{session_id}_{slide_number}_w{width}.{image_format}"
+    variant_path = _variant_cache.get_path(cache_key)
+    if variant_path is not None:
+        record_cache_lookup("slide_variant", True)
+        return variant_path
+
+    record_cache_lookup("slide_variant", False)
+    # The source may have been rendered on another node
+    if not ensure_local_file(source_path):
+        return None
+    Image = get_image_module()
+    if Image is None:
+        print("⚠️ Slide variants not available: Pillow not installed")
+        return source_path
+
+    pil_format, _ = VARIANT_FORMATS[image_format]
+    with stage_timer("slide_variant.resize", width=width, format=image_format):
+        with Image.open(source_path) as image:
+            # Never upscale; a wide enough PNG request is just the source image
+            if width >= image.width and image_format == 'png':
+                return source_path
+            if width < image.width:
+                height = max(1, round(image.height * width / image.width))
+                image = image.resize((width, height), Image.Resampling.LANCZOS)
+            if pil_format == 'JPEG' and image.mode != 'RGB':
+                image = image.convert('RGB')
+            save_options = {'quality': VARIANT_QUALITY} if pil_format in ('WEBP', 'JPEG') else {'optimize': True}
+            buffer = io.BytesIO()
+            image.save(buffer, format=pil_format, **save_options)
+
+    data = buffer.getvalue()
+    record_bytes("slide_variant", len(data))
+    return _variant_cache.write(cache_key, data)
+
+def cleanup_old_slide_variants(max_age_hours=24):
+    """Remove resized slide variants that have not been requested recently"""
+    try:
+        removed = _variant_cache.cleanup(max_age_hours)
+        if removed:
+            print(f"🗑️ Cleaned up {removed} slide image variants")
+
+    except Exception as e:
+        print(f"⚠️ Error during slide variant cleanup: {e}")
+
+def get_thumbnail_sprite(session_id, rebuild=False):
+    """
+    Get the thumbnail sprite sheet for a session, building it on first request
+
+    Thumbnails are laid out in a grid of SPRITE_COLUMNS columns, each in a cell
+    the size of the largest thumbnail.
+
+    Args:
+        session_id: Session identifier
+        rebuild: Build the sprite again even if one exists (after the thumbnails are re-rendered)
+
+    Returns:
+        Tuple of (sprite_path, sprite_map) or (None, None) if the session has no thumbnails.
+        sprite_map is {"width", "height", "slides": {"<slide number>": {"x", "y", "width", "height"}}}
+    """
+    backend_dir = os.path.dirname(os.path.abspath(__file__))
+    session_dir = os.path.join(backend_dir, SLIDE_IMAGES_DIR, session_id)
+    sprite_path = os.path.join(session_dir, SPRITE_IMAGE_FILE)
+    map_path = os.path.join(session_dir, SPRITE_MAP_FILE)
+
+    if not rebuild and ensure_local_file(map_path) and ensure_local_file(sprite_path):
+        try:
+            with open(map_path) as f:
+                sprite_map = json.load(f)
+            if os.path.exists(sprite_path):
+                return sprite_path, sprite_map
+        except (FileNotFoundError, ValueError):
+            pass
+
+    Image = get_image_module()
+    if Image is None:
+        print("⚠️ Thumbnail sprite not available: Pillow not installed")
+        return None, None
+
+    thumbnails = []
+    for filename in list_artifacts(session_dir):
+        if filename.startswith("slide_") and filename.endswith("_thumb.png"):
+            slide_number = int(filename[len("slide_"):-len("_thumb.png")])
+            path = os.path.join(session_dir, filename)
+            if ensure_local_file(path):
+                thumbnails.append((slide_number, path))
+    if not thumbnails:
+        return None, None
+    thumbnails.sort()
+
+    with stage_timer("slide_sprite.build", slides=len(thumbnails)):
+        images = [(slide_number, Image.open(path)) for slide_number, path in thumbnails]
+        try:
+            cell_width = max(image.width for _, image in images)
+            cell_height = max(image.height for _, image in images)
+            columns = min(SPRITE_COLUMNS, len(images))
+            rows = -(-len(images) // columns)
+            sprite = Image.new('RGB', (columns * cell_width, rows * cell_height), 'white')
+            slides = {}
+            for index, (slide_number, image) in enumerate(images):
+                x = (index % columns) * cell_width
+                y = (index // columns) * cell_height
+                sprite.paste(image.convert('RGB'), (x, y))
+                slides[str(slide_number)] = {"x": x, "y": y, "width": image.width, "height": image.height}
+        finally:
+            for _, image in images:
+                image.close()
+
+        sprite_map = {"width": sprite.width, "height": sprite.height, "slides": slides}
+        sprite_bytes = image_to_bytes(sprite)
+
+    # Write the image before the map; the map's presence marks a complete sprite
+    temp_suffix = f".{threading.get_ident()}.tmp"
+    with open(sprite_path + temp_suffix, 'wb') as f:
+        f.write(sprite_bytes)
+    os.replace(sprite_path + temp_suffix, sprite_path)
+    with open(map_path + temp_suffix, 'w') as f:
+        json.dump(sprite_map, f)
+    os.replace(map_path + temp_suffix, map_path)
+    publish_file(sprite_path)
+    publish_file(map_path)
+    record_bytes("slide_sprite", len(sprite_bytes))
+    print(f"✅ Built thumbnail sprite for session {session_id}: {len(slides)} slides")
+    return sprite_path, sprite_map
+
 def cleanup_session_images(session_id):
     """Remove all images for a specific session"""
     try:
@@ -205,6 +500,7 @@ def cleanup_session_images(session_id):
             import shutil
             shutil.rmtree(session_dir)
             print(f"🗑️ Cleaned up images for session {session_id}")
+        delete_artifacts(session_dir)
     except Exception as e:
         print(f"⚠️ Error cleaning up images for session {session_id}: {e}")
 
@@ -1,6 +1,179 @@
 import os
-import PyPDF2
-from typing import Optional
+import functools
+import threading
+import multiprocessing
+from typing import List, Optional
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import config
+from metrics import stage_timer
+from lazy_imports import lazy_module, optional_import
+from artifact_storage import ensure_local_file
+
+# PyPDF2 is imported on first use so importing the backend stays fast
+PyPDF2 = lazy_module('PyPDF2')
+
+# Text extraction engine: 'auto' prefers PyMuPDF (C, several times faster) and falls back to PyPDF2
+PDF_TEXT_ENGINE = os.getenv('PDF_TEXT_ENGINE', 'auto').lower()
+
+# Worker processes for extracting long documents (1 = in-process, the default). Documents with at least
+# PDF_TEXT_PARALLEL_MIN_PAGES pages are split across them; smaller ones are cheaper to extract in-process
+PDF_TEXT_WORKERS = int(os.getenv('PDF_TEXT_WORKERS', '1'))
+PDF_TEXT_PARALLEL_MIN_PAGES = int(os.getenv('PDF_TEXT_PARALLEL_MIN_PAGES', '40'))
+
+class PyPDF2TextEngine:
+    """Pure-Python extraction with PyPDF2"""
+    name = "pypdf2"
+
+    @staticmethod
+    def available():
+        if optional_import('PyPDF2') is None:
+            print("⚠️ PyPDF2 text engine not available: PyPDF2 not installed")
+            return False
+        return True
+
+    def open(self, pdf_path: str):
+        # PdfReader reads the file into memory, so there is no handle to close
+        return PyPDF2.PdfReader(pdf_path)
+
+    def close(self, document):
+        pass
+
+    def page_count(self, document) -> int:
+        return len(document.pages)
+
+    def extract_pages(self, document, first_page: int, last_page: int) -> List[str]:
+        """Raw text of pages first_page..last_page (1-indexed, inclusive)"""
+        return [document.pages[page_num - 1].extract_text() or "" for page_num in range(first_page, last_page + 1)]
+
+class PyMuPDFTextEngine:
+    """In-process extraction with PyMuPDF"""
+    name = "pymupdf"
+
+    @staticmethod
+    def available():
+        if optional_import('pymupdf') is None:
+            print("⚠️ PyMuPDF text engine not available: pymupdf not installed")
+            return False
+        return True
+
+    def open(self, pdf_path: str):
+        return optional_import('pymupdf').open(pdf_path)
+
+    def close(self, document):
+        document.close()
+
+    def page_count(self, document) -> int:
+        return document.page_count
+
+    def extract_pages(self, document, first_page: int, last_page: int) -> List[str]:
+        """Raw text of pages first_page..last_page (1-indexed, inclusive)"""
+        return [document[page_num - 1].get_text() for page_num in range(first_page, last_page + 1)]
+
+PDF_TEXT_ENGINES = {
+    'pymupdf': PyMuPDFTextEngine,
+    'pypdf2': PyPDF2TextEngine,
+}
+
+def create_text_engine(name: str):
+    """Create a text engine by name ('pymupdf', 'pypdf2' or 'auto'), or None if it is not available"""
+    names = ['pymupdf', 'pypdf2'] if name == 'auto' else [name]
+    for engine_name in names:
+        engine_class = PDF_TEXT_ENGINES.get(engine_name)
+        if engine_class is None:
+            print(f"⚠️ Unknown PDF_TEXT_ENGINE '{engine_name}'")
+        elif engine_class.available():
+            return engine_class()
+    return None
+
+@functools.lru_cache(maxsize=None)
+def get_text_engine():
+    """The configured text engine, chosen once on first use"""
+    engine = create_text_engine(PDF_TEXT_ENGINE)
+    if engine is None:
+        print("⚠️ PDF text extraction not available: no text engine installed")
+    else:
+        print(f"✅ PDF text extraction available ({engine.name})")
+    return engine
+
+# Long-lived extraction pools by size, created on first use. Workers are spawned, not forked:
+# forking the threaded server could copy locks held by other threads into the child
+_pools = {}
+_pools_lock = threading.Lock()
+
+def get_extraction_pool(workers: int) -> ProcessPoolExecutor:
+    with _pools_lock:
+        pool = _pools.get(workers)
+        if pool is None:
+            pool = _pools[workers] = ProcessPoolExecutor(
+                max_workers=workers, mp_context=multiprocessing.get_context('spawn')
+            )
+        return pool
+
+def discard_extraction_pool(workers: int):
+    """Drop a pool whose worker died so the next call starts a fresh one"""
+    with _pools_lock:
+        pool = _pools.pop(workers, None)
+    if pool is not None:
+        pool.shutdown(wait=False)
+
+def extract_page_range(engine_name: str, pdf_path: str, first_page: int, last_page: int) -> List[str]:
+    """Process pool entry point: extract a range of pages with a fresh engine"""
+    engine = PDF_TEXT_ENGINES[engine_name]()
+    document = engine.open(pdf_path)
+    try:
+        return engine.extract_pages(document, first_page, last_page)
+    finally:
+        engine.close(document)
+
+def extract_page_texts(pdf_path: str, start_page: int = 1, end_page: Optional[int] = None,
+                       engine=None, workers: int = PDF_TEXT_WORKERS) -> List[str]:
+    """
+    Raw text of a range of pages, split into contiguous runs across worker processes for long documents
+
+    Args:
+        pdf_path: Path to the PDF file
+        start_page, end_page: 1-indexed page range, clamped to the document (end_page None means the last page)
+        engine: Text engine; defaults to the configured one
+        workers: Worker processes (1 extracts in-process)
+
+    Returns:
+        Text of each page in the range, in page order
+    """
+    engine = engine or get_text_engine()
+    if engine is None:
+        raise RuntimeError("No PDF text engine installed")
+
+    # The document is parsed once; a parallel run only pays for it again in the workers
+    document = engine.open(pdf_path)
+    try:
+        page_count = engine.page_count(document)
+        first_page = max(1, start_page)
+        last_page = page_count if end_page is None else min(page_count, end_page)
+        pages_in_range = last_page - first_page + 1
+        if pages_in_range <= 0:
+            return []
+        if workers <= 1 or pages_in_range < PDF_TEXT_PARALLEL_MIN_PAGES:
+            return engine.extract_pages(document, first_page, last_page)
+    finally:
+        engine.close(document)
+
+    # Each worker opens the document once and extracts a run of pages
+    runs = min(workers, pages_in_range)
+    bounds = [first_page - 1 + round(i * pages_in_range / runs) for i in range(runs + 1)]
+    with stage_timer("pdf.extract_parallel", engine=engine.name, workers=runs):
+        pool = get_extraction_pool(workers)
+        try:
+            futures = [
+                pool.submit(extract_page_range, engine.name, pdf_path, bounds[i] + 1, bounds[i + 1])
+                for i in range(runs)
+            ]
+            return [text for future in futures for text in future.result()]
+        except BrokenProcessPool:
+            print("⚠️ PDF text extraction worker died, extracting in-process")
+            discard_extraction_pool(workers)
+            return extract_page_range(engine.name, pdf_path, first_page, last_page)
 
 def extract_pdf_text(pdf_path: str) -> Optional[str]:
     """
@@ -16,15 +189,8 @@ def extract_pdf_text(pdf_path: str) -> Optional[str]:
         if not os.path.exists(pdf_path):
             return None
             
-        text_content = ""
-        
-        with open(pdf_path, 'rb') as file:
-            pdf_reader = PyPDF2.PdfReader(file)
-            
-            # Extract text from all pages
-            for page_num in range(len(pdf_reader.pages)):
-                page = pdf_reader.pages[page_num]
-                text_content += page.extract_text() + "\n"
+        with stage_timer("pdf.extract_text"):
+            text_content = "\n".join(extract_page_texts(pdf_path))
         
         return text_content.strip() if text_content.strip() else None
         
@@ -32,6 +198,27 @@ def extract_pdf_text(pdf_path: str) -> Optional[str]:
         print(f"Error extracting PDF text: {str(e)}")
         return None
 
+def extract_pdf_pages(pdf_path: str) -> Optional[List[str]]:
+    """
+    Extract text content from each page of a PDF file.
+    
+    Args:
+        pdf_path (str): Path to the PDF file
+        
+    Returns:
+        Optional[List[str]]: Text of each page in order (index 0 is slide 1) or None if extraction fails
+    """
+    try:
+        if not os.path.exists(pdf_path):
+            return None
+        
+        with stage_timer("pdf.extract_pages"):
+            return [text.strip() for text in extract_page_texts(pdf_path)]
+        
+    except Exception as e:
+        print(f"Error extracting PDF pages: {str(e)}")
+        return None
+
 def extract_pdf_slides_range(pdf_path: str, start_slide: int, end_slide: int) -> Optional[str]:
     """
     Extract text content from a specific range of slides/pages in a PDF.
@@ -48,21 +235,15 @@ def extract_pdf_slides_range(pdf_path: str, start_slide: int, end_slide: int) ->
         if not os.path.exists(pdf_path):
             return None
             
-        text_content = ""
+        # Only the requested pages are read; the range is clamped to the document
+        start_slide = max(1, start_slide)
+        with stage_timer("pdf.extract_range"):
+            page_texts = extract_page_texts(pdf_path, start_slide, end_slide)
         
-        with open(pdf_path, 'rb') as file:
-            pdf_reader = PyPDF2.PdfReader(file)
-            total_pages = len(pdf_reader.pages)
-            
-            # Convert to 0-indexed and validate range
-            start_idx = max(0, start_slide - 1)
-            end_idx = min(total_pages - 1, end_slide - 1)
-            
-            # Extract text from specified pages
-            for page_num in range(start_idx, end_idx + 1):
-                page = pdf_reader.pages[page_num]
-                page_text = page.extract_text()
-                text_content += f"--- Slide {page_num + 1} ---\n{page_text}\n\n"
+        text_content = "\n\n".join(
+            f"--- Slide {slide_number} ---\n{page_text}"
+            for slide_number, page_text in enumerate(page_texts, start=start_slide)
+        )
         
         return text_content.strip() if text_content.strip() else None
         
@@ -83,11 +264,29 @@ def get_assignment_text(filename: str) -> Optional[str]:
     assignments_dir = os.path.join(os.path.dirname(__file__), 'assignments')
     pdf_path = os.path.join(assignments_dir, filename)
     
-    if not filename.endswith('.pdf'):
+    if not filename.endswith('.pdf') or not ensure_local_file(pdf_path):
         return None
         
     return extract_pdf_text(pdf_path)
 
+def get_assignment_pages(filename: str) -> Optional[List[str]]:
+    """
+    Get the text of each page of an assignment PDF file.
+    
+    Args:
+        filename (str): Name of the PDF file in the assignments directory
+        
+    Returns:
+        Optional[List[str]]: Text of each page in order or None if extraction fails
+    """
+    assignments_dir = os.path.join(os.path.dirname(__file__), 'assignments')
+    pdf_path = os.path.join(assignments_dir, filename)
+    
+    if not filename.endswith('.pdf') or not ensure_local_file(pdf_path):
+        return None
+        
+    return extract_pdf_pages(pdf_path)
+
 def get_assignment_slides_range(filename: str, start_slide: int, end_slide: int) -> Optional[str]:
     """
     Get text content from a specific slide range in an assignment PDF file.
@@ -103,7 +302,7 @@ def get_assignment_slides_range(filename: str, start_slide: int, end_slide: int)
     assignments_dir = os.path.join(os.path.dirname(__file__), 'assignments')
     pdf_path = os.path.join(assignments_dir, filename)
     
-    if not filename.endswith('.pdf'):
+    if not filename.endswith('.pdf') or not ensure_local_file(pdf_path):
         return None
         
     return extract_pdf_slides_range(pdf_path, start_slide, end_slide)
\ No newline at end of file
@@ -0,0 +1,219 @@
+import os
+import re
+import time
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import config
+from metrics import stage_timer
+
+# Full-text index of slide transcripts, feedback comments and Q&A dialogue across sessions
+SEARCH_INDEX_DIR = "search_index"
+SEARCH_INDEX_FILE = "feedback_search.db"
+
+# Indexed sessions are kept far longer than the sessions' audio and images
+SEARCH_RETENTION_DAYS = int(os.getenv('SEARCH_RETENTION_DAYS', '365'))
+
+SEARCH_MAX_RESULTS = 100
+SEARCH_KINDS = ("transcript", "feedback", "qa_feedback", "dialogue")
+
+# Row metadata lives in a plain table with B-tree indexes (session deletes, retention, filters);
+# the FTS5 table indexes its text as external content, kept in sync by triggers
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    id INTEGER PRIMARY KEY,
+    session_id TEXT NOT NULL,
+    slide_number INTEGER,
+    kind TEXT NOT NULL,
+    criterion TEXT,
+    status TEXT,
+    start_ms INTEGER,
+    created_at REAL NOT NULL,
+    assignment TEXT,
+    content TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_session ON entries (session_id);
+CREATE INDEX IF NOT EXISTS entries_created ON entries (created_at);
+CREATE VIRTUAL TABLE IF NOT EXISTS documents USING fts5(
+    content, content='entries', content_rowid='id', tokenize='porter unicode61', prefix='2 3'
+);
+CREATE TRIGGER IF NOT EXISTS entries_insert AFTER INSERT ON entries BEGIN
+    INSERT INTO documents (rowid, content) VALUES (new.id, new.content);
+END;
+CREATE TRIGGER IF NOT EXISTS entries_delete AFTER DELETE ON entries BEGIN
+    INSERT INTO documents (documents, rowid, content) VALUES ('delete', old.id, old.content);
+END;
+"""
+
+QUERY_TOKEN = re.compile(r"[\w']+\*?")
+
+# One writer thread; sessions are indexed after their feedback response is sent
+_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="search-index")
+_schema_ready = False
+_schema_lock = threading.Lock()
+
+def get_index_path():
+    backend_dir = os.path.dirname(os.path.abspath(__file__))
+    return os.path.join(backend_dir, SEARCH_INDEX_DIR, SEARCH_INDEX_FILE)
+
+def connect():
+    """Open the index, creating it on first use (WAL, so searches don't wait for indexing)"""
+    global _schema_ready
+    index_path = get_index_path()
+    os.makedirs(os.path.dirname(index_path), exist_ok=True)
+    connection = sqlite3.connect(index_path, timeout=30)
+    connection.execute("PRAGMA synchronous=NORMAL")
+    if not _schema_ready:
+        with _schema_lock:
+            if not _schema_ready:
+                connection.execute("PRAGMA journal_mode=WAL")
+                connection.executescript(SCHEMA)
+                _schema_ready = True
+    return connection
+
+def build_session_documents(structured_feedback, slide_transcripts=None, conversation_history=None):
+    """
+    Flatten one feedback session into index rows
+
+    Args:
+        structured_feedback: Result of generate_feedback
+        slide_transcripts: Slide number -> {"transcript", "start_time", ...}
+        conversation_history: VC conversation messages
+
+    Returns:
+        List of (content, slide_number, kind, criterion, status, start_ms)
+    """
+    documents = []
+    for slide_number, slide_data in (slide_transcripts or {}).items():
+        if slide_data.get("transcript"):
+            start_ms = int((slide_data.get("start_time") or 0) * 1000)
+            documents.append((slide_data["transcript"], slide_number, "transcript", None, None, start_ms))
+
+    for slide in structured_feedback.get("slides", []):
+        start_ms = None
+        if slide["slide_number"] in (slide_transcripts or {}):
+            start_ms = int((slide_transcripts[slide["slide_number"]].get("start_time") or 0) * 1000)
+        for criterion, result in (slide.get("feedback") or {}).items():
+            if isinstance(result, dict) and result.get("comment"):
+                documents.append((result["comment"], slide["slide_number"], "feedback", criterion, result.get("status"), start_ms))
+
+    for criterion, result in (structured_feedback.get("qa_feedback") or {}).items():
+        if isinstance(result, dict) and result.get("comment"):
+            documents.append((result["comment"], None, "qa_feedback", criterion, result.get("status"), None))
+
+    for message in conversation_history or []:
+        if message.get("content"):
+            role = "vc" if message.get("role") == "assistant" else "student"
+            documents.append((message["content"], None, "dialogue", role, None, None))
+    return documents
+
+def index_session(session_id, structured_feedback, slide_transcripts=None, conversation_history=None, assignment=None):
+    """Replace a session's rows in the index"""
+    documents = build_session_documents(structured_feedback, slide_transcripts, conversation_history)
+    created_at = structured_feedback.get("metadata", {}).get("generated_at") or time.time()
+    with stage_timer("search.index", documents=len(documents)):
+        connection = connect()
+        try:
+            with connection:
+                connection.execute("DELETE FROM entries WHERE session_id = ?", (session_id,))
+                connection.executemany(
+                    "INSERT INTO entries (content, session_id, slide_number, kind, criterion, status, start_ms, created_at, assignment)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    [(content, session_id, slide_number, kind, criterion, status, start_ms, created_at, assignment)
+                     for content, slide_number, kind, criterion, status, start_ms in documents]
+                )
+        finally:
+            connection.close()
+    print(f"🔎 Indexed {len(documents)} documents for session {session_id}")
+
+def start_session_indexing(session_id, structured_feedback, slide_transcripts=None, conversation_history=None, assignment=None):
+    """Index a finished feedback session in the background"""
+    def run():
+        try:
+            index_session(session_id, structured_feedback, slide_transcripts, conversation_history, assignment)
+        except Exception as e:
+            print(f"⚠️ Search indexing failed for session {session_id}: {e}")
+    _writer.submit(run)
+
+def build_match_query(query):
+    """
+    Turn free text into an FTS5 query: every word must match, 'word*' matches a prefix
+
+    Quoting each word keeps user input from being parsed as FTS5 syntax.
+    """
+    terms = []
+    for token in QUERY_TOKEN.findall(query):
+        word = token.rstrip('*').replace('"', '')
+        if word:
+            terms.append(f'"{word}"*' if token.endswith('*') else f'"{word}"')
+    return " ".join(terms)
+
+def search(query, kind=None, criterion=None, status=None, session_id=None, limit=20):
+    """
+    Ranked full-text search across indexed sessions
+
+    Args:
+        query: Words to find; all must match
+        kind: Optional 'transcript', 'feedback', 'qa_feedback' or 'dialogue'
+        criterion: Optional criterion (e.g. 'delivery') or dialogue role ('vc', 'student')
+        status: Optional feedback status ('met', 'not_met', 'not_applicable')
+        session_id: Optional session to search within
+        limit: Maximum hits
+
+    Returns:
+        List of hits, best first: {"session_id", "slide_number", "kind", "criterion", "status",
+        "start_ms", "created_at", "assignment", "snippet", "score"}
+    """
+    match_query = build_match_query(query)
+    if not match_query:
+        return []
+
+    sql = ("SELECT e.session_id, e.slide_number, e.kind, e.criterion, e.status, e.start_ms, e.created_at, e.assignment,"
+           " snippet(documents, 0, '[', ']', '…', 16), bm25(documents)"
+           " FROM documents JOIN entries e ON e.id = documents.rowid WHERE documents MATCH ?")
+    params = [match_query]
+    for column, value in (("kind", kind), ("criterion", criterion), ("status", status), ("session_id", session_id)):
+        if value:
+            sql += f" AND e.{column} = ?"
+            params.append(value)
+    sql += " ORDER BY bm25(documents) LIMIT ?"
+    params.append(max(1, min(limit, SEARCH_MAX_RESULTS)))
+
+    with stage_timer("search.query"):
+        connection = connect()
+        try:
+            rows = connection.execute(sql, params).fetchall()
+        finally:
+            connection.close()
+
+    return [
+        {
+            "session_id": session, "slide_number": slide_number, "kind": row_kind,
+            "criterion": row_criterion, "status": row_status, "start_ms": start_ms,
+            "created_at": created_at, "assignment": assignment, "snippet": snippet,
+            # bm25() is lower for better matches; flip it so higher scores rank first
+            "score": round(-rank, 4)
+        }
+        for session, slide_number, row_kind, row_criterion, row_status, start_ms, created_at, assignment, snippet, rank in rows
+    ]
+
+def cleanup_old_search_entries(max_age_days=SEARCH_RETENTION_DAYS):
+    """Remove indexed sessions older than the retention period"""
+    try:
+        if not os.path.exists(get_index_path()):
+            return
+
+        cutoff_time = time.time() - (max_age_days * 24 * 3600)
+        connection = connect()
+        try:
+            with connection:
+                removed = connection.execute("DELETE FROM entries WHERE created_at < ?", (cutoff_time,)).rowcount
+        finally:
+            connection.close()
+
+        if removed:
+            print(f"🗑️ Removed {removed} expired search index entries")
+
+    except Exception as e:
+        print(f"⚠️ Error during search index cleanup: {e}")
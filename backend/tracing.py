@@ -0,0 +1,254 @@
+import os
+import json
+import time
+import uuid
+import threading
+import contextvars
+import urllib.request
+from contextlib import contextmanager
+
+import config
+
+# Trace export configuration: 'file' (JSONL under TRACES_DIR), 'otlp' (OTLP/HTTP JSON) or 'none'
+TRACES_DIR = "traces"
+TRACE_EXPORT = os.getenv('TRACE_EXPORT', 'file').lower()
+TRACE_OTLP_ENDPOINT = os.getenv('TRACE_OTLP_ENDPOINT', 'http://localhost:4318/v1/traces')
+TRACE_SERVICE_NAME = os.getenv('TRACE_SERVICE_NAME', 'ai-pitch-backend')
+TRACED_ENDPOINTS = set(filter(None, os.getenv('TRACED_ENDPOINTS', '/api/chat,/api/feedback').split(',')))
+
+# Span of the code currently running; unset outside traced requests
+_current_span = contextvars.ContextVar("current_span", default=None)
+_export_lock = threading.Lock()
+
+class Span:
+    """One timed operation inside a trace"""
+
+    def __init__(self, name, trace_id, parent=None, attributes=None):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_span_id = parent.span_id if parent else None
+        # Child spans are collected on the root span and exported together when it ends
+        self.root = parent.root if parent else self
+        self.finished_spans = [] if parent is None else None
+        self.attributes = dict(attributes or {})
+        self.start_time = time.time()
+        self.end_time = None
+        self.status = "ok"
+        self.error = None
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+    def set_attributes(self, **attributes):
+        self.attributes.update(attributes)
+
+    def add_to_attribute(self, key, amount=1):
+        self.attributes[key] = self.attributes.get(key, 0) + amount
+
+    def record_error(self, error):
+        self.status = "error"
+        self.error = str(error)
+
+    def finish(self):
+        """End the span; ending the root span exports the whole trace"""
+        self.end_time = time.time()
+        if self.root is self:
+            export_spans(self.finished_spans + [self])
+        elif self.root.end_time is None:
+            self.root.finished_spans.append(self)
+        else:
+            # Background work that outlived its request is exported on its own
+            export_spans([self])
+
+    def to_dict(self):
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_span_id": self.parent_span_id,
+            "name": self.name,
+            "start_time": self.start_time,
+            "end_time": self.end_time,
+            "duration_ms": round((self.end_time - self.start_time) * 1000, 2) if self.end_time else None,
+            "status": self.status,
+            "error": self.error,
+            "attributes": self.attributes
+        }
+
+class NoopSpan:
+    """Stand-in used when no trace is active, so callers never need to check"""
+    trace_id = None
+
+    def set_attribute(self, key, value):
+        pass
+
+    def set_attributes(self, **attributes):
+        pass
+
+    def add_to_attribute(self, key, amount=1):
+        pass
+
+    def record_error(self, error):
+        pass
+
+NOOP_SPAN = NoopSpan()
+
+def current_span():
+    """Get the active span, or a no-op span outside traced requests"""
+    return _current_span.get() or NOOP_SPAN
+
+def start_trace(name, request_id=None, **attributes):
+    """
+    Start a new trace with a root span and make it current
+
+    Args:
+        name: Root span name, e.g. "POST /api/feedback"
+        request_id: Request ID to use as the trace ID (a new one is generated if missing or invalid)
+
+    Returns:
+        Tuple of (root span, context token for end_trace)
+    """
+    try:
+        trace_id = uuid.UUID(request_id).hex
+    except (ValueError, TypeError, AttributeError):
+        trace_id = uuid.uuid4().hex
+    root = Span(name, trace_id, attributes=attributes)
+    return root, _current_span.set(root)
+
+def end_trace(root, token, **attributes):
+    """Finish a trace's root span, restore the previous context and export the trace"""
+    root.set_attributes(**attributes)
+    _current_span.reset(token)
+    root.finish()
+
+@contextmanager
+def span(name, **attributes):
+    """
+    Record a child span of the current span
+
+    Yields the span so callers can add attributes; outside a trace this is a no-op.
+    """
+    parent = _current_span.get()
+    if parent is None:
+        yield NOOP_SPAN
+        return
+
+    child = Span(name, parent.trace_id, parent, attributes)
+    token = _current_span.set(child)
+    try:
+        yield child
+    except Exception as e:
+        child.record_error(e)
+        raise
+    finally:
+        _current_span.reset(token)
+        child.finish()
+
+def record_http_attempt(http_request):
+    """httpx request hook: count HTTP attempts (including SDK retries) on the current span"""
+    active_span = _current_span.get()
+    if active_span is not None:
+        active_span.add_to_attribute("http.attempts")
+        active_span.set_attribute("retry_count", active_span.attributes["http.attempts"] - 1)
+
+def traced_http_client():
+    """
+    HTTP client for the OpenAI SDK that counts request attempts per span
+
+    Returns:
+        A client for OpenAI(http_client=...), or None to use the SDK default
+    """
+    try:
+        from openai import DefaultHttpxClient
+        return DefaultHttpxClient(event_hooks={"request": [record_http_attempt]})
+    except ImportError:
+        return None
+
+def get_trace_file_path():
+    """Get today's span file; one file per day keeps cleanup simple"""
+    backend_dir = os.path.dirname(os.path.abspath(__file__))
+    return os.path.join(backend_dir, TRACES_DIR, f"spans-{time.strftime('%Y%m%d')}.jsonl")
+
+def to_otlp_payload(spans):
+    """Convert spans to an OTLP/HTTP JSON ExportTraceServiceRequest"""
+    def otlp_value(value):
+        if isinstance(value, bool):
+            return {"boolValue": value}
+        if isinstance(value, int):
+            return {"intValue": str(value)}
+        if isinstance(value, float):
+            return {"doubleValue": value}
+        return {"stringValue": str(value)}
+
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": TRACE_SERVICE_NAME}}]},
+            "scopeSpans": [{
+                "scope": {"name": "tracing"},
+                "spans": [
+                    {
+                        "traceId": s.trace_id,
+                        "spanId": s.span_id,
+                        "parentSpanId": s.parent_span_id or "",
+                        "name": s.name,
+                        "startTimeUnixNano": str(int(s.start_time * 1e9)),
+                        "endTimeUnixNano": str(int(s.end_time * 1e9)),
+                        "attributes": [{"key": k, "value": otlp_value(v)} for k, v in s.attributes.items()],
+                        "status": {"code": 2, "message": s.error or ""} if s.status == "error" else {"code": 1}
+                    }
+                    for s in spans
+                ]
+            }]
+        }]
+    }
+
+def post_otlp(payload):
+    """Send spans to the OTLP collector; failures are logged, never raised"""
+    try:
+        request = urllib.request.Request(
+            TRACE_OTLP_ENDPOINT,
+            data=json.dumps(payload).encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+            method="POST"
+        )
+        urllib.request.urlopen(request, timeout=5).close()
+    except Exception as e:
+        print(f"⚠️ Trace export to {TRACE_OTLP_ENDPOINT} failed: {e}")
+
+def export_spans(spans):
+    """Export finished spans to the configured destination"""
+    if TRACE_EXPORT == 'none' or not spans:
+        return
+
+    try:
+        if TRACE_EXPORT == 'otlp':
+            # Post in the background so a slow collector never delays the response
+            threading.Thread(target=post_otlp, args=(to_otlp_payload(spans),), daemon=True).start()
+            return
+
+        trace_path = get_trace_file_path()
+        os.makedirs(os.path.dirname(trace_path), exist_ok=True)
+        lines = "".join(json.dumps(s.to_dict(), default=str) + "\n" for s in spans)
+        with _export_lock, open(trace_path, 'a') as f:
+            f.write(lines)
+    except Exception as e:
+        print(f"⚠️ Trace export failed: {e}")
+
+def cleanup_old_traces(max_age_hours=24 * 7):
+    """Remove old span files"""
+    try:
+        cutoff_time = time.time() - (max_age_hours * 3600)
+        backend_dir = os.path.dirname(os.path.abspath(__file__))
+        traces_path = os.path.join(backend_dir, TRACES_DIR)
+
+        if not os.path.exists(traces_path):
+            return
+
+        for filename in os.listdir(traces_path):
+            trace_path = os.path.join(traces_path, filename)
+            if os.path.getmtime(trace_path) < cutoff_time:
+                os.unlink(trace_path)
+                print(f"🗑️ Cleaned up trace file {filename}")
+
+    except Exception as e:
+        print(f"⚠️ Error during trace cleanup: {e}")
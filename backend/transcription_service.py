@@ -0,0 +1,162 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import config
+from openai_client import client
+from lazy_imports import optional_import
+from metrics import stage_timer, record_bytes
+
+# Transcription backend: 'openai' sends audio to hosted whisper-1,
+# 'local' runs a quantized Whisper model on the CPU with faster-whisper
+TRANSCRIPTION_BACKEND = os.getenv('TRANSCRIPTION_BACKEND', 'openai').lower()
+
+# Local engine settings; the model is downloaded on first use and loaded once per process
+LOCAL_WHISPER_MODEL = os.getenv('LOCAL_WHISPER_MODEL', 'base.en')
+LOCAL_WHISPER_COMPUTE_TYPE = os.getenv('LOCAL_WHISPER_COMPUTE_TYPE', 'int8')
+LOCAL_WHISPER_CPU_THREADS = int(os.getenv('LOCAL_WHISPER_CPU_THREADS', '0'))
+LOCAL_WHISPER_WORKERS = int(os.getenv('LOCAL_WHISPER_WORKERS', '2'))
+LOCAL_WHISPER_BATCH_SIZE = int(os.getenv('LOCAL_WHISPER_BATCH_SIZE', '8'))
+
+def transcribe_or_error(backend, audio_file_path):
+    """Transcribe one file, returning the exception instead of raising so one bad segment doesn't fail a batch"""
+    try:
+        return backend.transcribe(audio_file_path)
+    except Exception as e:
+        return e
+
+class OpenAITranscriptionBackend:
+    """Hosted whisper-1 through the OpenAI API"""
+    name = "openai"
+
+    def transcribe(self, audio_file_path):
+        """Transcribe one audio file to plain text"""
+        record_bytes("whisper_upload", os.path.getsize(audio_file_path))
+        with stage_timer("whisper.transcribe", backend=self.name), open(audio_file_path, 'rb') as f:
+            return client.audio.transcriptions.create(
+                model="whisper-1",
+                file=f,
+                response_format="text"
+            )
+
+    def transcribe_with_timestamps(self, audio_file_path):
+        """Transcribe one audio file with word and segment timestamps"""
+        record_bytes("whisper_upload", os.path.getsize(audio_file_path))
+        with stage_timer("whisper.transcribe_full", backend=self.name), open(audio_file_path, 'rb') as f:
+            transcript = client.audio.transcriptions.create(
+                model="whisper-1",
+                file=f,
+                response_format="verbose_json",
+                timestamp_granularities=["word", "segment"]
+            )
+
+        return {
+            "text": transcript.text,
+            "duration": getattr(transcript, 'duration', None),
+            "words": [
+                {"text": word.word, "start": word.start, "end": word.end}
+                for word in (getattr(transcript, 'words', None) or [])
+            ],
+            "segments": [
+                {"text": segment.text, "start": segment.start, "end": segment.end}
+                for segment in (getattr(transcript, 'segments', None) or [])
+            ]
+        }
+
+    def transcribe_many(self, audio_file_paths):
+        """Transcribe several files, one API request each; failures are returned as exceptions"""
+        return [transcribe_or_error(self, path) for path in audio_file_paths]
+
+class LocalWhisperBackend:
+    """Quantized Whisper model running on the CPU through faster-whisper (CTranslate2)"""
+    name = "local"
+
+    def __init__(self, whisper_model_class):
+        with stage_timer("whisper.load_model", backend=self.name, model=LOCAL_WHISPER_MODEL):
+            # num_workers lets several transcribe() calls run on the one loaded model at the same time
+            self.model = whisper_model_class(
+                LOCAL_WHISPER_MODEL,
+                device="cpu",
+                compute_type=LOCAL_WHISPER_COMPUTE_TYPE,
+                cpu_threads=LOCAL_WHISPER_CPU_THREADS,
+                num_workers=LOCAL_WHISPER_WORKERS
+            )
+        # Batched pipeline (faster-whisper >= 1.1) decodes chunks of a long recording together
+        pipeline_class = getattr(optional_import('faster_whisper'), 'BatchedInferencePipeline', None)
+        self.batched_model = pipeline_class(model=self.model) if pipeline_class else None
+        print(f"✅ Local Whisper model {LOCAL_WHISPER_MODEL} ({LOCAL_WHISPER_COMPUTE_TYPE}) loaded")
+
+    def run_model(self, audio_file_path, word_timestamps=False):
+        """Decode a file; the generator is consumed here so the work happens inside the caller's stage"""
+        if self.batched_model is not None:
+            segments, info = self.batched_model.transcribe(
+                audio_file_path, batch_size=LOCAL_WHISPER_BATCH_SIZE, word_timestamps=word_timestamps
+            )
+        else:
+            segments, info = self.model.transcribe(audio_file_path, beam_size=1, word_timestamps=word_timestamps)
+        return list(segments), info
+
+    def transcribe(self, audio_file_path):
+        """Transcribe one audio file to plain text"""
+        with stage_timer("whisper.transcribe", backend=self.name):
+            segments, _ = self.run_model(audio_file_path)
+        return " ".join(segment.text.strip() for segment in segments).strip()
+
+    def transcribe_with_timestamps(self, audio_file_path):
+        """Transcribe one audio file with word and segment timestamps"""
+        with stage_timer("whisper.transcribe_full", backend=self.name):
+            segments, info = self.run_model(audio_file_path, word_timestamps=True)
+
+        return {
+            "text": " ".join(segment.text.strip() for segment in segments).strip(),
+            "duration": info.duration,
+            "words": [
+                {"text": word.word, "start": word.start, "end": word.end}
+                for segment in segments for word in (segment.words or [])
+            ],
+            "segments": [
+                {"text": segment.text, "start": segment.start, "end": segment.end}
+                for segment in segments
+            ]
+        }
+
+    def transcribe_many(self, audio_file_paths):
+        """Transcribe several files concurrently on the shared model; failures are returned as exceptions"""
+        with ThreadPoolExecutor(max_workers=LOCAL_WHISPER_WORKERS) as executor:
+            return list(executor.map(lambda path: transcribe_or_error(self, path), audio_file_paths))
+
+_backend = None
+_backend_lock = threading.Lock()
+
+def get_transcription_backend():
+    """
+    Get the configured transcription backend, creating it on first use
+
+    The local model is loaded once per process and shared by all requests. If
+    faster-whisper is not installed or the model fails to load, the hosted
+    backend is used instead.
+
+    Returns:
+        OpenAITranscriptionBackend or LocalWhisperBackend
+    """
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = create_transcription_backend(TRANSCRIPTION_BACKEND)
+    return _backend
+
+def create_transcription_backend(name):
+    """Create a transcription backend by name ('openai' or 'local')"""
+    if name == 'local':
+        whisper_model_class = optional_import('faster_whisper', 'WhisperModel')
+        if whisper_model_class is None:
+            print("⚠️ TRANSCRIPTION_BACKEND=local needs faster-whisper, using OpenAI Whisper")
+        else:
+            try:
+                return LocalWhisperBackend(whisper_model_class)
+            except Exception as e:
+                print(f"❌ Could not load local Whisper model {LOCAL_WHISPER_MODEL}, using OpenAI Whisper: {e}")
+    elif name != 'openai':
+        print(f"⚠️ Unknown TRANSCRIPTION_BACKEND '{name}', using OpenAI Whisper")
+    return OpenAITranscriptionBackend()
@@ -0,0 +1,230 @@
+import os
+import re
+import hmac
+import json
+import hashlib
+import secrets
+import threading
+import urllib.request
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import config
+from metrics import stage_timer, record_bytes, record_cache_lookup
+from disk_cache import BoundedDiskCache
+
+# Text-to-speech provider: 'elevenlabs' or 'stub' (offline silence, for development and tests)
+TTS_PROVIDER = os.getenv('TTS_PROVIDER', 'elevenlabs').lower()
+ELEVENLABS_API_KEY = os.getenv('ELEVENLABS_API_KEY') or os.getenv('REACT_APP_ELEVENLABS_API_KEY')
+ELEVENLABS_VOICE_ID = os.getenv('ELEVENLABS_VOICE_ID') or os.getenv('REACT_APP_ELEVENLABS_VOICE_ID') or 'b49kxxWbYzfNv7AZOp3g'
+ELEVENLABS_MODEL_ID = os.getenv('ELEVENLABS_MODEL_ID', 'eleven_monolingual_v1')
+ELEVENLABS_BASE_URL = 'https://api.elevenlabs.io/v1'
+
+# Phrase audio cache: one MP3 per (provider, voice, normalized sentence), least recently used evicted first
+TTS_CACHE_DIR = "tts_cache"
+TTS_CACHE_MAX_BYTES = int(os.getenv('TTS_CACHE_MAX_MB', '200')) * 1024 * 1024
+_cache = BoundedDiskCache(TTS_CACHE_DIR, TTS_CACHE_MAX_BYTES)
+TTS_MAX_CHARS = 2000
+
+# /api/tts only speaks text the server produced: chat replies carry an HMAC of their text.
+# Set TTS_SIGNING_KEY when running more than one process so every process accepts every token
+TTS_SIGNING_KEY = (os.getenv('TTS_SIGNING_KEY') or secrets.token_hex(32)).encode("utf-8")
+# Fixed interface lines the frontend speaks without a chat reply
+TTS_PRESET_PHRASES = frozenset({
+    "Thanks for those answers! You can continue with your presentation now.",
+})
+
+# Sentences synthesized ahead of the one being streamed
+_executor = ThreadPoolExecutor(max_workers=int(os.getenv('TTS_CONCURRENCY', '3')), thread_name_prefix="tts")
+
+# Synthesis in progress by cache key, so identical concurrent requests share one provider call
+_in_flight = {}
+_lock = threading.Lock()
+
+SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])\s+")
+# Markdown and LaTeX that would be read out literally, with their spoken replacements
+SPEECH_REPLACEMENTS = (
+    (re.compile(r"```[\s\S]*?```"), " code block "),
+    (re.compile(r"\$\$[\s\S]*?\$\$"), " math expression "),
+    (re.compile(r"\$[^$]*?\$"), " math "),
+    (re.compile(r"\*\*(.*?)\*\*"), r"\1"),
+    (re.compile(r"\*(.*?)\*"), r"\1"),
+    (re.compile(r"`(.*?)`"), r"\1"),
+    (re.compile(r"#{1,6}\s+(.*)"), r"\1"),
+)
+VOICE_ID_PATTERN = re.compile(r"^[A-Za-z0-9]{1,64}$")
+
+class TTSError(Exception):
+    """Speech synthesis failed"""
+
+class ElevenLabsProvider:
+    """ElevenLabs text-to-speech API (MP3 output)"""
+    name = "elevenlabs"
+
+    def synthesize(self, text, voice_id):
+        request = urllib.request.Request(
+            f"{ELEVENLABS_BASE_URL}/text-to-speech/{voice_id}",
+            data=json.dumps({
+                "text": text,
+                "model_id": ELEVENLABS_MODEL_ID,
+                "voice_settings": {"stability": 0.5, "similarity_boost": 0.5}
+            }).encode("utf-8"),
+            headers={
+                "Accept": "audio/mpeg",
+                "Content-Type": "application/json",
+                "xi-api-key": ELEVENLABS_API_KEY
+            },
+            method="POST"
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=30) as response:
+                return response.read()
+        except Exception as e:
+            raise TTSError(f"ElevenLabs API error: {e}")
+
+class StubTTSProvider:
+    """Offline provider that returns silent MP3 audio roughly as long as the text would take to say"""
+    name = "stub"
+
+    # MPEG-1 Layer III, 128 kbps, 44.1 kHz; an all-zero frame body decodes to 26 ms of silence
+    SILENT_FRAME = b"\xff\xfb\x90\x64" + b"\x00" * 413
+    FRAMES_PER_WORD = 13
+
+    def synthesize(self, text, voice_id):
+        return self.SILENT_FRAME * (self.FRAMES_PER_WORD * max(1, len(text.split())))
+
+_provider = None
+
+def get_tts_provider():
+    """Get the configured provider; falls back to the stub when no ElevenLabs key is set"""
+    global _provider
+    if _provider is None:
+        if TTS_PROVIDER == 'stub':
+            _provider = StubTTSProvider()
+        elif not ELEVENLABS_API_KEY:
+            print("⚠️ ELEVENLABS_API_KEY not set, /api/tts returns silent stub audio")
+            _provider = StubTTSProvider()
+        else:
+            _provider = ElevenLabsProvider()
+    return _provider
+
+def normalize_text(text):
+    """Collapse whitespace and unify quotes so trivially different phrasings share a cache entry"""
+    text = text.replace("’", "'").replace("‘", "'").replace("“", '"').replace("”", '"')
+    return re.sub(r"\s+", " ", text).strip()
+
+def sign_speech_text(text):
+    """Token that lets a client have this exact text spoken by /api/tts"""
+    return hmac.new(TTS_SIGNING_KEY, normalize_text(text).encode("utf-8"), hashlib.sha256).hexdigest()
+
+def is_speech_allowed(text, token):
+    """Whether text was produced by this server (valid token) or is one of the preset phrases"""
+    if normalize_text(text) in TTS_PRESET_PHRASES:
+        return True
+    return bool(token) and hmac.compare_digest(sign_speech_text(text), token)
+
+def clean_text_for_speech(text):
+    """Strip markdown and math notation from a chat reply so it reads naturally"""
+    for pattern, replacement in SPEECH_REPLACEMENTS:
+        text = pattern.sub(replacement, text)
+    return text
+
+def split_sentences(text):
+    """Split text into sentences, the unit that is synthesized, cached and streamed"""
+    return [sentence for sentence in SENTENCE_BOUNDARY.split(normalize_text(text)) if sentence]
+
+def is_valid_voice_id(voice_id):
+    return bool(VOICE_ID_PATTERN.match(voice_id or ""))
+
+def get_cache_key(provider_name, voice_id, sentence):
+    """Cache file name for one sentence; the key covers provider, voice and normalized text"""
+    key = hashlib.sha256(f"{provider_name}\n{voice_id}\n{sentence}".encode("utf-8")).hexdigest()
+    return f"{key}.mp3"
+
+def get_sentence_audio(sentence, voice_id):
+    """
+    Get the MP3 audio for one sentence from the cache, or synthesize it once
+
+    Concurrent requests for the same sentence wait for a single provider call.
+
+    Returns:
+        MP3 bytes
+    """
+    provider = get_tts_provider()
+    cache_key = get_cache_key(provider.name, voice_id, sentence)
+    audio = _cache.read(cache_key)
+    if audio is not None:
+        record_cache_lookup("tts", True)
+        return audio
+
+    with _lock:
+        future = _in_flight.get(cache_key)
+        owner = future is None
+        if owner:
+            future = _in_flight[cache_key] = Future()
+
+    if not owner:
+        # Another request is synthesizing this sentence; reuse its result
+        record_cache_lookup("tts", True)
+        return future.result()
+
+    record_cache_lookup("tts", False)
+    try:
+        with stage_timer("tts.synthesize", provider=provider.name, chars=len(sentence)):
+            audio = provider.synthesize(sentence, voice_id)
+        record_bytes("tts_audio", len(audio))
+        _cache.write(cache_key, audio)
+        future.set_result(audio)
+        return audio
+    except Exception as e:
+        future.set_exception(e)
+        raise
+    finally:
+        with _lock:
+            _in_flight.pop(cache_key, None)
+
+def synthesize_speech(text, voice_id=None):
+    """
+    Start synthesizing text sentence by sentence
+
+    The first sentence is synthesized before returning, so a failing provider
+    can still be reported as an error; later sentences are synthesized in the
+    background while earlier ones stream.
+
+    Args:
+        text: Text to speak; markdown and math notation are stripped first
+        voice_id: Provider voice ID (defaults to ELEVENLABS_VOICE_ID)
+
+    Returns:
+        Tuple of (number of sentences, generator yielding MP3 bytes per sentence)
+    """
+    voice_id = voice_id or ELEVENLABS_VOICE_ID
+    sentences = split_sentences(clean_text_for_speech(text))
+    if not sentences:
+        return 0, iter(())
+
+    first_audio = get_sentence_audio(sentences[0], voice_id)
+    futures = [_executor.submit(get_sentence_audio, sentence, voice_id) for sentence in sentences[1:]]
+
+    def stream():
+        yield first_audio
+        for future in futures:
+            try:
+                yield future.result()
+            except Exception as e:
+                # Headers are already sent; end the audio early rather than breaking the stream
+                print(f"❌ TTS synthesis failed mid-stream: {e}")
+                for remaining in futures:
+                    remaining.cancel()
+                return
+
+    return len(sentences), stream()
+
+def cleanup_old_tts_cache(max_age_hours=24 * 7):
+    """Remove cached phrases that have not been used recently"""
+    try:
+        removed = _cache.cleanup(max_age_hours)
+        if removed:
+            print(f"🗑️ Cleaned up {removed} cached TTS phrases")
+
+    except Exception as e:
+        print(f"⚠️ Error during TTS cache cleanup: {e}")
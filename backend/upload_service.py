@@ -0,0 +1,242 @@
+import os
+import json
+import time
+import uuid
+import fcntl
+import shutil
+from contextlib import contextmanager
+
+import config
+from metrics import stage_timer, record_bytes
+from audio_streaming import RECORDING_EXTENSIONS
+
+# Recording upload storage configuration
+RECORDING_UPLOADS_DIR = "recording_uploads"
+UPLOAD_BLOCK_SIZE = 64 * 1024
+MAX_CHUNK_SIZE = int(os.getenv('MAX_UPLOAD_CHUNK_BYTES', str(8 * 1024 * 1024)))
+MAX_RECORDING_SIZE = int(os.getenv('MAX_RECORDING_BYTES', str(500 * 1024 * 1024)))
+
+class UploadError(Exception):
+    """Upload request that cannot be applied; carries the HTTP status to return"""
+    def __init__(self, message, status_code=400, offset=None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.offset = offset
+
+def ensure_upload_directories():
+    """Ensure required directories exist"""
+    # Get absolute path to the backend directory
+    backend_dir = os.path.dirname(os.path.abspath(__file__))
+    uploads_path = os.path.join(backend_dir, RECORDING_UPLOADS_DIR)
+    os.makedirs(uploads_path, exist_ok=True)
+
+def get_upload_dir(upload_id):
+    """Get the directory for an upload, rejecting ids that are not UUIDs"""
+    try:
+        upload_id = str(uuid.UUID(upload_id))
+    except (ValueError, TypeError, AttributeError):
+        raise UploadError("Invalid upload id", 400)
+    backend_dir = os.path.dirname(os.path.abspath(__file__))
+    return os.path.join(backend_dir, RECORDING_UPLOADS_DIR, upload_id)
+
+def read_upload_metadata(upload_id):
+    """Load the metadata for an upload, raising 404 if it does not exist"""
+    metadata_path = os.path.join(get_upload_dir(upload_id), "metadata.json")
+    if not os.path.exists(metadata_path):
+        raise UploadError("Upload not found", 404)
+    with open(metadata_path, 'r') as f:
+        return json.load(f)
+
+def write_upload_metadata(upload_id, metadata):
+    """Atomically write the metadata for an upload"""
+    upload_dir = get_upload_dir(upload_id)
+    metadata_path = os.path.join(upload_dir, "metadata.json")
+    temp_path = metadata_path + ".tmp"
+    with open(temp_path, 'w') as f:
+        json.dump(metadata, f)
+    os.replace(temp_path, metadata_path)
+
+def create_upload(filename=None, total_size=None):
+    """
+    Start a new chunked recording upload
+
+    Args:
+        filename: Original client filename, kept for the file extension
+        total_size: Expected total size in bytes, if known
+
+    Returns:
+        Upload status dictionary (see get_upload_status)
+    """
+    if total_size is not None and total_size > MAX_RECORDING_SIZE:
+        raise UploadError(f"Recording exceeds maximum size of {MAX_RECORDING_SIZE} bytes", 413)
+
+    extension = os.path.splitext(filename or "")[1].lower() or ".wav"
+    if extension not in RECORDING_EXTENSIONS:
+        raise UploadError(f"Unsupported recording type; use one of {', '.join(sorted(RECORDING_EXTENSIONS))}", 400)
+
+    ensure_upload_directories()
+    upload_id = str(uuid.uuid4())
+    upload_dir = get_upload_dir(upload_id)
+    os.makedirs(upload_dir, exist_ok=True)
+
+    open(os.path.join(upload_dir, f"recording{extension}"), 'wb').close()
+
+    write_upload_metadata(upload_id, {
+        "created_at": time.time(),
+        "filename": filename,
+        "extension": extension,
+        "total_size": total_size,
+        "complete": False
+    })
+
+    print(f"📤 Created recording upload {upload_id} (expected {total_size or 'unknown'} bytes)")
+    return get_upload_status(upload_id)
+
+def get_upload_path(upload_id):
+    """Get the path of the recording file for an upload"""
+    metadata = read_upload_metadata(upload_id)
+    return os.path.join(get_upload_dir(upload_id), f"recording{metadata['extension']}")
+
+def get_upload_status(upload_id):
+    """
+    Get the current state of an upload
+
+    Returns:
+        Dictionary with "upload_id", "offset" (bytes received), "total_size" and "complete"
+    """
+    metadata = read_upload_metadata(upload_id)
+    return {
+        "upload_id": upload_id,
+        "offset": os.path.getsize(get_upload_path(upload_id)),
+        "total_size": metadata.get("total_size"),
+        "complete": metadata.get("complete", False)
+    }
+
+@contextmanager
+def locked_upload(upload_id):
+    """
+    Hold an exclusive lock on an upload's recording file
+
+    flock works across threads and worker processes; a request that finds the upload
+    locked (e.g. a client retry racing the original chunk) gets a 409 instead of waiting.
+    """
+    with open(get_upload_path(upload_id), 'r+b') as f:
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            raise UploadError("Another chunk is being written to this upload", 409, os.fstat(f.fileno()).st_size)
+        try:
+            yield f
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+def append_upload_chunk(upload_id, offset, stream, content_length=None):
+    """
+    Append one chunk to an upload, streaming it to disk in fixed-size blocks
+
+    Args:
+        upload_id: Upload identifier
+        offset: Byte offset the client believes the chunk starts at
+        stream: Readable binary stream with the chunk bytes
+        content_length: Declared chunk size, if known
+
+    Returns:
+        The new offset after the chunk was written
+    """
+    with locked_upload(upload_id) as f:
+        # Offset and completion are checked under the lock so concurrent chunks can't both pass
+        status = get_upload_status(upload_id)
+        if status["complete"]:
+            raise UploadError("Upload is already complete", 409, status["offset"])
+        if offset != status["offset"]:
+            # Client must resume from the offset we actually have on disk
+            raise UploadError(f"Offset mismatch: expected {status['offset']}", 409, status["offset"])
+        if content_length is not None and content_length > MAX_CHUNK_SIZE:
+            raise UploadError(f"Chunk exceeds maximum size of {MAX_CHUNK_SIZE} bytes", 413, status["offset"])
+
+        limit = status["total_size"] or MAX_RECORDING_SIZE
+        written = 0
+
+        with stage_timer("upload.chunk_write"):
+            f.seek(offset)
+            try:
+                while True:
+                    block = stream.read(UPLOAD_BLOCK_SIZE)
+                    if not block:
+                        break
+                    written += len(block)
+                    if written > MAX_CHUNK_SIZE or offset + written > limit:
+                        raise UploadError("Chunk exceeds allowed upload size", 413, offset)
+                    f.write(block)
+                f.flush()
+            except Exception:
+                # Drop the partial chunk so the client can resume from the last good offset
+                f.truncate(offset)
+                raise
+
+    record_bytes("recording_upload", written)
+    return offset + written
+
+def complete_upload(upload_id):
+    """
+    Mark an upload as complete so it can be used for feedback generation
+
+    Returns:
+        Upload status dictionary
+    """
+    with locked_upload(upload_id):
+        status = get_upload_status(upload_id)
+        if status["total_size"] is not None and status["offset"] != status["total_size"]:
+            raise UploadError(
+                f"Upload incomplete: received {status['offset']} of {status['total_size']} bytes", 409, status["offset"]
+            )
+
+        metadata = read_upload_metadata(upload_id)
+        metadata["complete"] = True
+        metadata["completed_at"] = time.time()
+        write_upload_metadata(upload_id, metadata)
+
+    print(f"✅ Recording upload {upload_id} complete ({status['offset']} bytes)")
+    return get_upload_status(upload_id)
+
+def get_completed_upload_path(upload_id):
+    """Get the recording path for a completed upload, or raise if it is not ready"""
+    status = get_upload_status(upload_id)
+    if not status["complete"]:
+        raise UploadError("Upload is not complete", 409, status["offset"])
+    return get_upload_path(upload_id)
+
+def cleanup_upload(upload_id):
+    """Remove an upload and its recording"""
+    try:
+        upload_dir = get_upload_dir(upload_id)
+        if os.path.exists(upload_dir):
+            shutil.rmtree(upload_dir)
+            print(f"🗑️ Cleaned up recording upload {upload_id}")
+    except Exception as e:
+        print(f"⚠️ Error cleaning up recording upload {upload_id}: {e}")
+
+def cleanup_old_uploads(max_age_hours=24):
+    """Remove old recording uploads"""
+    try:
+        cutoff_time = time.time() - (max_age_hours * 3600)
+        backend_dir = os.path.dirname(os.path.abspath(__file__))
+        uploads_path = os.path.join(backend_dir, RECORDING_UPLOADS_DIR)
+
+        if not os.path.exists(uploads_path):
+            return
+
+        for upload_id in os.listdir(uploads_path):
+            upload_dir = os.path.join(uploads_path, upload_id)
+            if not os.path.isdir(upload_dir):
+                continue
+            # Chunk appends only touch the recording file, so use the newest file time
+            last_activity = max(
+                [os.path.getmtime(upload_dir)] +
+                [os.path.getmtime(os.path.join(upload_dir, name)) for name in os.listdir(upload_dir)]
+            )
+            if last_activity < cutoff_time:
+                cleanup_upload(upload_id)
+
+    except Exception as e:
+        print(f"⚠️ Error during upload cleanup: {e}")
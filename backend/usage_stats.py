@@ -0,0 +1,80 @@
+import time
+import threading
+
+from metrics import stage_timer, record_openai_call
+
+# In-process API usage totals, keyed by call label (e.g. "chat", "slide_feedback")
+_usage = {}
+_usage_lock = threading.Lock()
+
+def record_usage(label, response, elapsed_seconds=None):
+    """
+    Record token usage reported by an OpenAI chat completion
+
+    Args:
+        label: Name of the call site, used to group totals
+        response: Chat completion response with a `usage` attribute
+        elapsed_seconds: Request latency, if measured by the caller
+
+    Returns:
+        Dictionary with this call's prompt, cached and completion token counts
+    """
+    usage = getattr(response, 'usage', None)
+    if usage is None:
+        return None
+
+    details = getattr(usage, 'prompt_tokens_details', None)
+    call = {
+        "prompt_tokens": usage.prompt_tokens or 0,
+        "cached_tokens": (getattr(details, 'cached_tokens', 0) or 0) if details else 0,
+        "completion_tokens": usage.completion_tokens or 0
+    }
+
+    record_openai_call(label, call["prompt_tokens"], call["cached_tokens"], call["completion_tokens"])
+
+    with _usage_lock:
+        totals = _usage.setdefault(label, {
+            "requests": 0,
+            "prompt_tokens": 0,
+            "cached_tokens": 0,
+            "completion_tokens": 0,
+            "seconds": 0.0
+        })
+        totals["requests"] += 1
+        totals["prompt_tokens"] += call["prompt_tokens"]
+        totals["cached_tokens"] += call["cached_tokens"]
+        totals["completion_tokens"] += call["completion_tokens"]
+        if elapsed_seconds is not None:
+            totals["seconds"] += elapsed_seconds
+
+    cached_percent = 100.0 * call["cached_tokens"] / call["prompt_tokens"] if call["prompt_tokens"] else 0.0
+    latency_text = f", {elapsed_seconds:.2f}s" if elapsed_seconds is not None else ""
+    print(f"💰 {label}: {call['prompt_tokens']} prompt tokens ({call['cached_tokens']} cached, {cached_percent:.0f}%), "
+          f"{call['completion_tokens']} completion tokens{latency_text}")
+    return call
+
+def timed_completion(label, create, **kwargs):
+    """Call a chat completion function, recording its latency and token usage under `label`"""
+    started = time.perf_counter()
+    with stage_timer(f"llm.{label}", model=kwargs.get("model")) as llm_span:
+        response = create(**kwargs)
+        call = record_usage(label, response, time.perf_counter() - started)
+        if call:
+            llm_span.set_attributes(**call)
+    return response
+
+def get_usage_summary():
+    """
+    Get usage totals per call label
+
+    Returns:
+        Dictionary mapping labels to totals, including the cached share of prompt tokens
+    """
+    with _usage_lock:
+        summary = {label: dict(totals) for label, totals in _usage.items()}
+
+    for totals in summary.values():
+        prompt_tokens = totals["prompt_tokens"]
+        totals["cached_ratio"] = round(totals["cached_tokens"] / prompt_tokens, 3) if prompt_tokens else 0.0
+        totals["avg_seconds"] = round(totals["seconds"] / totals["requests"], 3) if totals["requests"] else 0.0
+    return summary
@@ -8,6 +8,55 @@ import './App.css';
 
 const AppContext = createContext();
 
+const RECORDING_CHUNK_SIZE = 4 * 1024 * 1024;
+const RECORDING_UPLOAD_RETRIES = 3;
+
+// Upload a recording in chunks, resuming from the server's offset after a failed chunk
+const uploadRecordingInChunks = async (blob, filename) => {
+  const createResponse = await fetch('http://localhost:5001/api/recordings', {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify({ filename, totalSize: blob.size })
+  });
+  if (!createResponse.ok) {
+    throw new Error('Failed to start recording upload');
+  }
+  const { upload_id: uploadId } = await createResponse.json();
+
+  let offset = 0;
+  let retries = 0;
+  while (offset < blob.size) {
+    try {
+      const response = await fetch(`http://localhost:5001/api/recordings/${uploadId}`, {
+        method: 'PATCH',
+        headers: { 'Upload-Offset': String(offset), 'Content-Type': 'application/offset+octet-stream' },
+        body: blob.slice(offset, offset + RECORDING_CHUNK_SIZE)
+      });
+      const data = await response.json();
+      if (!response.ok && response.status !== 409) {
+        throw new Error(data.error || 'Chunk upload failed');
+      }
+      // On 409 the server reports the offset it actually has; resume from there
+      offset = data.offset;
+      retries = 0;
+    } catch (error) {
+      if (++retries > RECORDING_UPLOAD_RETRIES) {
+        throw error;
+      }
+      const statusResponse = await fetch(`http://localhost:5001/api/recordings/${uploadId}`);
+      offset = (await statusResponse.json()).offset;
+    }
+  }
+
+  const completeResponse = await fetch(`http://localhost:5001/api/recordings/${uploadId}/complete`, {
+    method: 'POST'
+  });
+  if (!completeResponse.ok) {
+    throw new Error('Failed to complete recording upload');
+  }
+  return uploadId;
+};
+
 function ChatApp() {
   const { 
     messages, setMessages, selectedAssignment, setSelectedAssignment,
@@ -76,7 +125,7 @@ function ChatApp() {
         setMessages(prev => [...prev, aiMessage]);
         
         // Trigger TTS for AI response
-        TTSService.speak(data.response);
+        TTSService.speak(data.response, data.tts_token);
       } else {
         const errorMessage = { role: 'assistant', content: `Error: ${data.error}` };
         setMessages(prev => [...prev, errorMessage]);
@@ -115,7 +164,13 @@ function ChatApp() {
         const formData = new FormData();
         formData.append('messages', JSON.stringify(messages));
         formData.append('selectedAssignment', selectedAssignment || '');
-        formData.append('recording', recordingBlob, 'presentation.wav');
+        try {
+          const recordingUploadId = await uploadRecordingInChunks(recordingBlob, 'presentation.wav');
+          formData.append('recordingUploadId', recordingUploadId);
+        } catch (uploadError) {
+          console.warn('Chunked upload failed, sending recording inline:', uploadError);
+          formData.append('recording', recordingBlob, 'presentation.wav');
+        }
         formData.append('slideTimestamps', JSON.stringify(slideTimestamps));
         formData.append('pdfSessionId', pdfSessionId || '');
         formData.append('pdfSlideCount', pdfSlideCount || '');
@@ -554,6 +609,7 @@ function App() {
         const formData = new FormData();
         formData.append('messages', JSON.stringify(interventionMessages));
         formData.append('selectedAssignment', selectedAssignment);
+        formData.append('currentSlideRange', JSON.stringify(slideRange));
         formData.append('audio', audioSegment, 'recording.wav');
         
         response = await fetch('http://localhost:5001/api/chat', {
@@ -570,7 +626,8 @@ function App() {
           },
           body: JSON.stringify({ 
             messages: interventionMessages,
-            selectedAssignment: selectedAssignment
+            selectedAssignment: selectedAssignment,
+            currentSlideRange: slideRange
           }),
         });
       }
@@ -583,7 +640,7 @@ function App() {
         setMessages(prev => [...prev, aiQuestion]);
         
         // Trigger TTS for AI intervention question
-        TTSService.speak(data.response);
+        TTSService.speak(data.response, data.tts_token);
         
         // Don't increment questionsAsked here - it gets incremented in handleInterventionResponse
         console.log('AI VC Question 1 generated:', data.response);
@@ -614,7 +671,8 @@ function App() {
         },
         body: JSON.stringify({ 
           messages: conversationMessages,
-          selectedAssignment: selectedAssignment
+          selectedAssignment: selectedAssignment,
+          currentSlideRange: currentSlideRange
         }),
       });
       
@@ -625,7 +683,7 @@ function App() {
         setMessages(prev => [...prev, followUpQuestion]);
         
         // Trigger TTS for follow-up question
-        TTSService.speak(data.response);
+        TTSService.speak(data.response, data.tts_token);
         
         console.log('AI Follow-up Question generated:', data.response);
       } else {
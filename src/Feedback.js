@@ -10,6 +10,20 @@ function Feedback() {
   const [isModalOpen, setIsModalOpen] = useState(false);
 
   useEffect(() => {
+    // A shared link (/feedback?session=<id>) loads the stored report from the backend
+    const sessionId = new URLSearchParams(window.location.search).get('session');
+    if (sessionId) {
+      fetch(`http://localhost:5001/api/feedback/${encodeURIComponent(sessionId)}`)
+        .then(response => (response.ok ? response.json() : null))
+        .then(data => setFeedbackData(data))
+        .catch(error => {
+          console.error('Error loading stored feedback:', error);
+          setFeedbackData(null);
+        })
+        .finally(() => setLoading(false));
+      return;
+    }
+
     // Get feedback from localStorage
     const storedFeedback = localStorage.getItem('pitchFeedback');
     
@@ -44,6 +58,22 @@ function Feedback() {
     setLoading(false);
   }, []);
 
+  useEffect(() => {
+    // Start fetching the thumbnail sprite and first full-size slide as soon as the feedback is known
+    if (!feedbackData || !feedbackData.preload) {
+      return undefined;
+    }
+    const links = feedbackData.preload.map(({ url, as }) => {
+      const link = document.createElement('link');
+      link.rel = 'preload';
+      link.as = as;
+      link.href = `http://localhost:5001${url}`;
+      document.head.appendChild(link);
+      return link;
+    });
+    return () => links.forEach(link => link.remove());
+  }, [feedbackData]);
+
   const goBack = () => {
     window.history.back();
   };
@@ -327,6 +357,7 @@ function Feedback() {
                     <SlideRow
                       key={slideData.slide_number}
                       slideData={slideData}
+                      sprite={feedbackData.thumbnail_sprite}
                       onImageClick={handleImageClick}
                     />
                   ))}
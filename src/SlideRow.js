@@ -1,9 +1,12 @@
 import React, { useState } from 'react';
 
-function SlideRow({ slideData, onImageClick }) {
+function SlideRow({ slideData, sprite, onImageClick }) {
   const [audioError, setAudioError] = useState(false);
   const [imageError, setImageError] = useState(false);
 
+  // Position of this slide's thumbnail in the session sprite sheet, if there is one
+  const spriteCell = sprite && sprite.slides[String(slideData.slide_number)];
+
   const getStatusIcon = (status) => {
     switch (status) {
       case 'met':
@@ -85,9 +88,20 @@ function SlideRow({ slideData, onImageClick }) {
         <div style={{ marginBottom: '8px', fontWeight: 'bold', color: '#2c3e50' }}>
           Slide {slideData.slide_number}
         </div>
-        {!imageError ? (
+        {spriteCell ? (
+          <SpriteThumbnail
+            sprite={sprite}
+            cell={spriteCell}
+            label={`Slide ${slideData.slide_number}`}
+            onClick={() => onImageClick(`http://localhost:5001${slideData.image_url_full}`, slideData.slide_number)}
+          />
+        ) : !imageError ? (
           <img
             src={`http://localhost:5001${slideData.image_url}`}
+            srcSet={slideData.image_url_base && [320, 480, 640].map(width =>
+              `http://localhost:5001${slideData.image_url_base}?width=${width}&format=webp ${width}w`
+            ).join(', ')}
+            sizes="180px"
             alt={`Slide ${slideData.slide_number}`}
             style={{
               maxWidth: '180px',
@@ -159,6 +173,7 @@ function SlideRow({ slideData, onImageClick }) {
           <div>
             <audio
               controls
+              preload="none"
               style={{
                 width: '100%',
                 maxWidth: '180px'
@@ -193,4 +208,32 @@ function SlideRow({ slideData, onImageClick }) {
   );
 }
 
+function SpriteThumbnail({ sprite, cell, label, onClick }) {
+  // Scale the cell to fit the same 180x120 box as a standalone thumbnail
+  const scale = Math.min(180 / cell.width, 120 / cell.height, 1);
+
+  return (
+    <div
+      role="img"
+      aria-label={label}
+      style={{
+        display: 'inline-block',
+        width: `${cell.width * scale}px`,
+        height: `${cell.height * scale}px`,
+        backgroundImage: `url(http://localhost:5001${sprite.url})`,
+        backgroundPosition: `-${cell.x * scale}px -${cell.y * scale}px`,
+        backgroundSize: `${sprite.width * scale}px ${sprite.height * scale}px`,
+        backgroundRepeat: 'no-repeat',
+        border: '2px solid #ddd',
+        borderRadius: '4px',
+        cursor: 'pointer',
+        transition: 'border-color 0.2s'
+      }}
+      onClick={onClick}
+      onMouseOver={(e) => e.currentTarget.style.borderColor = '#3498db'}
+      onMouseOut={(e) => e.currentTarget.style.borderColor = '#ddd'}
+    />
+  );
+}
+
 export default SlideRow;
\ No newline at end of file
@@ -1,9 +1,9 @@
 class TTSService {
   constructor() {
     this.currentAudio = null;
-    this.apiKey = process.env.REACT_APP_ELEVENLABS_API_KEY || 'your-api-key-here';
-    this.voiceId = process.env.REACT_APP_ELEVENLABS_VOICE_ID || 'b49kxxWbYzfNv7AZOp3g';
-    this.baseUrl = 'https://api.elevenlabs.io/v1';
+    // Speech is synthesized and cached by the backend; the ElevenLabs key stays on the server
+    this.voiceId = process.env.REACT_APP_ELEVENLABS_VOICE_ID || '';
+    this.baseUrl = 'http://localhost:5001/api/tts';
     this.isLoading = false;
     this.isSpeaking = false;
     this.listeners = new Set();
@@ -27,15 +27,14 @@ class TTSService {
     this.recordingData = null;
   }
 
-  async speak(text) {
+  // token is the tts_token returned with a VC reply; the backend only speaks text it produced
+  // (markdown and math notation are stripped there, so the text is sent exactly as received)
+  async speak(text, token) {
     try {
       // Stop any currently playing audio
       this.stop();
 
-      // Clean text for TTS (remove markdown and math notation)
-      const cleanText = this.cleanTextForTTS(text);
-      
-      if (!cleanText.trim()) {
+      if (!text || !text.trim()) {
         return;
       }
 
@@ -45,31 +44,16 @@ class TTSService {
       this.isSpeaking = false;
       this.notifyListeners();
 
-      const response = await fetch(`${this.baseUrl}/text-to-speech/${this.voiceId}`, {
-        method: 'POST',
-        headers: {
-          'Accept': 'audio/mpeg',
-          'Content-Type': 'application/json',
-          'xi-api-key': this.apiKey
-        },
-        body: JSON.stringify({
-          text: cleanText,
-          model_id: 'eleven_monolingual_v1',
-          voice_settings: {
-            stability: 0.5,
-            similarity_boost: 0.5
-          }
-        })
-      });
-
-      if (!response.ok) {
-        throw new Error(`ElevenLabs API error: ${response.status}`);
+      // The backend streams audio sentence by sentence, so playback starts
+      // as soon as the first sentence is ready
+      const params = new URLSearchParams({ text });
+      if (token) {
+        params.set('token', token);
       }
-
-      const audioBlob = await response.blob();
-      const audioUrl = URL.createObjectURL(audioBlob);
-      
-      this.currentAudio = new Audio(audioUrl);
+      if (this.voiceId) {
+        params.set('voiceId', this.voiceId);
+      }
+      this.currentAudio = new Audio(`${this.baseUrl}?${params.toString()}`);
       
       // Set up event listeners
       this.currentAudio.addEventListener('canplay', () => {
@@ -88,7 +72,6 @@ class TTSService {
 
       this.currentAudio.addEventListener('ended', () => {
         console.log('TTS: Audio ended');
-        URL.revokeObjectURL(audioUrl);
         this.currentAudio = null;
         this.isSpeaking = false;
         this.notifyListeners();
@@ -96,7 +79,6 @@ class TTSService {
 
       this.currentAudio.addEventListener('error', (e) => {
         console.error('Audio playback error:', e);
-        URL.revokeObjectURL(audioUrl);
         this.currentAudio = null;
         this.isLoading = false;
         this.isSpeaking = false;
@@ -152,23 +134,6 @@ class TTSService {
   getIsSpeaking() {
     return this.isSpeaking;
   }
-
-  cleanTextForTTS(text) {
-    return text
-      // Remove LaTeX math expressions
-      .replace(/\$\$[\s\S]*?\$\$/g, ' math expression ')
-      .replace(/\$[^$]*?\$/g, ' math ')
-      // Remove markdown formatting
-      .replace(/\*\*(.*?)\*\*/g, '$1')
-      .replace(/\*(.*?)\*/g, '$1')
-      .replace(/`(.*?)`/g, '$1')
-      .replace(/#{1,6}\s+(.*)/g, '$1')
-      // Remove code blocks
-      .replace(/```[\s\S]*?```/g, ' code block ')
-      // Clean up multiple spaces and newlines
-      .replace(/\s+/g, ' ')
-      .trim();
-  }
 }
 
 export default new TTSService();
\ No newline at end of file